@@ -0,0 +1,122 @@
+"""
+Side-by-side comparison of the supervised model backends
+
+Trains every backend on the same scaled features and split, then reports
+hold-out AUC, training time, serialized model size and single-row / batch
+inference latency. Use it to decide which backend to train for production;
+the API serves whichever backend the saved model metadata names.
+
+Usage:
+    python backend_comparison.py fraud_detection_data/nigerian_votes_dataset.csv
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from fraud_detector import BlockchainVotingFraudDetector, SUPERVISED_BACKENDS
+
+
+def single_row_latency_ms(predict: Callable, X: np.ndarray, n_rows: int = 200) -> float:
+    """Median latency of one-row calls (e.g. model.predict_proba), as the realtime API makes them"""
+    timings = []
+    for i in range(min(n_rows, len(X))):
+        start = time.perf_counter()
+        predict(X[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def benchmark_backend(backend: str, X_train: np.ndarray, y_train: np.ndarray,
+                      X_test: np.ndarray, y_test: np.ndarray, latency_rows: int = 200) -> Dict:
+    """Train one backend and measure quality, size and speed"""
+    from sklearn.metrics import roc_auc_score
+
+    model = BlockchainVotingFraudDetector.build_supervised_model(backend)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    training_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    start = time.perf_counter()
+    probabilities = model.predict_proba(X_test)[:, 1]
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'auc': float(roc_auc_score(y_test, probabilities)),
+        'training_seconds': round(training_seconds, 3),
+        'model_size_mb': round(buffer.tell() / 1e6, 3),
+        'trees': int(getattr(model, 'n_iter_', 0) or len(getattr(model, 'estimators_', []))),
+        'single_row_latency_ms': round(single_row_latency_ms(model.predict_proba, X_test, latency_rows), 3),
+        'batch_latency_us_per_vote': round(batch_seconds / len(X_test) * 1e6, 3),
+        'batch_size': int(len(X_test))
+    }
+
+
+def compare_backends(votes_df: pd.DataFrame, backends: Optional[List[str]] = None,
+                     output_dir: Optional[str] = None) -> pd.DataFrame:
+    """Benchmark backends on one shared split and print the comparison table"""
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.model_selection import train_test_split
+
+    backends = backends or list(SUPERVISED_BACKENDS)
+
+    print("⚖️  SUPERVISED BACKEND COMPARISON")
+    print("=" * 60)
+
+    # Feature engineering only; nothing here touches the saved models
+    detector = BlockchainVotingFraudDetector(model_save_dir=output_dir or 'fraud_detection_models')
+    feature_df = detector.prepare_features(votes_df, fit=True)
+    X = StandardScaler().fit_transform(feature_df[detector.feature_columns].fillna(0))
+    y = feature_df['is_fraud'].to_numpy(dtype=int)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    results = []
+    for backend in backends:
+        print(f"🎯 Benchmarking {SUPERVISED_BACKENDS[backend]['label']}...")
+        results.append(benchmark_backend(backend, X_train, y_train, X_test, y_test))
+
+    comparison = pd.DataFrame(results).set_index('backend')
+    print("\n" + comparison.T.to_string())
+
+    if output_dir:
+        report_path = os.path.join(output_dir, 'evaluation', 'backend_comparison.json')
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump({
+                'date': datetime.now().isoformat(),
+                'training_votes': int(len(y_train)),
+                'test_votes': int(len(y_test)),
+                'results': results
+            }, f, indent=2)
+        print(f"\n📁 Comparison saved to {report_path}")
+
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare supervised fraud model backends")
+    parser.add_argument('votes', help="Labelled votes CSV (with is_fraud)")
+    parser.add_argument('--backends', nargs='+', choices=list(SUPERVISED_BACKENDS))
+    parser.add_argument('--model-dir', default='fraud_detection_models',
+                        help="The report is written to <model-dir>/evaluation")
+    args = parser.parse_args()
+
+    compare_backends(pd.read_csv(args.votes), args.backends, args.model_dir)
+
+
+if __name__ == "__main__":
+    main()
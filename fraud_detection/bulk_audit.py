@@ -0,0 +1,451 @@
+"""
+Offline bulk fraud audit for whole-election vote exports
+
+Pass 1 streams the export once and builds election-wide aggregates (per IP,
+device, voter, location, location-hour and candidate counts, session
+statistics, per-location vote times, and each vote's time, entity hashes
+and candidate). The collusion graph is then replayed once over all votes in
+global time order, so cluster features do not depend on how the export is
+sorted. Pass 2 streams the export again, computes the same features
+prepare_features() would on the full dataset, and scores chunks in parallel
+worker processes. Results are written to a Parquet file, one row group per
+chunk.
+
+Memory holds hashed per-key counts plus a few numbers per vote for the
+location timeline and collusion clusters; it does not grow with chunk size
+or column width.
+
+Usage:
+    python bulk_audit.py election_votes.csv audit_results.parquet --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, Optional
+from location_index import LocationIndex
+from collusion_graph import CollusionGraph, CLUSTER_FEATURES, IGNORED_ENTITY_VALUES
+
+# Location id and vote time (seconds) packed into one sortable int64
+_TS_SPAN = 10 ** 10
+# time_diff_prev for the first vote at a location, as in prepare_features()
+_FIRST_VOTE_GAP = 300
+
+AUDIT_COLUMNS = [
+    'vote_id', 'voter_id', 'candidate_id', 'location_id', 'timestamp', 'voting_method',
+    'ip_address', 'session_duration', 'device_fingerprint'
+]
+
+
+def _hash_keys(values: pd.Series) -> np.ndarray:
+    """Stable 64-bit hashes for string keys"""
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+def _entity_hashes(values: pd.Series) -> np.ndarray:
+    """Hashes for collusion graph entities, 0 for missing and placeholder values"""
+    hashes = _hash_keys(values)
+    ignored = values.isna().to_numpy() | values.astype(str).str.strip().str.lower().isin(IGNORED_ENTITY_VALUES).to_numpy()
+    hashes[ignored] = 0
+    return hashes
+
+
+def _to_seconds(timestamps: pd.Series) -> np.ndarray:
+    """Vote times as int64 seconds since the epoch"""
+    ts = pd.to_datetime(timestamps)
+    return ts.to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def iter_vote_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Stream a CSV or Parquet vote export in chunks, indexed by row number in the file"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        columns = [c for c in AUDIT_COLUMNS if c in parquet_file.schema_arrow.names]
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in AUDIT_COLUMNS)
+
+    offset = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+class _KeyCounter:
+    """Counts per key across chunks, compacting partial counts as it goes"""
+
+    def __init__(self, compact_every: int = 8):
+        self.parts = []
+        self.compact_every = compact_every
+
+    def add(self, keys: np.ndarray):
+        self.parts.append(pd.Series(keys).value_counts())
+        if len(self.parts) >= self.compact_every:
+            self.parts = [self._combined()]
+
+    def _combined(self) -> pd.Series:
+        if not self.parts:
+            return pd.Series(dtype=np.int64)
+        return pd.concat(self.parts).groupby(level=0).sum()
+
+    def finalize(self) -> pd.Series:
+        return self._combined()
+
+
+class GlobalVoteAggregates:
+    """Election-wide aggregates needed to compute features chunk by chunk"""
+
+    def __init__(self):
+        self.ip_counts = _KeyCounter()
+        self.device_counts = _KeyCounter()
+        self.voter_counts = _KeyCounter()
+        self.location_counts = _KeyCounter()
+        self.location_hour_counts = _KeyCounter()
+        self.candidate_counts = _KeyCounter()
+        self._ip_candidate_pairs = []
+        self._location_session_sums = []
+        self._timeline_parts = []
+        self._graph_parts = []
+        self.cluster_features = None
+        self._region_votes = None
+        self.n_votes = 0
+        self.session_sum = 0.0
+        self.session_sumsq = 0.0
+
+    def update(self, chunk: pd.DataFrame):
+        """Pass 1: fold one chunk into the aggregates"""
+        ip_hash = _hash_keys(chunk['ip_address'])
+        location = chunk['location_id'].to_numpy(dtype=np.int64)
+        seconds = _to_seconds(chunk['timestamp'])
+        hour = (seconds // 3600) % 24
+        session = chunk['session_duration'].to_numpy(dtype=float)
+
+        self.ip_counts.add(ip_hash)
+        self.device_counts.add(_hash_keys(chunk['device_fingerprint']))
+        self.voter_counts.add(_hash_keys(chunk['voter_id']))
+        self.location_counts.add(location)
+        self.location_hour_counts.add(location * 24 + hour)
+        self.candidate_counts.add(chunk['candidate_id'].to_numpy(dtype=np.int64))
+
+        self._ip_candidate_pairs.append(
+            pd.DataFrame({'ip': ip_hash, 'candidate': chunk['candidate_id'].to_numpy()}).drop_duplicates()
+        )
+        if len(self._ip_candidate_pairs) >= 8:
+            self._ip_candidate_pairs = [pd.concat(self._ip_candidate_pairs).drop_duplicates()]
+
+        self._location_session_sums.append(
+            pd.DataFrame({'location': location, 'session': session}).groupby('location')['session'].agg(['sum', 'count'])
+        )
+        self._timeline_parts.append(location * _TS_SPAN + seconds)
+        self._graph_parts.append((
+            seconds, _entity_hashes(chunk['voter_id']), _entity_hashes(chunk['device_fingerprint']),
+            _entity_hashes(chunk['ip_address']), chunk['candidate_id'].to_numpy(dtype=np.int64)
+        ))
+
+        self.n_votes += len(chunk)
+        self.session_sum += session.sum()
+        self.session_sumsq += (session ** 2).sum()
+
+    def finalize(self):
+        """Turn partial aggregates into lookup tables"""
+        self.ip_counts = self.ip_counts.finalize()
+        self.device_counts = self.device_counts.finalize()
+        self.voter_counts = self.voter_counts.finalize()
+        self.location_counts = self.location_counts.finalize()
+        self.location_hour_counts = self.location_hour_counts.finalize()
+        self.candidate_counts = self.candidate_counts.finalize()
+
+        pairs = pd.concat(self._ip_candidate_pairs).drop_duplicates()
+        self.ip_candidate_variety = pairs.groupby('ip').size()
+        self._ip_candidate_pairs = None
+
+        sums = pd.concat(self._location_session_sums).groupby(level=0).sum()
+        self.location_avg_session = (sums['sum'] / sums['count']).round(2)
+        self._location_session_sums = None
+
+        # Stable sort keeps file order within votes that share a location and time
+        keys = np.concatenate(self._timeline_parts)
+        order = np.argsort(keys, kind='stable')
+        self.timeline = keys[order]
+        self._timeline_parts = None
+
+        # For tied votes only the first in file order has a gap to the previous vote
+        t = self.timeline
+        group_start = np.r_[True, t[1:] != t[:-1]]
+        has_tie = np.r_[t[1:] == t[:-1], False]
+        tie_starts = np.nonzero(group_start & has_tie)[0]
+        self.tie_keys = t[tie_starts]
+        self.tie_first_rows = order[tie_starts]
+
+        # Sample standard deviation, matching pandas .std()
+        n = max(self.n_votes, 1)
+        self.session_mean = self.session_sum / n
+        variance = (self.session_sumsq - n * self.session_mean ** 2) / max(n - 1, 1)
+        self.session_std = float(np.sqrt(max(variance, 0.0)))
+        self.candidate_mean_popularity = float(self.candidate_counts.mean())
+
+        # Collusion clusters as they stood when each vote arrived, election-wide
+        if self._graph_parts:
+            columns = [np.concatenate(part) for part in zip(*self._graph_parts)]
+            self.cluster_features = self._replay_collusion_graph(*columns)
+        else:
+            self.cluster_features = np.zeros((0, len(CLUSTER_FEATURES)))
+        self._graph_parts = None
+
+        return self
+
+    @staticmethod
+    def _replay_collusion_graph(seconds: np.ndarray, voters: np.ndarray, devices: np.ndarray,
+                                ips: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """Cluster features per vote (in file order), replaying all votes in time order"""
+        graph = CollusionGraph()
+        # Stable sort keeps file order within votes that share a time, as prepare_features() does
+        order = np.argsort(seconds, kind='stable')
+        # Integer hashes link entities directly; hash 0 marks a placeholder, which the graph skips like None
+        features = [
+            graph.add_vote(voter or None, device or None, ip or None, candidate, t)
+            for voter, device, ip, candidate, t in zip(
+                voters[order].tolist(), devices[order].tolist(), ips[order].tolist(),
+                candidates[order].tolist(), seconds[order].tolist()
+            )
+        ]
+        values = np.zeros((len(seconds), len(CLUSTER_FEATURES)))
+        if features:
+            values[order] = features
+        return values
+
+    def take_cluster_features(self) -> np.ndarray:
+        """Hand the per-vote cluster features to the caller so workers are not sent a copy"""
+        values, self.cluster_features = self.cluster_features, None
+        return values
+
+    def features(self, chunk: pd.DataFrame, encoders: Dict, location_index: LocationIndex) -> pd.DataFrame:
+        """Pass 2: election-wide features for one chunk, as prepare_features() computes them"""
+        ts = pd.to_datetime(chunk['timestamp'])
+        seconds = _to_seconds(chunk['timestamp'])
+        location = chunk['location_id'].to_numpy(dtype=np.int64)
+        ip_hash = _hash_keys(chunk['ip_address'])
+        session = chunk['session_duration'].to_numpy(dtype=float)
+
+        features = pd.DataFrame(index=chunk.index)
+        features['hour'] = ts.dt.hour
+        features['day_of_week'] = ts.dt.dayofweek
+        features['minute'] = ts.dt.minute
+        features['is_weekend'] = features['day_of_week'].isin([5, 6]).astype(int)
+        features['session_duration'] = session
+        features['session_z_score'] = np.abs((session - self.session_mean) / (self.session_std + 1e-6))
+        features['time_diff_prev'] = self._time_since_previous(location, seconds, chunk.index.to_numpy())
+
+        features['votes_same_ip'] = self.ip_counts.reindex(ip_hash).to_numpy()
+        features['votes_same_location'] = self.location_counts.reindex(location).to_numpy()
+        features['votes_same_device'] = self.device_counts.reindex(_hash_keys(chunk['device_fingerprint'])).to_numpy()
+        features['votes_same_voter'] = self.voter_counts.reindex(_hash_keys(chunk['voter_id'])).to_numpy()
+        features['votes_same_hour_location'] = self.location_hour_counts.reindex(
+            location * 24 + features['hour'].to_numpy()
+        ).to_numpy()
+
+        features['location_total_votes'] = features['votes_same_location']
+        features['location_avg_session'] = self.location_avg_session.reindex(location).to_numpy()
+        
+        # Election-wide state/LGA vote counts, computed once per process
+        if self._region_votes is None:
+            self._region_votes = location_index.vote_counts_by_region(
+                self.location_counts.index.to_numpy(), self.location_counts.to_numpy()
+            )
+        rollups = location_index.rollup_features(
+            location, features['location_total_votes'].to_numpy(dtype=float), *self._region_votes
+        )
+        for name, values in rollups.items():
+            features[name] = values
+
+        popularity = self.candidate_counts.reindex(chunk['candidate_id'].to_numpy(dtype=np.int64)).to_numpy()
+        features['candidate_popularity'] = popularity
+        features['voting_against_trend'] = (popularity < self.candidate_mean_popularity).astype(int)
+
+        features['ip_vote_count'] = features['votes_same_ip']
+        features['ip_candidate_variety'] = self.ip_candidate_variety.reindex(ip_hash).to_numpy()
+
+        # Attached to the chunk by run_audit from the pass-1 graph replay
+        for name in CLUSTER_FEATURES:
+            if name in chunk.columns:
+                features[name] = chunk[name].to_numpy()
+
+        if 'voting_method' in encoders:
+            classes = {c: i for i, c in enumerate(encoders['voting_method'].classes_)}
+            # Methods unseen in training get -1 rather than aborting a long audit
+            features['voting_method_encoded'] = chunk['voting_method'].astype(str).map(classes).fillna(-1).astype(int)
+
+        return features.fillna(0)
+
+    def _time_since_previous(self, location: np.ndarray, seconds: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Seconds since the previous vote at the same location, election-wide"""
+        keys = location * _TS_SPAN + seconds
+        left = np.searchsorted(self.timeline, keys, side='left')
+        right = np.searchsorted(self.timeline, keys, side='right')
+
+        previous = self.timeline[np.maximum(left - 1, 0)]
+        has_previous = (left > 0) & (previous // _TS_SPAN == location)
+
+        diff = np.where(has_previous, keys - previous, _FIRST_VOTE_GAP).astype(float)
+
+        # Votes sharing a timestamp at one location are zero seconds apart,
+        # except the first of them in file order
+        tied = (right - left) > 1
+        if tied.any():
+            first_rows = self.tie_first_rows[np.searchsorted(self.tie_keys, keys[tied])]
+            tied_diff = diff[tied]
+            tied_diff[first_rows != rows[tied]] = 0.0
+            diff[tied] = tied_diff
+        return diff
+
+
+# Worker process state, set once per process by _init_worker
+_worker = {}
+
+
+def _init_worker(model_dir: str, aggregates: GlobalVoteAggregates):
+    from fraud_detector import BlockchainVotingFraudDetector
+
+    detector = BlockchainVotingFraudDetector(model_save_dir=model_dir)
+    if not detector.load_models():
+        raise RuntimeError(f"No trained models in {model_dir}")
+    _worker['detector'] = detector
+    _worker['aggregates'] = aggregates
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Score one chunk with the full ensemble and explain every vote"""
+    detector = _worker['detector']
+    features = _worker['aggregates'].features(
+        chunk, detector.encoders, detector.location_index
+    )[detector.feature_columns]
+
+    X_scaled = detector.scalers['standard'].transform(features)
+    iso_fraud, rf_probability, ensemble_score = detector._ensemble_scores(X_scaled)
+
+    return pd.DataFrame({
+        'vote_id': chunk['vote_id'].astype(str).to_numpy(),
+        'location_id': chunk['location_id'].to_numpy(),
+        'is_fraud': ensemble_score > detector.decision['threshold'],
+        'fraud_probability': ensemble_score,
+        'isolation_score': iso_fraud,
+        'rf_probability': rf_probability,
+        'fraud_indicators': detector.identify_fraud_indicators_batch(
+            features, detector.location_index.states_for(chunk['location_id'].to_numpy())
+        )
+    })
+
+
+def _result_schema():
+    """Explicit Parquet schema; inferring it from a chunk without indicators gives list<null>"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('vote_id', pa.string()),
+        ('location_id', pa.int64()),
+        ('is_fraud', pa.bool_()),
+        ('fraud_probability', pa.float64()),
+        ('isolation_score', pa.float64()),
+        ('rf_probability', pa.float64()),
+        ('fraud_indicators', pa.list_(pa.string()))
+    ])
+
+
+def run_audit(input_path: str, output_path: str, model_dir: str = 'fraud_detection_models',
+              chunk_size: int = 100_000, workers: Optional[int] = None) -> Dict:
+    """Run both passes and write scored results to a Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    workers = workers or os.cpu_count() or 1
+    report = {'input': input_path, 'output': output_path, 'workers': workers, 'chunk_size': chunk_size}
+
+    print("🗳️  BULK ELECTION AUDIT")
+    print("=" * 60)
+
+    # Pass 1: election-wide aggregates
+    print("📊 Pass 1: aggregating election-wide statistics...")
+    start = time.perf_counter()
+    aggregates = GlobalVoteAggregates()
+    for chunk in iter_vote_chunks(input_path, chunk_size):
+        aggregates.update(chunk)
+        print(f"   {aggregates.n_votes:,} votes aggregated")
+    aggregates.finalize()
+    cluster_features = aggregates.take_cluster_features()
+    report['pass1_seconds'] = round(time.perf_counter() - start, 2)
+
+    # Pass 2: parallel scoring with a bounded number of chunks in flight
+    print(f"🎯 Pass 2: scoring with {workers} worker processes...")
+    start = time.perf_counter()
+    max_in_flight = 2 * workers
+    scored = flagged = 0
+    schema = _result_schema()
+    writer = None
+
+    def write_result(result: pd.DataFrame):
+        nonlocal writer, scored, flagged
+        table = pa.Table.from_pandas(result, schema=schema, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, schema)
+        writer.write_table(table)
+
+        scored += len(result)
+        flagged += int(result['is_fraud'].sum())
+        elapsed = time.perf_counter() - start
+        print(f"   {scored:,}/{aggregates.n_votes:,} votes scored "
+              f"({scored / max(elapsed, 1e-9):,.0f} votes/s, {flagged:,} flagged)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_dir, aggregates)) as pool:
+            pending = set()
+            for chunk in iter_vote_chunks(input_path, chunk_size):
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write_result(future.result())
+                rows = chunk.index.to_numpy()
+                chunk = chunk.assign(**dict(zip(CLUSTER_FEATURES, cluster_features[rows].T)))
+                pending.add(pool.submit(_score_chunk, chunk))
+
+            for future in wait(pending).done:
+                write_result(future.result())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    report['pass2_seconds'] = round(time.perf_counter() - start, 2)
+    report['votes_scored'] = scored
+    report['votes_flagged'] = flagged
+    report['votes_per_second'] = round(scored / max(report['pass2_seconds'], 1e-9), 1)
+
+    with open(output_path + '.report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n✅ Audit complete: {scored:,} votes, {flagged:,} flagged "
+          f"({report['pass1_seconds']}s + {report['pass2_seconds']}s)")
+    print(f"📁 Results: {output_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a whole-election vote export for fraud")
+    parser.add_argument('input', help="CSV or Parquet vote export")
+    parser.add_argument('output', help="Parquet file for the scored results")
+    parser.add_argument('--model-dir', default='fraud_detection_models')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    run_audit(args.input, args.output, args.model_dir, args.chunk_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Incremental collusion graph over voters, devices and IP addresses
+
+Every vote links its voter_id, device_fingerprint and ip_address. Linked
+entities are kept in a union-find structure (union by size, path halving),
+so each vote costs near-O(1) however large the clusters get. Each cluster
+tracks its voters, vote count, distinct candidates and a decayed rate of new
+voters joining it. Clusters inactive for longer than `ttl_seconds` of vote
+time, or the least recently active ones beyond `max_entities`, are evicted.
+Vote time is clamped to the local wall clock plus `max_clock_skew_seconds`,
+so one far-future timestamp cannot push the TTL horizon past live clusters.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+ENTITY_KINDS = ('voter_id', 'device_fingerprint', 'ip_address')
+
+# Feature columns produced for every vote
+CLUSTER_FEATURES = ['cluster_size', 'cluster_growth_rate', 'cluster_candidate_count']
+
+# Placeholder values that must not link unrelated voters together
+IGNORED_ENTITY_VALUES = {'', 'unknown', 'none', 'null', 'nan'}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def vote_seconds(timestamp: datetime) -> float:
+    """Naive vote time as seconds on the graph's clock"""
+    return (timestamp - _EPOCH).total_seconds()
+
+
+def wall_clock_seconds() -> float:
+    """Local wall-clock time on the graph's clock, matching naive vote timestamps"""
+    return vote_seconds(datetime.now())
+
+
+def entity_value(value) -> Optional[Hashable]:
+    """The value to link on, or None for missing and placeholder values"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str) and value.strip().lower() in IGNORED_ENTITY_VALUES:
+        return None
+    return value
+
+
+class _Cluster:
+    __slots__ = ('members', 'counts', 'votes', 'candidates', 'rate', 'rate_time', 'first_seen', 'last_seen')
+
+    def __init__(self, node: int, kind: str, now: float):
+        self.members = [node]
+        self.counts = {k: 0 for k in ENTITY_KINDS}
+        self.counts[kind] = 1
+        self.votes = 0
+        self.candidates = set()
+        # A new voter is the cluster's first arrival
+        self.rate = 1.0 if kind == 'voter_id' else 0.0
+        self.rate_time = now
+        self.first_seen = now
+        self.last_seen = now
+
+
+class CollusionGraph:
+    """Union-find clusters of voters linked through shared devices and IPs"""
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_entities: int = 2_000_000,
+                 growth_window_seconds: float = 3600, max_clock_skew_seconds: float = 300,
+                 clock: Callable[[], float] = wall_clock_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.max_entities = max_entities
+        self.growth_window_seconds = growth_window_seconds
+        self.max_clock_skew_seconds = max_clock_skew_seconds
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.parent = []
+        self.keys = []
+        self._free = []
+        self._node_of = {}
+        # Cluster per root, least recently active first
+        self.clusters = OrderedDict()
+        self.now = 0.0
+        self._latest = float('-inf')
+        self.stats = {'votes': 0, 'merges': 0, 'evicted_clusters': 0, 'evicted_entities': 0,
+                      'future_timestamps_clamped': 0}
+
+    def __len__(self) -> int:
+        return len(self._node_of)
+
+    def _find(self, node: int) -> int:
+        parent = self.parent
+        while parent[node] != node:
+            # Path halving: point every other node on the path at its grandparent
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _new_node(self, key: Tuple, now: float) -> int:
+        if self._free:
+            node = self._free.pop()
+            self.parent[node] = node
+            self.keys[node] = key
+        else:
+            node = len(self.parent)
+            self.parent.append(node)
+            self.keys.append(key)
+        self._node_of[key] = node
+        self.clusters[node] = _Cluster(node, key[0], now)
+        return node
+
+    def _decayed_rate(self, cluster: _Cluster, now: float) -> float:
+        elapsed = max(now - cluster.rate_time, 0.0)
+        return cluster.rate * math.exp(-elapsed / self.growth_window_seconds)
+
+    def _union(self, a: int, b: int, now: float) -> int:
+        """Merge the clusters rooted at a and b; returns the surviving root"""
+        big, small = self.clusters[a], self.clusters[b]
+        if len(small.members) > len(big.members):
+            a, b, big, small = b, a, small, big
+
+        self.parent[b] = a
+        big.members.extend(small.members)
+        for kind in ENTITY_KINDS:
+            big.counts[kind] += small.counts[kind]
+        big.votes += small.votes
+        big.candidates |= small.candidates
+        big.rate = self._decayed_rate(big, now) + self._decayed_rate(small, now)
+        big.rate_time = now
+        big.first_seen = min(big.first_seen, small.first_seen)
+        big.last_seen = max(big.last_seen, small.last_seen)
+
+        del self.clusters[b]
+        self.stats['merges'] += 1
+        return a
+
+    def add_vote(self, voter_id, device_fingerprint, ip_address, candidate_id,
+                 timestamp: Optional[float] = None) -> Tuple[float, float, float]:
+        """Link one vote's entities; returns (cluster_size, growth_rate, candidate_count)"""
+        now = self.now if timestamp is None else float(timestamp)
+        if now > self._latest:
+            # The wall clock only moves forward, so it is read again only past the last limit
+            self._latest = self.clock() + self.max_clock_skew_seconds
+            if now > self._latest:
+                now = max(self._latest, self.now)
+                self.stats['future_timestamps_clamped'] += 1
+        self.now = max(self.now, now)
+        self._evict()
+
+        roots = []
+        for kind, value in zip(ENTITY_KINDS, (voter_id, device_fingerprint, ip_address)):
+            value = entity_value(value)
+            if value is None:
+                continue
+            key = (kind, value)
+            node = self._node_of.get(key)
+            root = self._new_node(key, now) if node is None else self._find(node)
+            if root not in roots:
+                roots.append(root)
+
+        if not roots:
+            return 0.0, 0.0, 0.0
+
+        root = roots[0]
+        for other in roots[1:]:
+            root = self._union(root, other, now)
+
+        cluster = self.clusters[root]
+        cluster.votes += 1
+        cluster.candidates.add(candidate_id)
+        cluster.last_seen = max(cluster.last_seen, now)
+        self.clusters.move_to_end(root)
+        self.stats['votes'] += 1
+
+        return (float(cluster.counts['voter_id']), self._decayed_rate(cluster, now),
+                float(len(cluster.candidates)))
+
+    def _evict(self):
+        """Drop clusters idle past the TTL, and the least recently active beyond max_entities"""
+        horizon = self.now - self.ttl_seconds
+        while self.clusters:
+            root, cluster = next(iter(self.clusters.items()))
+            if cluster.last_seen >= horizon and len(self._node_of) < self.max_entities:
+                break
+            self._remove(root, cluster)
+
+    def _remove(self, root: int, cluster: _Cluster):
+        for node in cluster.members:
+            del self._node_of[self.keys[node]]
+            self.keys[node] = None
+            self._free.append(node)
+        del self.clusters[root]
+        self.stats['evicted_clusters'] += 1
+        self.stats['evicted_entities'] += len(cluster.members)
+
+    def _describe(self, root: int, cluster: _Cluster, max_members: int = 10) -> Dict:
+        return {
+            'cluster_id': f"CL_{root}",
+            'voters': cluster.counts['voter_id'],
+            'devices': cluster.counts['device_fingerprint'],
+            'ip_addresses': cluster.counts['ip_address'],
+            'votes': cluster.votes,
+            'distinct_candidates': len(cluster.candidates),
+            'growth_rate': round(self._decayed_rate(cluster, self.now), 4),
+            'first_seen': (_EPOCH + timedelta(seconds=cluster.first_seen)).isoformat(),
+            'last_seen': (_EPOCH + timedelta(seconds=cluster.last_seen)).isoformat(),
+            'sample_members': [
+                {'type': self.keys[node][0], 'value': self.keys[node][1]} for node in cluster.members[:max_members]
+            ]
+        }
+
+    def cluster_of(self, kind: str, value) -> Optional[Dict]:
+        """The cluster containing one entity, if it is still tracked"""
+        node = self._node_of.get((kind, value))
+        if node is None:
+            return None
+        root = self._find(node)
+        return self._describe(root, self.clusters[root])
+
+    def largest_clusters(self, limit: int = 20, min_voters: int = 2, order_by: str = 'voters') -> List[Dict]:
+        """Clusters with at least min_voters voters, largest (or fastest growing) first"""
+        import heapq
+
+        if order_by == 'growth_rate':
+            key = lambda item: self._decayed_rate(item[1], self.now)
+        elif order_by == 'distinct_candidates':
+            key = lambda item: len(item[1].candidates)
+        else:
+            key = lambda item: item[1].counts['voter_id']
+
+        candidates = (item for item in self.clusters.items() if item[1].counts['voter_id'] >= min_voters)
+        return [self._describe(root, cluster) for root, cluster in heapq.nlargest(limit, candidates, key=key)]
+
+    def get_stats(self) -> Dict:
+        return {
+            'entities': len(self._node_of),
+            'clusters': len(self.clusters),
+            'max_entities': self.max_entities,
+            'ttl_seconds': self.ttl_seconds,
+            **self.stats
+        }
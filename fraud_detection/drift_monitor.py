@@ -0,0 +1,205 @@
+"""
+Streaming feature drift monitor with fixed-memory histograms
+
+At training time every feature is binned on quantile edges of the training
+data and the bin proportions are saved as the reference. The reference is
+built from the training votes as live scoring featurizes them, one vote at a
+time, so both sides are computed the same way. Features that are constant
+on that path (batch-only counts) cannot drift and are left out. Live votes are
+counted into the same bins over a rolling window made of fixed-size
+buckets, so memory is (features x bins x buckets) no matter the traffic.
+PSI and a binned KS statistic are compared against the reference every
+`check_every` votes, and features crossing the PSI threshold raise alerts.
+"""
+
+import json
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DRIFT_REFERENCE_FILE = 'drift_reference.json'
+# References from batch-engineered features are not comparable with live votes
+DRIFT_REFERENCE_SOURCE = 'live_scoring'
+
+# Conventional PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift
+DEFAULT_PSI_THRESHOLD = 0.25
+_EPSILON = 1e-4
+
+
+def build_reference(X: np.ndarray, feature_columns: List[str], n_bins: int = 20) -> Dict:
+    """Quantile bin edges and bin proportions of the training features that vary"""
+    X = np.asarray(X, dtype=float)
+    varying = np.ptp(X, axis=0) > 0 if len(X) else np.zeros(X.shape[1], dtype=bool)
+    X = X[:, varying]
+    feature_columns = [column for column, keep in zip(feature_columns, varying) if keep]
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+
+    edges = np.full((X.shape[1], n_bins - 1), np.inf)
+    for f in range(X.shape[1]):
+        unique_edges = np.unique(np.quantile(X[:, f], quantiles))
+        edges[f, :len(unique_edges)] = unique_edges
+
+    counts = _bin_counts(X, edges, n_bins)
+    return {
+        'source': DRIFT_REFERENCE_SOURCE,
+        'feature_columns': list(feature_columns),
+        'n_bins': n_bins,
+        'edges': [[float(e) for e in row] for row in edges],
+        'proportions': (counts / max(len(X), 1)).tolist(),
+        'training_votes': int(len(X)),
+        'created': datetime.now().isoformat()
+    }
+
+
+def save_reference(reference: Dict, model_dir: str):
+    path = os.path.join(model_dir, DRIFT_REFERENCE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(reference, f)
+    os.replace(path + '.tmp', path)
+
+
+def load_reference(model_dir: str) -> Optional[Dict]:
+    path = os.path.join(model_dir, DRIFT_REFERENCE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _bin_index(X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin of every value: the number of edges it lies above (inf padding is never exceeded)"""
+    return (X[:, :, None] > edges[None, :, :]).sum(axis=2)
+
+
+def _bin_counts(X: np.ndarray, edges: np.ndarray, n_bins: int) -> np.ndarray:
+    bins = _bin_index(X, edges)
+    counts = np.zeros((X.shape[1], n_bins))
+    for f in range(X.shape[1]):
+        counts[f] = np.bincount(bins[:, f], minlength=n_bins)
+    return counts
+
+
+class DriftMonitor:
+    """Rolling-window feature histograms compared against the training reference"""
+
+    def __init__(self, reference: Dict, window_votes: int = 5000, n_buckets: int = 10,
+                 psi_threshold: float = DEFAULT_PSI_THRESHOLD, check_every: int = 500,
+                 min_votes: int = 1000):
+        self.feature_columns = reference['feature_columns']
+        self.n_bins = reference['n_bins']
+        self.edges = np.asarray(reference['edges'], dtype=float)
+        self.reference = np.asarray(reference['proportions'], dtype=float)
+        self.reference_cdf = np.cumsum(self.reference, axis=1)
+
+        self.bucket_votes = max(window_votes // n_buckets, 1)
+        self.psi_threshold = psi_threshold
+        self.check_every = check_every
+        self.min_votes = min_votes
+
+        n_features = len(self.feature_columns)
+        self._feature_rows = np.arange(n_features)
+        self.buckets = np.zeros((n_buckets, n_features, self.n_bins))
+        self.window = np.zeros((n_features, self.n_bins))
+        self.current_bucket = 0
+        self.bucket_fill = 0
+        self.total_votes = 0
+
+        self.drifting = set()
+        self.alerts = []
+        self._new_alerts = []
+        self.last_metrics = None
+
+    def observe(self, x: np.ndarray):
+        """Count one vote's feature vector"""
+        self.observe_batch(np.asarray(x, dtype=float).reshape(1, -1))
+
+    def observe_batch(self, X: np.ndarray):
+        """Count a batch of feature vectors (columns in feature_columns order) in one binning pass
+
+        Rows are counted in slices that end at bucket rotations and drift
+        checks, so the result is the same as observing them one by one.
+        """
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.feature_columns))
+        # Flat (feature, bin) cell of every value, counted with one bincount per slice
+        cells = _bin_index(X, self.edges) + self._feature_rows * self.n_bins
+        shape = self.window.shape
+
+        start = 0
+        while start < len(cells):
+            take = min(len(cells) - start, self.bucket_votes - self.bucket_fill,
+                       self.check_every - self.total_votes % self.check_every)
+            counts = np.bincount(cells[start:start + take].ravel(), minlength=self.window.size).reshape(shape)
+            self.buckets[self.current_bucket] += counts
+            self.window += counts
+            self.bucket_fill += take
+            self.total_votes += take
+            start += take
+
+            if self.bucket_fill >= self.bucket_votes:
+                # Rotate: the oldest bucket leaves the window and is reused
+                self.current_bucket = (self.current_bucket + 1) % len(self.buckets)
+                self.window -= self.buckets[self.current_bucket]
+                self.buckets[self.current_bucket] = 0
+                self.bucket_fill = 0
+
+            if self.total_votes % self.check_every == 0:
+                self.check()
+
+    def metrics(self) -> Dict:
+        """PSI and binned KS per feature for the current window"""
+        n = self.window.sum(axis=1, keepdims=True)
+        live = self.window / np.maximum(n, 1)
+
+        p = np.clip(live, _EPSILON, None)
+        q = np.clip(self.reference, _EPSILON, None)
+        psi = ((p - q) * np.log(p / q)).sum(axis=1)
+        ks = np.abs(np.cumsum(live, axis=1) - self.reference_cdf).max(axis=1)
+
+        return {
+            feature: {'psi': float(psi[i]), 'ks': float(ks[i])}
+            for i, feature in enumerate(self.feature_columns)
+        }
+
+    def check(self) -> List[Dict]:
+        """Evaluate drift and raise alerts for features that newly cross the threshold"""
+        window_votes = int(self.window[0].sum()) if len(self.window) else 0
+        if window_votes < self.min_votes:
+            return []
+
+        self.last_metrics = self.metrics()
+        new_alerts = []
+
+        for feature, values in self.last_metrics.items():
+            if values['psi'] > self.psi_threshold and feature not in self.drifting:
+                self.drifting.add(feature)
+                alert = {
+                    'feature': feature,
+                    'psi': values['psi'],
+                    'ks': values['ks'],
+                    'window_votes': window_votes,
+                    'timestamp': datetime.now().isoformat()
+                }
+                new_alerts.append(alert)
+                print(f"📉 Feature drift: {feature} PSI {values['psi']:.3f} (KS {values['ks']:.3f})")
+            elif values['psi'] <= self.psi_threshold and feature in self.drifting:
+                self.drifting.discard(feature)
+
+        self.alerts = (self.alerts + new_alerts)[-100:]
+        self._new_alerts.extend(new_alerts)
+        return new_alerts
+
+    def pop_new_alerts(self) -> List[Dict]:
+        """Alerts raised since the last call, for broadcasting"""
+        alerts, self._new_alerts = self._new_alerts, []
+        return alerts
+
+    def report(self) -> Dict:
+        return {
+            'total_votes': self.total_votes,
+            'window_votes': int(self.window[0].sum()) if len(self.window) else 0,
+            'psi_threshold': self.psi_threshold,
+            'drifting_features': sorted(self.drifting),
+            'metrics': self.last_metrics or self.metrics(),
+            'recent_alerts': self.alerts[-20:]
+        }
@@ -1,37 +1,90 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest, RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import joblib
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import warnings
+from indicator_rules import FraudIndicatorRules
+from location_index import LocationIndex, LocationVoteCounter
+from drift_monitor import DriftMonitor, DRIFT_REFERENCE_SOURCE, build_reference, save_reference, load_reference
+from collusion_graph import CollusionGraph, CLUSTER_FEATURES, vote_seconds
+from scoring_cascade import (
+    ScoringCascade, TIER_RULES, TIER_FAST_MODEL, TIER_FULL_MODEL,
+    DEGRADATION_LEVELS, DEGRADE_NO_INDICATORS, DEGRADE_NO_SUPERVISED, DEGRADE_RULES_ONLY
+)
 warnings.filterwarnings('ignore')
 
+# Live decision rule; model_evaluation.py calibrates these and stores them in the model metadata
+DEFAULT_DECISION = {
+    'isolation_weight': 0.5,
+    'threshold': 0.5,
+    'confidence_medium': 0.6,
+    'confidence_high': 0.8
+}
+
+# Supervised model backends: the metadata names the one a model directory was trained with
+SUPERVISED_BACKENDS = {
+    'random_forest': {'filename': 'random_forest_model.joblib', 'label': 'Random Forest'},
+    'hist_gradient_boosting': {'filename': 'hist_gradient_boosting_model.joblib', 'label': 'Histogram Gradient Boosting'}
+}
+DEFAULT_SUPERVISED_BACKEND = 'random_forest'
+
+# Metadata keys _save_models writes itself
+SAVED_METADATA_KEYS = ('feature_columns', 'training_date', 'model_version', 'supervised_backend', 'decision', 'cascade')
+
+def next_model_version(version: str) -> str:
+    """Bump the last component of a dotted version string ('1.0' -> '1.1')"""
+    parts = str(version).split('.')
+    try:
+        parts[-1] = str(int(parts[-1]) + 1)
+    except ValueError:
+        parts.append('1')
+    return '.'.join(parts)
+
+def _lap(trace: Optional[Dict[str, float]], stage: str, start: float) -> float:
+    """Add the milliseconds since start to a stage in the trace; returns the new start"""
+    now = time.perf_counter()
+    if trace is not None:
+        trace[stage] = trace.get(stage, 0.0) + (now - start) * 1000
+    return now
+
 class BlockchainVotingFraudDetector:
     """Advanced fraud detection for blockchain voting systems"""
     
-    def __init__(self, model_save_dir="fraud_detection_models"):
+    def __init__(self, model_save_dir="fraud_detection_models", rules_path=None, locations_path=None,
+                 supervised_backend=DEFAULT_SUPERVISED_BACKEND):
+        if supervised_backend not in SUPERVISED_BACKENDS:
+            raise ValueError(f"Unknown supervised backend '{supervised_backend}' "
+                             f"(choose from {', '.join(SUPERVISED_BACKENDS)})")
         self.model_save_dir = model_save_dir
+        self.supervised_backend = supervised_backend
         self.models = {}
         self.scalers = {}
         self.encoders = {}
         self.feature_columns = []
+        self.model_metadata = {}
+        self.decision = dict(DEFAULT_DECISION)
         self.is_trained = False
+        self.indicator_rules = FraudIndicatorRules.load(rules_path)
+        self.cascade = ScoringCascade()
+        self.location_index = LocationIndex.load(locations_path)
+        self.location_counter = LocationVoteCounter(self.location_index)
+        self.drift_reference = None
+        self.drift_monitor = None
+        self.collusion_graph = CollusionGraph()
         
         os.makedirs(model_save_dir, exist_ok=True)
     
-    def prepare_features(self, votes_df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_features(self, votes_df: pd.DataFrame, fit: bool = False) -> pd.DataFrame:
         """Engineer features for fraud detection"""
         print("🔧 Engineering fraud detection features...")
         
         df = votes_df.copy()
         
         # Convert timestamp to datetime if it's string
-        if df['timestamp'].dtype == 'object':
+        if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
             df['timestamp'] = pd.to_datetime(df['timestamp'])
         
         # Time-based features
@@ -40,6 +93,10 @@ class BlockchainVotingFraudDetector:
         df['minute'] = df['timestamp'].dt.minute
         df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
         
+        # Collusion clusters as they stood when each vote arrived
+        for name, values in self.chronological_cluster_features(df).items():
+            df[name] = values
+        
         # Voting pattern aggregations
         df['votes_same_ip'] = df.groupby('ip_address')['vote_id'].transform('count')
         df['votes_same_location'] = df.groupby('location_id')['vote_id'].transform('count')
@@ -73,7 +130,15 @@ class BlockchainVotingFraudDetector:
         
         # Voting rush indicators
         df_sorted['votes_same_hour_location'] = df_sorted.groupby(['location_id', 'hour'])['vote_id'].transform('count')
-        df_sorted['location_utilization_rate'] = df_sorted['location_total_votes'] / 1000  # Assume 1000 max capacity
+        
+        # Capacity and state/LGA rollups from the polling unit reference data
+        location_ids = df_sorted['location_id'].to_numpy()
+        state_votes, lga_votes = self.location_index.vote_counts_by_region(location_ids)
+        rollups = self.location_index.rollup_features(
+            location_ids, df_sorted['location_total_votes'].to_numpy(dtype=float), state_votes, lga_votes
+        )
+        for name, values in rollups.items():
+            df_sorted[name] = values
         
         # Candidate preference anomalies
         candidate_popularity = df['candidate_id'].value_counts()
@@ -91,26 +156,29 @@ class BlockchainVotingFraudDetector:
         for col in categorical_cols:
             if col in df_sorted.columns:
                 if col not in self.encoders:
+                    from sklearn.preprocessing import LabelEncoder
                     self.encoders[col] = LabelEncoder()
                     df_sorted[f'{col}_encoded'] = self.encoders[col].fit_transform(df_sorted[col].astype(str))
                 else:
                     df_sorted[f'{col}_encoded'] = self.encoders[col].transform(df_sorted[col].astype(str))
         
-        # Define feature columns
-        self.feature_columns = [
-            'hour', 'day_of_week', 'minute', 'is_weekend',
-            'session_duration', 'session_z_score', 'time_diff_prev',
-            'votes_same_ip', 'votes_same_location', 'votes_same_device', 'votes_same_voter',
-            'votes_same_hour_location', 'location_utilization_rate',
-            'candidate_popularity', 'voting_against_trend',
-            'ip_vote_count', 'ip_candidate_variety',
-            'location_total_votes', 'location_avg_session'
-        ]
-        
-        # Add encoded categorical features
-        for col in categorical_cols:
-            if f'{col}_encoded' in df_sorted.columns:
-                self.feature_columns.append(f'{col}_encoded')
+        # Define feature columns. Loaded models keep the columns they were trained on.
+        if fit or not self.feature_columns:
+            self.feature_columns = [
+                'hour', 'day_of_week', 'minute', 'is_weekend',
+                'session_duration', 'session_z_score', 'time_diff_prev',
+                'votes_same_ip', 'votes_same_location', 'votes_same_device', 'votes_same_voter',
+                'votes_same_hour_location', 'location_utilization_rate',
+                'candidate_popularity', 'voting_against_trend',
+                'ip_vote_count', 'ip_candidate_variety',
+                'location_total_votes', 'location_avg_session',
+                'location_registered_voters', 'lga_utilization_rate', 'state_utilization_rate'
+            ] + CLUSTER_FEATURES
+            
+            # Add encoded categorical features
+            for col in categorical_cols:
+                if f'{col}_encoded' in df_sorted.columns:
+                    self.feature_columns.append(f'{col}_encoded')
         
         # Fill missing values
         feature_df = df_sorted[self.feature_columns + ['is_fraud'] if 'is_fraud' in df_sorted.columns else self.feature_columns]
@@ -120,13 +188,60 @@ class BlockchainVotingFraudDetector:
         
         return feature_df
     
+    @staticmethod
+    def chronological_cluster_features(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Replay votes in time order through a fresh collusion graph, as live scoring sees them"""
+        timestamps = df['timestamp']
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        seconds = (timestamps - pd.Timestamp(1970, 1, 1)).dt.total_seconds().to_numpy()
+        
+        columns = [df[c].to_numpy(dtype=object) for c in ('voter_id', 'device_fingerprint', 'ip_address')]
+        candidates = df['candidate_id'].to_numpy()
+        
+        graph = CollusionGraph()
+        values = np.zeros((len(df), len(CLUSTER_FEATURES)))
+        for i in np.argsort(seconds, kind='stable'):
+            values[i] = graph.add_vote(columns[0][i], columns[1][i], columns[2][i], candidates[i], seconds[i])
+        
+        return dict(zip(CLUSTER_FEATURES, values.T))
+    
+    def live_feature_matrix(self, votes_df: pd.DataFrame) -> np.ndarray:
+        """Features of votes as live scoring computes them, in feature_columns order
+        
+        Votes are replayed in time order. Like live traffic, every vote joins
+        the collusion graph and the location counts, but only votes that pass
+        the tier-0 rules get features.
+        """
+        df = votes_df.copy()
+        if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp', kind='stable')
+        
+        clusters = self.chronological_cluster_features(df)
+        cluster_rows = list(zip(*(clusters[name] for name in CLUSTER_FEATURES)))
+        records = df.to_dict('records')
+        counter = LocationVoteCounter(self.location_index)
+        location_counts = [counter.add(vote_data.get('location_id', -1)) for vote_data in records]
+        rules = ScoringCascade()
+        passed = [i for i, vote_data in enumerate(records) if not rules.check_rules(vote_data)]
+        
+        feature_df, _ = self.prepare_vote_features(
+            [records[i] for i in passed], [cluster_rows[i] for i in passed], [location_counts[i] for i in passed]
+        )
+        return feature_df[self.feature_columns].to_numpy(dtype=float)
+    
     def train_models(self, votes_df: pd.DataFrame):
         """Train fraud detection models"""
+        # Training-only imports are kept local so the scoring path stays light
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.model_selection import train_test_split
+        
         print("🤖 Training blockchain voting fraud detection models...")
         print("=" * 60)
         
         # Prepare features
-        feature_df = self.prepare_features(votes_df)
+        feature_df = self.prepare_features(votes_df, fit=True)
         
         if 'is_fraud' not in feature_df.columns:
             raise ValueError("Training data must contain 'is_fraud' column")
@@ -141,6 +256,9 @@ class BlockchainVotingFraudDetector:
         self.scalers['standard'] = StandardScaler()
         X_scaled = self.scalers['standard'].fit_transform(X)
         
+        # Training distribution that live traffic is compared against, featurized as live scoring does it
+        self.drift_reference = build_reference(self.live_feature_matrix(votes_df), self.feature_columns)
+        
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X_scaled, y, test_size=0.2, random_state=42, stratify=y
@@ -148,26 +266,22 @@ class BlockchainVotingFraudDetector:
         
         # Train Isolation Forest (Anomaly Detection)
         print("🌲 Training Isolation Forest...")
-        self.models['isolation_forest'] = IsolationForest(
-            contamination=y.mean() + 0.01,  # Slightly higher than actual fraud rate
-            random_state=42,
-            n_estimators=200,
-            max_features=0.8
-        )
+        self.models['isolation_forest'] = self.build_isolation_forest(y.mean())
         # Train only on normal votes
         self.models['isolation_forest'].fit(X_train[y_train == 0])
         
-        # Train Random Forest Classifier
-        print("🎯 Training Random Forest Classifier...")
-        self.models['random_forest'] = RandomForestClassifier(
-            n_estimators=200,
-            max_depth=15,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42,
-            class_weight='balanced'
-        )
-        self.models['random_forest'].fit(X_train, y_train)
+        # Train the supervised classifier
+        print(f"🎯 Training {SUPERVISED_BACKENDS[self.supervised_backend]['label']} Classifier...")
+        for backend in SUPERVISED_BACKENDS:
+            self.models.pop(backend, None)
+        self.models[self.supervised_backend] = self.build_supervised_model(self.supervised_backend)
+        self.models[self.supervised_backend].fit(X_train, y_train)
+        
+        # Train the early-exit cascade and calibrate its bands on the hold-out split
+        print("🪜 Training scoring cascade...")
+        self.cascade.fit(X_train, y_train)
+        self.recalibrate_cascade(X_test, y_test)
+        self.models['cascade'] = self.cascade.model
         
         # Evaluate models
         self._evaluate_models(X_test, y_test)
@@ -178,8 +292,73 @@ class BlockchainVotingFraudDetector:
         self.is_trained = True
         print("✅ Training complete! Models saved.")
     
+    def recalibrate_cascade(self, X_holdout: np.ndarray, y_holdout: np.ndarray) -> Dict:
+        """Re-choose the tier-1 exit bands around the current decision rule on scaled hold-out votes"""
+        _, _, ensemble_score = self._ensemble_scores(X_holdout)
+        threshold = self.decision['threshold']
+        return self.cascade.calibrate(X_holdout, y_holdout, ensemble_score > threshold, threshold=threshold)
+    
+    @staticmethod
+    def build_isolation_forest(fraud_rate: float):
+        """Unfitted Isolation Forest with the production hyperparameters"""
+        from sklearn.ensemble import IsolationForest
+        return IsolationForest(
+            contamination=fraud_rate + 0.01,  # Slightly higher than actual fraud rate
+            random_state=42,
+            n_estimators=200,
+            max_features=0.8
+        )
+    
+    @staticmethod
+    def build_random_forest():
+        """Unfitted Random Forest with the production hyperparameters"""
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(
+            n_estimators=200,
+            max_depth=15,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            class_weight='balanced'
+        )
+    
+    @staticmethod
+    def build_hist_gradient_boosting():
+        """Unfitted histogram gradient boosting model; features are binned once and trees fit multi-core"""
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(
+            max_iter=300,
+            learning_rate=0.1,
+            max_leaf_nodes=31,
+            min_samples_leaf=20,
+            l2_regularization=1.0,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            random_state=42,
+            class_weight='balanced'
+        )
+    
+    @classmethod
+    def build_supervised_model(cls, backend: str = DEFAULT_SUPERVISED_BACKEND):
+        """Unfitted supervised classifier for a backend name"""
+        builders = {
+            'random_forest': cls.build_random_forest,
+            'hist_gradient_boosting': cls.build_hist_gradient_boosting
+        }
+        if backend not in builders:
+            raise ValueError(f"Unknown supervised backend '{backend}'")
+        return builders[backend]()
+    
+    @property
+    def supervised_model(self):
+        """The fitted classifier for the active backend"""
+        return self.models[self.supervised_backend]
+    
     def _evaluate_models(self, X_test, y_test):
         """Evaluate model performance"""
+        from sklearn.metrics import classification_report, roc_auc_score
+        
         print("\n📈 Model Performance Evaluation:")
         print("=" * 50)
         
@@ -191,78 +370,134 @@ class BlockchainVotingFraudDetector:
         print(classification_report(y_test, iso_pred_binary, zero_division=0))
         
         if len(np.unique(y_test)) > 1:
-            iso_auc = roc_auc_score(y_test, iso_pred_binary)
+            # Rank by the continuous anomaly score; the binary flag gives a one-point ROC curve
+            iso_auc = roc_auc_score(y_test, -self.models['isolation_forest'].score_samples(X_test))
             print(f"AUC Score: {iso_auc:.3f}")
         
-        # Random Forest
-        rf_pred = self.models['random_forest'].predict(X_test)
-        rf_pred_proba = self.models['random_forest'].predict_proba(X_test)[:, 1]
+        # Supervised classifier
+        rf_pred = self.supervised_model.predict(X_test)
+        rf_pred_proba = self.supervised_model.predict_proba(X_test)[:, 1]
         
-        print("\n🎯 Random Forest Results:")
+        print(f"\n🎯 {SUPERVISED_BACKENDS[self.supervised_backend]['label']} Results:")
         print(classification_report(y_test, rf_pred, zero_division=0))
         
         if len(np.unique(y_test)) > 1:
             rf_auc = roc_auc_score(y_test, rf_pred_proba)
             print(f"AUC Score: {rf_auc:.3f}")
         
-        # Feature Importance
+        # Feature Importance (gradient boosting exposes no impurity importances)
+        if not hasattr(self.supervised_model, 'feature_importances_'):
+            return
         feature_importance = pd.DataFrame({
             'feature': self.feature_columns,
-            'importance': self.models['random_forest'].feature_importances_
+            'importance': self.supervised_model.feature_importances_
         }).sort_values('importance', ascending=False)
         
         print(f"\n🎯 Top 10 Fraud Detection Features:")
         print(feature_importance.head(10).to_string(index=False))
     
-    def _save_models(self):
+    def _save_models(self, model_version='1.0', extra_metadata: Optional[Dict] = None):
         """Save trained models and preprocessors"""
         model_files = {
             'isolation_forest': 'isolation_forest_model.joblib',
-            'random_forest': 'random_forest_model.joblib'
+            self.supervised_backend: SUPERVISED_BACKENDS[self.supervised_backend]['filename'],
+            'cascade': 'cascade_model.joblib'
         }
         
         # Save models
         for model_name, filename in model_files.items():
-            joblib.dump(self.models[model_name], 
-                       os.path.join(self.model_save_dir, filename))
+            if model_name not in self.models:
+                continue
+            self._dump_atomic(self.models[model_name], filename)
         
         # Save scalers and encoders
-        joblib.dump(self.scalers, os.path.join(self.model_save_dir, 'scalers.joblib'))
-        joblib.dump(self.encoders, os.path.join(self.model_save_dir, 'encoders.joblib'))
+        self._dump_atomic(self.scalers, 'scalers.joblib')
+        self._dump_atomic(self.encoders, 'encoders.joblib')
+        if self.drift_reference:
+            save_reference(self.drift_reference, self.model_save_dir)
         
         # Save feature columns and metadata
         metadata = {
             'feature_columns': self.feature_columns,
             'training_date': datetime.now().isoformat(),
-            'model_version': '1.0'
+            'model_version': model_version,
+            'supervised_backend': self.supervised_backend
         }
+        metadata['decision'] = self.decision
+        if self.cascade.calibration:
+            metadata['cascade'] = self.cascade.calibration
+        metadata.update(extra_metadata or {})
         
+        # Metadata is written last and swapped in atomically - its version
+        # change is what tells a running API that new models are available
         import json
-        with open(os.path.join(self.model_save_dir, 'model_metadata.json'), 'w') as f:
+        metadata_path = os.path.join(self.model_save_dir, 'model_metadata.json')
+        with open(metadata_path + '.tmp', 'w') as f:
             json.dump(metadata, f, indent=2)
+        os.replace(metadata_path + '.tmp', metadata_path)
+        
+        self.model_metadata = metadata
+    
+    def carried_metadata(self) -> Dict:
+        """Metadata an in-place model update keeps: every key _save_models does not write itself
+        
+        training_date stays the date of the last full training; updated_date records the update.
+        """
+        metadata = self.model_metadata
+        carried = {key: value for key, value in metadata.items() if key not in SAVED_METADATA_KEYS}
+        carried['training_date'] = metadata.get('training_date', datetime.now().isoformat())
+        carried['updated_date'] = datetime.now().isoformat()
+        return carried
+    
+    def _dump_atomic(self, obj, filename: str):
+        """Write a joblib file so readers never see a partially written model"""
+        path = os.path.join(self.model_save_dir, filename)
+        joblib.dump(obj, path + '.tmp')
+        os.replace(path + '.tmp', path)
     
     def load_models(self):
         """Load pre-trained models"""
         try:
             print("📂 Loading pre-trained fraud detection models...")
             
+            # Load metadata first - it names the supervised backend to load
+            import json
+            with open(os.path.join(self.model_save_dir, 'model_metadata.json'), 'r') as f:
+                metadata = json.load(f)
+                self.feature_columns = metadata['feature_columns']
+                self.model_metadata = metadata
+                self.decision = {**DEFAULT_DECISION, **metadata.get('decision', {})}
+            
+            backend = metadata.get('supervised_backend', DEFAULT_SUPERVISED_BACKEND)
+            if backend not in SUPERVISED_BACKENDS:
+                raise ValueError(f"Model metadata names unknown supervised backend '{backend}'")
+            self.supervised_backend = backend
+            
             # Load models
             self.models['isolation_forest'] = joblib.load(
                 os.path.join(self.model_save_dir, 'isolation_forest_model.joblib')
             )
-            self.models['random_forest'] = joblib.load(
-                os.path.join(self.model_save_dir, 'random_forest_model.joblib')
+            self.models[backend] = joblib.load(
+                os.path.join(self.model_save_dir, SUPERVISED_BACKENDS[backend]['filename'])
             )
             
             # Load scalers and encoders
             self.scalers = joblib.load(os.path.join(self.model_save_dir, 'scalers.joblib'))
             self.encoders = joblib.load(os.path.join(self.model_save_dir, 'encoders.joblib'))
             
-            # Load metadata
-            import json
-            with open(os.path.join(self.model_save_dir, 'model_metadata.json'), 'r') as f:
-                metadata = json.load(f)
-                self.feature_columns = metadata['feature_columns']
+            # The cascade model is optional - older model directories run without it
+            cascade_path = os.path.join(self.model_save_dir, 'cascade_model.joblib')
+            if os.path.exists(cascade_path) and metadata.get('cascade'):
+                self.models['cascade'] = joblib.load(cascade_path)
+                self.cascade.load(self.models['cascade'], metadata['cascade'])
+            
+            # Drift monitoring needs a reference captured with the same features, on the live path
+            self.drift_reference = load_reference(self.model_save_dir)
+            if self.drift_reference and self.drift_reference.get('source') != DRIFT_REFERENCE_SOURCE:
+                print("⚠️ Drift reference was built from batch features - retrain to enable drift monitoring")
+                self.drift_reference = None
+            if self.drift_reference and set(self.drift_reference['feature_columns']) <= set(self.feature_columns):
+                self.drift_monitor = DriftMonitor(self.drift_reference)
             
             self.is_trained = True
             print("✅ Models loaded successfully!")
@@ -273,92 +508,309 @@ class BlockchainVotingFraudDetector:
             return False
         
         return True
+
+    def live_state(self) -> Dict:
+        """Live-traffic state (seen voters, collusion graph, location counts) that outlives a model version"""
+        return {'seen_voters': self.cascade.seen_voters, 'collusion_graph': self.collusion_graph,
+                'location_counter': self.location_counter}
     
-    def predict_fraud_realtime(self, vote_data: Dict) -> Dict:
+    def restore_live_state(self, state: Dict):
+        """Share another detector's live-traffic state; call after warm_up, which resets it"""
+        self.cascade.seen_voters = state['seen_voters']
+        self.collusion_graph = state['collusion_graph']
+        self.location_counter = state['location_counter']
+    
+    def warm_up(self, n_votes: int = 20) -> float:
+        """Score synthetic votes so the first real vote hits warm code paths"""
+        if not self.is_trained:
+            raise ValueError("Models must be loaded before warm-up")
+
+        start = time.perf_counter()
+
+        encoder = self.encoders.get('voting_method')
+        methods = list(encoder.classes_) if encoder is not None else ['electronic']
+        base_time = datetime(2024, 11, 16, 8, 0)
+
+        for i in range(n_votes):
+            self.predict_fraud_realtime({
+                'vote_id': f"WARMUP{i:04d}",
+                'voter_id': f"WARMUP{i:08d}",
+                'candidate_id': i % 5 + 1,
+                'location_id': i % 100 + 1,
+                'timestamp': base_time + timedelta(minutes=37 * i),
+                'voting_method': methods[i % len(methods)],
+                'ip_address': f"10.0.{i // 256}.{i % 256}",
+                'session_duration': 20 + (i * 13) % 220,
+                'device_fingerprint': f"warmup{i:010d}"
+            })
+
+        # Synthetic votes must not count as seen voters, join clusters, skew exit stats or drift windows
+        self.cascade.reset_state()
+        self.collusion_graph.reset()
+        self.location_counter.reset()
+        if self.drift_monitor:
+            self.drift_monitor = DriftMonitor(self.drift_reference)
+
+        return time.perf_counter() - start
+
+    def predict_fraud_realtime(self, vote_data: Dict, trace: Optional[Dict[str, float]] = None,
+                               degradation: int = 0) -> Dict:
         """Predict fraud for a single vote in real-time"""
+        return self.predict_fraud_batch([vote_data], trace, degradation)[0]
+    
+    def predict_fraud_batch(self, votes: List[Dict], trace: Optional[Dict[str, float]] = None,
+                            degradation: int = 0) -> List[Dict]:
+        """Score votes independently in one vectorized pass
+        
+        Each vote gets exactly the result predict_fraud_realtime gives it on
+        its own; batching only shares the model calls. When a trace dict is
+        given, the milliseconds spent in each scoring stage are added to it.
+        `degradation` indexes DEGRADATION_LEVELS: under load, indicators, then
+        the supervised model, then everything but the rules are skipped. Each
+        result names the level it was scored at.
+        """
+        if degradation == DEGRADE_NO_SUPERVISED and not self.cascade.has_fast_model:
+            # Without a tier-1 model nothing can stand in for the supervised model,
+            # so that level is skipped rather than capping every score at the isolation weight
+            degradation = DEGRADE_NO_INDICATORS
+        results = self._score_batch(votes, trace, degradation)
+        mode = DEGRADATION_LEVELS[degradation]
+        for result in results:
+            result['degradation'] = mode
+        return results
+    
+    def _score_batch(self, votes: List[Dict], trace: Optional[Dict[str, float]], degradation: int) -> List[Dict]:
         if not self.is_trained:
             if not self.load_models():
                 raise ValueError("No trained models available")
         
-        # Convert single vote to DataFrame
-        vote_df = pd.DataFrame([vote_data])
-        
-        # Prepare features (this will use cached encoders/scalers)
-        try:
-            feature_df = self.prepare_features(vote_df)
-            X = feature_df[self.feature_columns].fillna(0)
-            X_scaled = self.scalers['standard'].transform(X)
-        except Exception as e:
+        results = [None] * len(votes)
+        start = time.perf_counter()
+        
+        # Tier 0: deterministic rules, in arrival order since repeat voting depends on it.
+        # Every vote, including rule hits, links its entities in the collusion graph.
+        pending = []
+        cluster_features = [self.link_vote(vote_data) for vote_data in votes]
+        location_counts = [self.location_counter.add(vote_data.get('location_id', -1)) for vote_data in votes]
+        start = _lap(trace, 'collusion_graph', start)
+        for i, vote_data in enumerate(votes):
+            rule_hits = self.cascade.check_rules(vote_data)
+            if rule_hits:
+                results[i] = self._build_result(vote_data, True, 1.0, rule_hits, TIER_RULES)
+            else:
+                pending.append(i)
+        start = _lap(trace, 'rules', start)
+        
+        if not pending:
+            return results
+        
+        if degradation >= DEGRADE_RULES_ONLY:
+            # Votes that pass the rules are accepted unscored
+            for i in pending:
+                results[i] = self._build_result(votes[i], False, 0.0, [], TIER_RULES)
+            return results
+        
+        feature_df, errors = self.prepare_vote_features(
+            [votes[i] for i in pending], [cluster_features[i] for i in pending], [location_counts[i] for i in pending]
+        )
+        start = _lap(trace, 'features', start)
+        for position, error in errors.items():
             # Fallback for new data that might have encoding issues
-            print(f"⚠️ Feature preparation warning: {e}")
-            return {
+            print(f"⚠️ Feature preparation warning: {error}")
+            vote_data = votes[pending[position]]
+            results[pending[position]] = {
                 'vote_id': vote_data.get('vote_id', 'unknown'),
                 'is_fraud': False,
                 'fraud_probability': 0.0,
                 'confidence': 'low',
                 'fraud_indicators': [],
-                'error': str(e)
+                'timestamp': datetime.now().isoformat(),
+                'error': error
             }
         
-        # Get predictions
-        iso_pred = self.models['isolation_forest'].predict(X_scaled)[0]
-        rf_pred_proba = self.models['random_forest'].predict_proba(X_scaled)[0][1]
-        rf_pred = self.models['random_forest'].predict(X_scaled)[0]
+        scored = [i for position, i in enumerate(pending) if position not in errors]
+        if not scored:
+            return results
         
-        # Combine predictions
-        iso_fraud = 1 if iso_pred == -1 else 0
-        ensemble_score = (iso_fraud + rf_pred_proba) / 2
-        is_fraud = ensemble_score > 0.5
+        X = feature_df[self.feature_columns]
+        X_scaled = self.scalers['standard'].transform(X)
+        if self.drift_monitor:
+            self.drift_monitor.observe_batch(X[self.drift_monitor.feature_columns].to_numpy(dtype=float))
+        start = _lap(trace, 'scaling', start)
         
+        # Identify fraud indicators
+        if degradation >= DEGRADE_NO_INDICATORS:
+            fraud_indicators = [[] for _ in scored]
+        else:
+            states = self.location_index.states_for([votes[i].get('location_id', -1) for i in scored])
+            fraud_indicators = self.identify_fraud_indicators_batch(X, states)
+            start = _lap(trace, 'indicators', start)
+        
+        # Tier 1: small model, exits early when a vote is clearly clean or fraudulent
+        exits, fast_fraud, fast_scores = self.cascade.fast_decision(X_scaled)
+        start = _lap(trace, 'fast_model', start)
+        
+        # Tier 2: full ensemble for the uncertain rest; when shedding load the
+        # tier-1 score stands in for the supervised model
+        skip_supervised = degradation >= DEGRADE_NO_SUPERVISED
+        uncertain = np.flatnonzero(~exits)
+        if len(uncertain):
+            iso_fraud, rf_pred_proba, ensemble_score = self._ensemble_scores(
+                X_scaled[uncertain], fast_scores[uncertain] if skip_supervised else None
+            )
+            start = _lap(trace, 'full_model', start)
+        
+        full_row = {row: k for k, row in enumerate(uncertain)}
+        for row, i in enumerate(scored):
+            if exits[row]:
+                results[i] = self._build_result(
+                    votes[i], fast_fraud[row], fast_scores[row], fraud_indicators[row], TIER_FAST_MODEL
+                )
+                continue
+            
+            k = full_row[row]
+            result = self._build_result(
+                votes[i], bool(ensemble_score[k] > self.decision['threshold']), ensemble_score[k],
+                fraud_indicators[row], TIER_FULL_MODEL
+            )
+            result['isolation_score'] = float(iso_fraud[k])
+            if not skip_supervised:
+                result['rf_probability'] = float(rf_pred_proba[k])
+            results[i] = result
+        _lap(trace, 'assemble', start)
+        
+        return results
+    
+    def link_vote(self, vote_data: Dict) -> Tuple[float, float, float]:
+        """Add a vote to the live collusion graph; returns its cluster features"""
+        timestamp = self._parse_timestamp(vote_data.get('timestamp'))
+        return self.collusion_graph.add_vote(
+            vote_data.get('voter_id'), vote_data.get('device_fingerprint'), vote_data.get('ip_address'),
+            vote_data.get('candidate_id'), vote_seconds(timestamp) if timestamp else None
+        )
+    
+    def prepare_vote_features(self, votes: List[Dict], cluster_features: Optional[List[Tuple]] = None,
+                              location_counts: Optional[List[Tuple]] = None) -> Tuple[pd.DataFrame, Dict[int, str]]:
+        """Features for votes scored on their own, without the batch-wide engineering pass
+        
+        Equivalent to prepare_features on a one-vote frame: every count is 1,
+        session z-score 0 and time since the previous vote the 300s default.
+        Cluster features come from the live collusion graph and utilization
+        rates from the running location, state and LGA vote counts (votes are
+        linked and counted here unless the caller already did). Returns the
+        features of the valid votes and an error per invalid position.
+        """
+        if cluster_features is None:
+            cluster_features = [self.link_vote(vote_data) for vote_data in votes]
+        if location_counts is None:
+            location_counts = [self.location_counter.add(vote_data.get('location_id', -1)) for vote_data in votes]
+        
+        errors = {}
+        timestamps = []
+        for position, vote_data in enumerate(votes):
+            timestamp = self._parse_timestamp(vote_data.get('timestamp'))
+            if timestamp is None:
+                errors[position] = f"Invalid timestamp: {vote_data.get('timestamp')!r}"
+            timestamps.append(timestamp)
+        
+        methods = np.array([str(vote_data.get('voting_method')) for vote_data in votes], dtype=object)
+        encoder = self.encoders.get('voting_method')
+        if encoder is not None:
+            unseen = ~np.isin(methods, encoder.classes_)
+            for position in np.flatnonzero(unseen):
+                errors.setdefault(int(position), f"y contains previously unseen labels: ['{methods[position]}']")
+        
+        valid = [position for position in range(len(votes)) if position not in errors]
+        if not valid:
+            return pd.DataFrame(columns=self.feature_columns), errors
+        
+        ts = pd.Series(pd.to_datetime([timestamps[p] for p in valid]))
+        session = np.array([votes[p].get('session_duration') for p in valid], dtype=float)
+        location_ids = np.array([votes[p].get('location_id', -1) for p in valid], dtype=np.int64)
+        ones = np.ones(len(valid))
+        
+        features = {
+            'hour': ts.dt.hour.to_numpy(),
+            'day_of_week': ts.dt.dayofweek.to_numpy(),
+            'minute': ts.dt.minute.to_numpy(),
+            'is_weekend': ts.dt.dayofweek.isin([5, 6]).astype(int).to_numpy(),
+            'session_duration': session,
+            'session_z_score': np.zeros(len(valid)),
+            'time_diff_prev': np.full(len(valid), 300.0),
+            'votes_same_ip': ones,
+            'votes_same_location': ones,
+            'votes_same_device': ones,
+            'votes_same_voter': ones,
+            'votes_same_hour_location': ones,
+            'candidate_popularity': ones,
+            'voting_against_trend': np.zeros(len(valid)),
+            'ip_vote_count': ones,
+            'ip_candidate_variety': ones,
+            'location_total_votes': ones,
+            'location_avg_session': np.round(session, 2)
+        }
+        counts = np.array([location_counts[p] for p in valid], dtype=float).reshape(len(valid), 3)
+        features.update(self.location_index.rollup_row_features(location_ids, *counts.T))
+        if encoder is not None:
+            features['voting_method_encoded'] = np.searchsorted(encoder.classes_, methods[valid])
+        clusters = np.array([cluster_features[p] for p in valid], dtype=float).reshape(len(valid), -1)
+        features.update(zip(CLUSTER_FEATURES, clusters.T))
+        
+        feature_df = pd.DataFrame({column: features[column] for column in self.feature_columns})
+        return feature_df.fillna(0), errors
+    
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[datetime]:
+        """Naive wall-clock datetime from a datetime or ISO string, None if unparseable"""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                try:
+                    value = pd.Timestamp(value).to_pydatetime()
+                except (ValueError, TypeError):
+                    return None
+        if not isinstance(value, datetime) or pd.isna(value):
+            return None
+        # Features use the wall clock the vote was stamped with, as the dt accessors do
+        return value.replace(tzinfo=None)
+    
+    def _ensemble_scores(self, X_scaled: np.ndarray,
+                         supervised_proba: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Isolation flags, supervised probabilities and combined score for a batch
+        
+        Probabilities passed in as supervised_proba are used instead of running the supervised model.
+        """
+        iso_fraud = (self.models['isolation_forest'].predict(X_scaled) == -1).astype(float)
+        if supervised_proba is None:
+            rf_pred_proba = self.supervised_model.predict_proba(X_scaled)[:, 1]
+        else:
+            rf_pred_proba = supervised_proba
+        weight = self.decision['isolation_weight']
+        ensemble_score = weight * iso_fraud + (1 - weight) * rf_pred_proba
+        return iso_fraud, rf_pred_proba, ensemble_score
+    
+    def _build_result(self, vote_data: Dict, is_fraud: bool, fraud_probability: float,
+                      fraud_indicators: List[str], scoring_tier: str) -> Dict:
+        """Assemble the prediction response for one vote"""
         # Determine confidence level
-        if ensemble_score > 0.8:
+        if fraud_probability > self.decision['confidence_high']:
             confidence = 'high'
-        elif ensemble_score > 0.6:
+        elif fraud_probability > self.decision['confidence_medium']:
             confidence = 'medium'
         else:
             confidence = 'low'
         
-        # Identify fraud indicators
-        fraud_indicators = self._identify_fraud_indicators(vote_data, feature_df.iloc[0])
-        
         return {
             'vote_id': vote_data.get('vote_id', 'unknown'),
-            'is_fraud': is_fraud,
-            'fraud_probability': float(ensemble_score),
+            'is_fraud': bool(is_fraud),
+            'fraud_probability': float(fraud_probability),
             'confidence': confidence,
-            'isolation_score': float(iso_fraud),
-            'rf_probability': float(rf_pred_proba),
             'fraud_indicators': fraud_indicators,
+            'scoring_tier': scoring_tier,
             'timestamp': datetime.now().isoformat()
         }
     
-    def _identify_fraud_indicators(self, vote_data: Dict, features: pd.Series) -> List[str]:
-        """Identify specific fraud indicators for explainable AI"""
-        indicators = []
-        
-        # Check for multiple voting
-        if features.get('votes_same_voter', 0) > 1:
-            indicators.append(f"Multiple votes from same voter ({features['votes_same_voter']})")
-        
-        # Check for IP clustering
-        if features.get('votes_same_ip', 0) > 5:
-            indicators.append(f"High IP clustering ({features['votes_same_ip']} votes)")
-        
-        # Check for unusual timing
-        hour = features.get('hour', 12)
-        if hour < 6 or hour > 20:
-            indicators.append(f"Unusual voting time ({hour}:00)")
-        
-        # Check for rapid voting
-        if features.get('session_duration', 120) < 30:
-            indicators.append(f"Unusually fast voting ({features['session_duration']}s)")
-        
-        # Check for location stuffing
-        if features.get('location_utilization_rate', 0) > 0.8:
-            indicators.append("Location over-capacity")
-        
-        # Check for device anomalies
-        if features.get('votes_same_device', 0) > 3:
-            indicators.append(f"Multiple votes from same device ({features['votes_same_device']})")
-        
-        return indicators
\ No newline at end of file
+    def identify_fraud_indicators_batch(self, feature_df: pd.DataFrame, states=None) -> List[List[str]]:
+        """Evaluate the configured indicator rules over a whole feature matrix"""
+        return self.indicator_rules.explain_frame(feature_df, states)
@@ -0,0 +1,168 @@
+"""
+Time-bucketed fraud heatmap counters per polling unit, LGA and state
+
+Every scored vote adds to the scored, flagged and fraud probability totals
+of its location, LGA and state in the current time bucket. Each vote is a
+few dict updates (O(1)) however many votes or alerts came before it. Only
+the last `max_buckets` buckets are kept. Region keys touched since the last
+push are remembered, so subscribers get deltas rather than the whole map.
+
+Location ids come from clients, so ids the LocationIndex does not know are
+not counted. Without reference data at most `max_locations` distinct ids
+are tracked. Votes passed unscored (rules-only load shedding) count as
+scored votes but have no probability, so they are left out of the means.
+"""
+
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+HEATMAP_LEVELS = ('location', 'lga', 'state')
+
+
+def _mean_probability(counts) -> float:
+    return round(counts[2] / counts[3], 4) if counts[3] else 0.0
+
+
+def _cell(counts: List[float]) -> Dict:
+    scored, flagged = counts[0], counts[1]
+    return {
+        'scored': int(scored),
+        'flagged': int(flagged),
+        'fraud_rate': round(flagged / scored, 4) if scored else 0.0,
+        'mean_probability': _mean_probability(counts)
+    }
+
+
+class FraudHeatmap:
+    """Scored / flagged / mean fraud probability per region and time bucket"""
+
+    def __init__(self, location_index=None, bucket_seconds: int = 300, max_buckets: int = 288,
+                 max_locations: int = 50_000, clock: Callable[[], float] = time.time):
+        self.location_index = location_index
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self.max_locations = max_locations
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        # (bucket start, {level: {key: [scored, flagged, probability_sum, probability_votes]}}), oldest first
+        self.buckets = deque()
+        self.totals = {level: {} for level in HEATMAP_LEVELS}
+        self._regions = {}
+        self._dirty = set()
+        self.dropped_votes = 0
+
+    def _region_keys(self, location_id) -> Optional[Tuple]:
+        """(location, lga, state) keys for a location, or None if it is not tracked"""
+        keys = self._regions.get(location_id)
+        if keys is None:
+            if self.location_index is not None and len(self.location_index):
+                state, lga = self.location_index.region_of(location_id)
+                if state is None:
+                    return None
+            elif len(self._regions) >= self.max_locations:
+                return None
+            else:
+                state, lga = None, None
+            keys = self._regions[location_id] = (location_id, lga, state)
+        return keys
+
+    def _current_bucket(self, now: float) -> Dict:
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        if not self.buckets or self.buckets[-1][0] < start:
+            self.buckets.append((start, {level: {} for level in HEATMAP_LEVELS}))
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popleft()
+        return self.buckets[-1][1]
+
+    def record(self, location_id, is_fraud: bool, fraud_probability: Optional[float]):
+        """Count one vote; fraud_probability is None for votes that were not model-scored"""
+        region_keys = self._region_keys(location_id)
+        if region_keys is None:
+            self.dropped_votes += 1
+            return
+
+        bucket = self._current_bucket(self.clock())
+        flagged = 1 if is_fraud else 0
+        has_probability = fraud_probability is not None
+        for level, key in zip(HEATMAP_LEVELS, region_keys):
+            if key is None:
+                continue
+            for counters in (bucket[level], self.totals[level]):
+                counts = counters.get(key)
+                if counts is None:
+                    counts = counters[key] = [0, 0, 0.0, 0]
+                counts[0] += 1
+                counts[1] += flagged
+                if has_probability:
+                    counts[2] += fraud_probability
+                    counts[3] += 1
+            self._dirty.add((level, key))
+
+    def pop_deltas(self) -> Optional[Dict]:
+        """Current-bucket counters of every region changed since the last call"""
+        if not self._dirty or not self.buckets:
+            return None
+        start, bucket = self.buckets[-1]
+        deltas = {level: {} for level in HEATMAP_LEVELS}
+        for level, key in self._dirty:
+            counts = bucket[level].get(key)
+            if counts is not None:
+                deltas[level][str(key)] = {**_cell(counts), 'total': _cell(self.totals[level][key])}
+        self._dirty.clear()
+        return {'bucket_start': datetime.fromtimestamp(start).isoformat(),
+                'bucket_seconds': self.bucket_seconds, **deltas}
+
+    def snapshot(self, level: str = 'state', window_seconds: Optional[float] = None,
+                 series: bool = False, limit: Optional[int] = None) -> Dict:
+        """Per-region counters over the last window_seconds (all kept buckets by default)
+
+        With series, each region also gets its [scored, flagged, mean_probability]
+        per bucket, aligned with `buckets`.
+        """
+        if level not in HEATMAP_LEVELS:
+            raise ValueError(f"level must be one of {', '.join(HEATMAP_LEVELS)}")
+
+        now = self.clock()
+        since = now - window_seconds if window_seconds else float('-inf')
+        buckets = [(start, bucket) for start, bucket in self.buckets if start + self.bucket_seconds > since]
+
+        combined = {}
+        for _, bucket in buckets:
+            for key, counts in bucket[level].items():
+                total = combined.setdefault(key, [0, 0, 0.0, 0])
+                total[0] += counts[0]
+                total[1] += counts[1]
+                total[2] += counts[2]
+                total[3] += counts[3]
+
+        keys = sorted(combined, key=lambda key: (-combined[key][1], -combined[key][0], str(key)))[:limit]
+        regions = {str(key): _cell(combined[key]) for key in keys}
+
+        if series:
+            for key in keys:
+                regions[str(key)]['series'] = [
+                    [int(counts[0]), int(counts[1]), _mean_probability(counts)]
+                    for counts in (bucket[level].get(key, (0, 0, 0.0, 0)) for _, bucket in buckets)
+                ]
+
+        result = {
+            'level': level,
+            'bucket_seconds': self.bucket_seconds,
+            'window_start': datetime.fromtimestamp(buckets[0][0]).isoformat() if buckets else None,
+            'regions': regions
+        }
+        if series:
+            result['buckets'] = [datetime.fromtimestamp(start).isoformat() for start, _ in buckets]
+        return result
+
+    def get_stats(self) -> Dict:
+        return {
+            'buckets': len(self.buckets),
+            'bucket_seconds': self.bucket_seconds,
+            'regions': {level: len(self.totals[level]) for level in HEATMAP_LEVELS},
+            'dropped_votes': self.dropped_votes
+        }
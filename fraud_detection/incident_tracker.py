@@ -0,0 +1,234 @@
+"""
+Coalesces fraud alerts into incidents
+
+An alert joins the open incident that already owns its location, IP address
+or device fingerprint, and opens a new incident otherwise. Incidents close
+after `window_seconds` without a new alert. Subscribers only receive
+incident_open, incident_update and incident_close events, and updates for an
+incident go out at most once per `update_interval` seconds (severity
+escalations excepted). A burst from one polling unit therefore costs a
+handful of messages instead of one per vote.
+"""
+
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+SEVERITY_ORDER = ['low', 'medium', 'high', 'critical']
+
+# Vote fields that tie alerts to the same incident
+INCIDENT_KEYS = ('location_id', 'ip_address', 'device_fingerprint')
+
+# Placeholder values that say nothing about where a vote came from
+IGNORED_KEY_VALUES = {'', 'unknown', 'none', 'null'}
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+class Incident:
+    """Running summary of the alerts grouped under one incident"""
+
+    def __init__(self, incident_id: str, now: float, max_key_values: int, max_indicators: int):
+        self.incident_id = incident_id
+        self.status = 'open'
+        self.first_seen = now
+        self.last_seen = now
+        self.closed_at = None
+        self.last_broadcast = now
+        self.alert_count = 0
+        self.max_severity = 'low'
+        self.max_fraud_probability = 0.0
+        self.severity_counts = Counter()
+        self.indicator_counts = Counter()
+        self.keys = {field: OrderedDict() for field in INCIDENT_KEYS}
+        self.recent_vote_ids = deque(maxlen=10)
+        self.max_key_values = max_key_values
+        self.max_indicators = max_indicators
+
+    def add(self, alert: Dict, keys: List[tuple], now: float) -> bool:
+        """Fold in one alert; returns True when the severity escalated"""
+        self.alert_count += 1
+        self.last_seen = now
+        self.recent_vote_ids.append(alert.get('vote_id'))
+        self.max_fraud_probability = max(self.max_fraud_probability, float(alert.get('fraud_probability', 0.0)))
+
+        severity = alert.get('severity', 'low')
+        self.severity_counts[severity] += 1
+        escalated = SEVERITY_ORDER.index(severity) > SEVERITY_ORDER.index(self.max_severity)
+        if escalated:
+            self.max_severity = severity
+
+        for indicator in alert.get('indicators', []):
+            if indicator in self.indicator_counts or len(self.indicator_counts) < self.max_indicators:
+                self.indicator_counts[indicator] += 1
+
+        for field, value in keys:
+            values = self.keys[field]
+            if value in values or len(values) < self.max_key_values:
+                values[value] = values.get(value, 0) + 1
+
+        return escalated
+
+    def snapshot(self) -> Dict:
+        top_indicators = self.indicator_counts.most_common(5)
+        return {
+            'incident_id': self.incident_id,
+            'status': self.status,
+            'first_seen': _iso(self.first_seen),
+            'last_seen': _iso(self.last_seen),
+            'closed_at': _iso(self.closed_at),
+            'alert_count': self.alert_count,
+            'max_severity': self.max_severity,
+            'max_fraud_probability': self.max_fraud_probability,
+            'severity_counts': dict(self.severity_counts),
+            'top_indicators': [{'indicator': name, 'count': count} for name, count in top_indicators],
+            'keys': {field: dict(values) for field, values in self.keys.items() if values},
+            'recent_vote_ids': list(self.recent_vote_ids),
+            # Fields alert consumers already render
+            'alert_id': self.incident_id,
+            'vote_id': self.recent_vote_ids[-1] if self.recent_vote_ids else None,
+            'severity': self.max_severity,
+            'fraud_probability': self.max_fraud_probability,
+            'indicators': [name for name, _ in top_indicators],
+            'timestamp': _iso(self.last_seen)
+        }
+
+
+class IncidentTracker:
+    """Groups alerts into incidents over a sliding window and rate-limits their updates"""
+
+    def __init__(self, window_seconds: float = 300.0, update_interval: float = 5.0,
+                 max_open_incidents: int = 10_000, max_closed_incidents: int = 500,
+                 max_key_values: int = 20, max_indicators: int = 50,
+                 clock: Callable[[], float] = time.time):
+        self.window_seconds = window_seconds
+        self.update_interval = update_interval
+        self.max_open_incidents = max_open_incidents
+        self.max_key_values = max_key_values
+        self.max_indicators = max_indicators
+        self.clock = clock
+
+        # Least recently alerted first, so expiry only inspects the front
+        self.open = OrderedDict()
+        self.closed = deque(maxlen=max_closed_incidents)
+        self._owners = {}
+        self._dirty = set()
+        self._next_id = 1
+        self.stats = Counter()
+
+    @staticmethod
+    def alert_keys(alert: Dict) -> List[tuple]:
+        keys = []
+        for field in INCIDENT_KEYS:
+            value = alert.get(field)
+            if value is not None and str(value).strip().lower() not in IGNORED_KEY_VALUES:
+                keys.append((field, value))
+        return keys
+
+    def add_alert(self, alert: Dict) -> List[Dict]:
+        """Group an alert; returns the incident events to broadcast now"""
+        now = self.clock()
+        events = self.flush(now)
+        keys = self.alert_keys(alert)
+        self.stats['alerts'] += 1
+
+        incident_id = next((self._owners[key] for key in keys if key in self._owners), None)
+        if incident_id is None:
+            incident = self._open_incident(now, events)
+        else:
+            incident = self.open[incident_id]
+            self.open.move_to_end(incident_id)
+
+        escalated = incident.add(alert, keys, now)
+        for key in keys:
+            if incident.keys[key[0]].get(key[1]):
+                self._owners.setdefault(key, incident.incident_id)
+
+        if incident.alert_count == 1:
+            events.append(self._event('incident_open', incident, now))
+        elif escalated or now - incident.last_broadcast >= self.update_interval:
+            events.append(self._event('incident_update', incident, now))
+        else:
+            self._dirty.add(incident.incident_id)
+
+        return events
+
+    def flush(self, now: Optional[float] = None) -> List[Dict]:
+        """Close expired incidents and send updates that were held back"""
+        now = self.clock() if now is None else now
+        events = []
+
+        while self.open:
+            incident = next(iter(self.open.values()))
+            if now - incident.last_seen < self.window_seconds:
+                break
+            events.append(self._close(incident, now))
+
+        for incident_id in list(self._dirty):
+            incident = self.open.get(incident_id)
+            if incident is None:
+                self._dirty.discard(incident_id)
+            elif now - incident.last_broadcast >= self.update_interval:
+                events.append(self._event('incident_update', incident, now))
+
+        return events
+
+    def _open_incident(self, now: float, events: List[Dict]) -> Incident:
+        if len(self.open) >= self.max_open_incidents:
+            # Make room by closing the incident that has been quiet longest
+            events.append(self._close(next(iter(self.open.values())), now))
+
+        incident = Incident(f"INC_{self._next_id:06d}", now, self.max_key_values, self.max_indicators)
+        self._next_id += 1
+        self.open[incident.incident_id] = incident
+        self.stats['opened'] += 1
+        return incident
+
+    def _close(self, incident: Incident, now: float) -> Dict:
+        del self.open[incident.incident_id]
+        self._dirty.discard(incident.incident_id)
+        for field, values in incident.keys.items():
+            for value in values:
+                if self._owners.get((field, value)) == incident.incident_id:
+                    del self._owners[(field, value)]
+
+        incident.status = 'closed'
+        incident.closed_at = now
+        self.closed.append(incident)
+        self.stats['closed'] += 1
+        return self._event('incident_close', incident, now)
+
+    def _event(self, event_type: str, incident: Incident, now: float) -> Dict:
+        incident.last_broadcast = now
+        self._dirty.discard(incident.incident_id)
+        self.stats[event_type] += 1
+        return {'type': event_type, 'data': incident.snapshot()}
+
+    def get(self, incident_id: str) -> Optional[Dict]:
+        incident = self.open.get(incident_id) or next(
+            (closed for closed in self.closed if closed.incident_id == incident_id), None
+        )
+        return incident.snapshot() if incident else None
+
+    def list_incidents(self, status: str = 'open', limit: int = 50) -> List[Dict]:
+        """Most recently active first"""
+        incidents = list(reversed(self.open.values())) if status in ('open', 'all') else []
+        if status in ('closed', 'all'):
+            incidents += list(reversed(self.closed))
+        return [incident.snapshot() for incident in incidents[:limit]]
+
+    def get_stats(self) -> Dict:
+        return {
+            'open_incidents': len(self.open),
+            'closed_incidents_kept': len(self.closed),
+            'alerts_grouped': self.stats['alerts'],
+            'incidents_opened': self.stats['opened'],
+            'events_sent': {
+                event: self.stats[event] for event in ('incident_open', 'incident_update', 'incident_close')
+            },
+            'window_seconds': self.window_seconds,
+            'update_interval': self.update_interval
+        }
@@ -0,0 +1,213 @@
+"""
+Incremental model updates from investigator-labelled votes
+Grows the supervised model with a few new trees instead of retraining from scratch.
+The tier-1 cascade tree is refit on the labelled votes and its exit bands are
+recalibrated against the updated ensemble, so early exits learn from feedback too.
+
+Usage:
+    python incremental_update.py --votes todays_votes.csv --labels labels.csv
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional
+from fraud_detector import BlockchainVotingFraudDetector, next_model_version
+
+
+class IncrementalModelUpdater:
+    """Update trained fraud models in place from newly labelled votes"""
+
+    def __init__(self, detector: BlockchainVotingFraudDetector,
+                 new_trees: int = 20, max_trees: int = 200,
+                 recalibrate_isolation: bool = True, history_size: int = 50,
+                 min_cascade_votes: int = 500):
+        self.detector = detector
+        self.new_trees = new_trees
+        self.max_trees = max_trees
+        self.recalibrate_isolation = recalibrate_isolation
+        self.history_size = history_size
+        self.min_cascade_votes = min_cascade_votes
+
+    def update(self, votes_df: pd.DataFrame, labels_df: Optional[pd.DataFrame] = None) -> Dict:
+        """Add trees trained on labelled votes, retire the oldest and save a new version
+
+        votes_df should hold all votes from the period so that count and
+        location features are computed over the same population the labels
+        came from. labels_df maps vote_id -> is_fraud; without it votes_df
+        must carry its own is_fraud column.
+        """
+        if not self.detector.is_trained and not self.detector.load_models():
+            raise ValueError("No trained models available to update")
+
+        start = time.perf_counter()
+
+        votes_df = votes_df.copy()
+        if labels_df is not None:
+            labels = labels_df.set_index('vote_id')['is_fraud']
+            votes_df['is_fraud'] = votes_df['vote_id'].map(labels)
+        elif 'is_fraud' not in votes_df.columns:
+            raise ValueError("Votes must carry an 'is_fraud' column or labels must be supplied")
+
+        # Unlabelled votes still contribute to the aggregate features
+        votes_df['is_fraud'] = votes_df['is_fraud'].fillna(-1).astype(int)
+
+        feature_df = self.detector.prepare_features(votes_df)
+        labelled = feature_df[feature_df['is_fraud'] >= 0]
+
+        y = labelled['is_fraud'].to_numpy()
+        if len(np.unique(y)) < 2:
+            raise ValueError("Labelled votes must include both fraudulent and clean examples")
+
+        X_scaled = self.detector.scalers['standard'].transform(labelled[self.detector.feature_columns])
+
+        print(f"🔄 Updating models with {len(y)} labelled votes ({int(y.sum())} fraudulent)")
+
+        if self.detector.supervised_backend == 'hist_gradient_boosting':
+            trees_added, trees_retired = self._grow_gradient_boosting(X_scaled, y)
+        else:
+            trees_added, trees_retired = self._grow_random_forest(X_scaled, y)
+
+        contamination = None
+        if self.recalibrate_isolation:
+            contamination = self._recalibrate_isolation_forest(X_scaled, y)
+
+        cascade_refit = self._refresh_cascade(X_scaled, y)
+
+        old_version = self.detector.model_metadata.get('model_version', '1.0')
+        new_version = next_model_version(old_version)
+
+        update_record = {
+            'date': datetime.now().isoformat(),
+            'from_version': old_version,
+            'labelled_votes': int(len(y)),
+            'fraud_votes': int(y.sum()),
+            'trees_added': trees_added,
+            'trees_retired': trees_retired,
+            'total_trees': self._tree_count(),
+            'isolation_contamination': contamination,
+            'cascade_refit': cascade_refit
+        }
+
+        history = list(self.detector.model_metadata.get('incremental_updates', []))
+        history.append(update_record)
+
+        # Earlier compression records, evaluation results and the training date carry over
+        extra_metadata = self.detector.carried_metadata()
+        extra_metadata['incremental_updates'] = history[-self.history_size:]
+        self.detector._save_models(model_version=new_version, extra_metadata=extra_metadata)
+
+        update_record['model_version'] = new_version
+        update_record['seconds'] = round(time.perf_counter() - start, 3)
+
+        print(f"✅ Model {old_version} -> {new_version}: +{trees_added} trees, "
+              f"-{trees_retired} retired ({update_record['seconds']}s)")
+
+        return update_record
+
+    def _grow_random_forest(self, X: np.ndarray, y: np.ndarray):
+        """Fit new trees on recent data with warm_start, then drop the oldest"""
+        forest = self.detector.models['random_forest']
+
+        forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + self.new_trees)
+        forest.fit(X, y)
+        forest.set_params(warm_start=False)
+
+        # Trees are appended in training order, so the oldest sit at the front
+        trees_retired = max(0, len(forest.estimators_) - self.max_trees)
+        if trees_retired:
+            forest.estimators_ = forest.estimators_[trees_retired:]
+            forest.n_estimators = len(forest.estimators_)
+
+        return self.new_trees, trees_retired
+
+    def _grow_gradient_boosting(self, X: np.ndarray, y: np.ndarray):
+        """Continue boosting on recent data with warm_start
+
+        Boosting stages correct the ones before them, so unlike forest trees
+        the oldest cannot be retired; past max_trees a full retrain is due.
+        """
+        model = self.detector.supervised_model
+        before = model.n_iter_
+
+        model.set_params(warm_start=True, max_iter=before + self.new_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+
+        if model.n_iter_ > self.max_trees:
+            print(f"⚠️ Gradient boosting has {model.n_iter_} stages (> {self.max_trees}) - schedule a full retrain")
+
+        return model.n_iter_ - before, 0
+
+    def _refresh_cascade(self, X: np.ndarray, y: np.ndarray) -> Optional[bool]:
+        """Refit the tier-1 tree on the labelled votes and recalibrate its bands against the updated ensemble
+
+        With fewer than min_cascade_votes labelled votes the tree is kept and only
+        the bands are recalibrated. Returns whether the tree was refit, or None
+        when the models have no cascade.
+        """
+        from sklearn.model_selection import train_test_split
+
+        cascade = self.detector.cascade
+        if cascade.model is None:
+            return None
+
+        refit = bool(len(y) >= self.min_cascade_votes and np.bincount(y).min() >= 10)
+        if refit:
+            X_fit, X_holdout, y_fit, y_holdout = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+            cascade.fit(X_fit, y_fit)
+            self.detector.models['cascade'] = cascade.model
+        else:
+            X_holdout, y_holdout = X, y
+
+        self.detector.recalibrate_cascade(X_holdout, y_holdout)
+        return refit
+
+    def _tree_count(self) -> int:
+        model = self.detector.supervised_model
+        return int(model.n_iter_) if hasattr(model, 'n_iter_') else len(model.estimators_)
+
+    def _recalibrate_isolation_forest(self, X: np.ndarray, y: np.ndarray) -> float:
+        """Re-estimate the anomaly threshold against the recent clean votes
+
+        Mirrors training: contamination is the observed fraud rate plus 1%,
+        applied as a percentile of the anomaly scores of clean votes.
+        """
+        iso = self.detector.models['isolation_forest']
+        contamination = float(min(0.5, y.mean() + 0.01))
+
+        clean_scores = iso.score_samples(X[y == 0])
+        iso.offset_ = float(np.percentile(clean_scores, 100.0 * contamination))
+        iso.contamination = contamination
+
+        return contamination
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update fraud models from labelled votes")
+    parser.add_argument('--votes', required=True, help="CSV of votes from the period being labelled")
+    parser.add_argument('--labels', help="CSV with vote_id,is_fraud columns (optional if votes carry is_fraud)")
+    parser.add_argument('--model-dir', default='fraud_detection_models')
+    parser.add_argument('--new-trees', type=int, default=20)
+    parser.add_argument('--max-trees', type=int, default=200)
+    parser.add_argument('--no-isolation-recalibration', action='store_true')
+    args = parser.parse_args()
+
+    detector = BlockchainVotingFraudDetector(model_save_dir=args.model_dir)
+    updater = IncrementalModelUpdater(
+        detector,
+        new_trees=args.new_trees,
+        max_trees=args.max_trees,
+        recalibrate_isolation=not args.no_isolation_recalibration
+    )
+
+    votes_df = pd.read_csv(args.votes)
+    labels_df = pd.read_csv(args.labels) if args.labels else None
+
+    updater.update(votes_df, labels_df)
+
+
+if __name__ == "__main__":
+    main()
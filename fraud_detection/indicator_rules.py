@@ -0,0 +1,157 @@
+"""
+Declarative fraud indicator rules compiled to NumPy boolean masks
+
+Rules live in fraud_indicator_rules.json so thresholds can be tuned without
+a code change. Each rule tests one feature against one or more conditions:
+
+    {"name": "ip_clustering", "feature": "votes_same_ip", "default": 0,
+     "match": "all", "conditions": [{"op": ">", "threshold": 5}],
+     "message": "High IP clustering ({value:g} votes)"}
+
+Per-state thresholds go under "state_overrides", as a list of thresholds in
+condition order, or null to switch the rule off for that state:
+
+    "state_overrides": {"Lagos": {"ip_clustering": [10], "unusual_time": null}}
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fraud_indicator_rules.json')
+
+OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+
+class FraudIndicatorRules:
+    """Compiled set of fraud indicator rules evaluated over whole feature matrices"""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.version = config.get('version', 'unversioned')
+        self.rules = config.get('rules', [])
+
+        for rule in self.rules:
+            if rule.get('match', 'all') not in ('any', 'all'):
+                raise ValueError(f"Rule '{rule['name']}' has invalid match '{rule['match']}'")
+            for condition in rule['conditions']:
+                if condition['op'] not in OPERATORS:
+                    raise ValueError(f"Rule '{rule['name']}' has unknown operator '{condition['op']}'")
+
+        self._compile(config.get('state_overrides', {}))
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'FraudIndicatorRules':
+        """Load rules from a JSON config file"""
+        path = path or os.environ.get('FRAUD_RULES_PATH', DEFAULT_RULES_PATH)
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def _compile(self, state_overrides: Dict):
+        """Build per-condition threshold tables indexed by state code (0 = default)"""
+        self.state_codes = {state: i + 1 for i, state in enumerate(sorted(state_overrides))}
+        n_codes = len(self.state_codes) + 1
+
+        self._thresholds = []
+        self._enabled = []
+
+        for rule in self.rules:
+            table = np.empty((len(rule['conditions']), n_codes), dtype=float)
+            for i, condition in enumerate(rule['conditions']):
+                table[i, :] = condition['threshold']
+
+            enabled = np.ones(n_codes, dtype=bool)
+
+            for state, code in self.state_codes.items():
+                if rule['name'] not in state_overrides[state]:
+                    continue
+                override = state_overrides[state][rule['name']]
+                if override is None:
+                    enabled[code] = False
+                    continue
+                if len(override) != len(rule['conditions']):
+                    raise ValueError(
+                        f"Override for '{rule['name']}' in {state} needs "
+                        f"{len(rule['conditions'])} thresholds, got {len(override)}"
+                    )
+                table[:, code] = override
+
+            self._thresholds.append(table)
+            self._enabled.append(enabled)
+
+    def encode_states(self, states: Optional[Sequence], n_rows: int) -> np.ndarray:
+        """Map state names to threshold table columns; unknown states use the defaults"""
+        if states is None or not self.state_codes:
+            return np.zeros(n_rows, dtype=np.intp)
+        return pd.Series(states).map(self.state_codes).fillna(0).to_numpy(dtype=np.intp)
+
+    def evaluate(self, X: np.ndarray, columns: List[str], states: Optional[Sequence] = None) -> np.ndarray:
+        """Return an (n_rules, n_rows) boolean matrix of triggered rules"""
+        X = np.asarray(X, dtype=float)
+        n_rows = X.shape[0]
+        column_index = {col: i for i, col in enumerate(columns)}
+        codes = self.encode_states(states, n_rows)
+
+        masks = np.zeros((len(self.rules), n_rows), dtype=bool)
+
+        for r, rule in enumerate(self.rules):
+            values = self._feature_values(X, column_index, rule)
+            thresholds = self._thresholds[r][:, codes]
+
+            hits = np.stack([
+                OPERATORS[condition['op']](values, thresholds[i])
+                for i, condition in enumerate(rule['conditions'])
+            ])
+            if rule.get('match', 'all') == 'any':
+                masks[r] = hits.any(axis=0)
+            else:
+                masks[r] = hits.all(axis=0)
+
+            masks[r] &= self._enabled[r][codes]
+
+        return masks
+
+    def explain(self, X: np.ndarray, columns: List[str], states: Optional[Sequence] = None) -> List[List[str]]:
+        """Human-readable indicators per row, built only for triggered cells"""
+        X = np.asarray(X, dtype=float)
+        column_index = {col: i for i, col in enumerate(columns)}
+        masks = self.evaluate(X, columns, states)
+
+        indicators = [[] for _ in range(X.shape[0])]
+        rows, rule_ids = np.nonzero(masks.T)
+
+        feature_values = [self._feature_values(X, column_index, rule) for rule in self.rules]
+        for row, r in zip(rows, rule_ids):
+            rule = self.rules[r]
+            indicators[row].append(rule['message'].format(value=feature_values[r][row]))
+
+        return indicators
+
+    def explain_frame(self, feature_df: pd.DataFrame, states: Optional[Sequence] = None) -> List[List[str]]:
+        """Convenience wrapper for a feature DataFrame"""
+        columns = [rule['feature'] for rule in self.rules if rule['feature'] in feature_df.columns]
+        columns = list(dict.fromkeys(columns))
+        return self.explain(feature_df[columns].to_numpy(dtype=float), columns, states)
+
+    def _feature_values(self, X: np.ndarray, column_index: Dict[str, int], rule: Dict) -> np.ndarray:
+        """Feature column for a rule, or its default when the feature is absent"""
+        if rule['feature'] in column_index:
+            return X[:, column_index[rule['feature']]]
+        return np.full(X.shape[0], float(rule.get('default', 0)))
+
+    def summary(self) -> Dict:
+        """Rule configuration overview for the API"""
+        return {
+            'version': self.version,
+            'rules': [rule['name'] for rule in self.rules],
+            'states_with_overrides': sorted(self.state_codes)
+        }
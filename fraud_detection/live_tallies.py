@@ -0,0 +1,205 @@
+"""
+Live candidate tallies maintained from VoteCast events
+
+Dashboards read results from here instead of calling getResults /
+getAllCandidates on the node once per viewer. Tallies are updated one event
+at a time as VoteCast logs are ingested, and periodically reconciled against
+getResults at the block they have been ingested up to.
+"""
+
+import json
+import os
+import urllib.request
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# keccak256("VoteCast(address,uint256,uint256)")
+VOTE_CAST_TOPIC = '0xb4cfecf70861b7b150d8337780d34fb4cbc2114b5fb1fe51a5c5fca1849f7274'
+# First four bytes of keccak256("getResults()")
+GET_RESULTS_SELECTOR = '0x4717f97c'
+
+DEPLOYMENT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'contracts', 'deployment.json')
+
+
+class LiveTallies:
+    """Running vote counts per candidate, location and state"""
+
+    def __init__(self, location_state: Optional[Callable[[int], Optional[str]]] = None,
+                 max_tracked_events: int = 1_000_000, max_tracked_transactions: int = 200_000):
+        self.location_state = location_state or (lambda location_id: None)
+        self.max_tracked_events = max_tracked_events
+        self.max_tracked_transactions = max_tracked_transactions
+
+        self.candidates = defaultdict(int)
+        self.locations = defaultdict(lambda: defaultdict(int))
+        self.states = defaultdict(lambda: defaultdict(int))
+        self.total_votes = 0
+        self.last_block = None
+        # Highest block whose events have all been applied, set by the poller
+        self.ingested_block = None
+        self.last_event_at = None
+        self.last_reconciliation = None
+
+        self._seen_events = OrderedDict()
+        self._transaction_locations = OrderedDict()
+
+    def register_vote_location(self, transaction_hash: Optional[str], location_id: int):
+        """Remember where a vote was cast so its VoteCast event can be attributed"""
+        if not transaction_hash:
+            return
+        self._transaction_locations[transaction_hash.lower()] = location_id
+        if len(self._transaction_locations) > self.max_tracked_transactions:
+            self._transaction_locations.popitem(last=False)
+
+    def apply_vote_cast(self, event: Dict) -> Optional[Dict]:
+        """Count one VoteCast event; returns the delta to broadcast, or None for duplicates"""
+        transaction_hash = (event.get('transaction_hash') or '').lower()
+        event_key = (transaction_hash, event.get('log_index', 0)) if transaction_hash else \
+            (event['voter'].lower(), event['candidate_id'])
+        if event_key in self._seen_events:
+            return None
+
+        self._seen_events[event_key] = True
+        if len(self._seen_events) > self.max_tracked_events:
+            self._seen_events.popitem(last=False)
+
+        candidate_id = int(event['candidate_id'])
+        location_id = event.get('location_id')
+        if location_id is None:
+            location_id = self._transaction_locations.pop(transaction_hash, None)
+
+        self.candidates[candidate_id] += 1
+        self.total_votes += 1
+        self.last_event_at = datetime.now().isoformat()
+        if event.get('block_number') is not None:
+            self.last_block = max(self.last_block or 0, int(event['block_number']))
+
+        delta = {'candidate_id': candidate_id, 'candidate_votes': self.candidates[candidate_id]}
+
+        if location_id is not None:
+            self.locations[location_id][candidate_id] += 1
+            delta['location_id'] = location_id
+            state = self.location_state(location_id)
+            if state:
+                self.states[state][candidate_id] += 1
+                delta['state'] = state
+
+        return delta
+
+    def reconcile(self, chain_results: List[int], block_number: Optional[int] = None) -> Dict:
+        """Compare tallies with getResults; chain totals win when they disagree"""
+        drift = {}
+        for i, chain_votes in enumerate(chain_results):
+            candidate_id = i + 1
+            if self.candidates.get(candidate_id, 0) != chain_votes:
+                drift[candidate_id] = chain_votes - self.candidates.get(candidate_id, 0)
+                self.candidates[candidate_id] = chain_votes
+
+        self.total_votes = sum(self.candidates.values())
+        self.last_reconciliation = {
+            'timestamp': datetime.now().isoformat(),
+            'block_number': block_number,
+            'drift_detected': bool(drift),
+            'drift': drift
+        }
+
+        if drift:
+            print(f"⚠️ Tally drift against getResults at block {block_number}: {drift}")
+
+        return self.last_reconciliation
+
+    def snapshot(self, include_locations: bool = False) -> Dict:
+        """Current results for /results and new WebSocket subscribers"""
+        results = {
+            'total_votes': self.total_votes,
+            'candidates': dict(sorted(self.candidates.items())),
+            'states': {state: dict(counts) for state, counts in self.states.items()},
+            'last_block': self.last_block,
+            'last_event_at': self.last_event_at,
+            'last_reconciliation': self.last_reconciliation
+        }
+        if include_locations:
+            results['locations'] = {loc: dict(counts) for loc, counts in self.locations.items()}
+        return results
+
+
+class VoteCastEventSource:
+    """Minimal JSON-RPC client for VoteCast logs and getResults"""
+
+    def __init__(self, rpc_url: str, contract_address: str, max_block_range: int = 5000, timeout: float = 10.0):
+        self.rpc_url = rpc_url
+        self.contract_address = contract_address
+        self.max_block_range = max_block_range
+        self.timeout = timeout
+        self.next_block = 0
+        self.latest_block = None
+        self._request_id = 0
+
+    @classmethod
+    def from_environment(cls) -> Optional['VoteCastEventSource']:
+        """Build from BLOCKCHAIN_RPC_URL / VOTING_CONTRACT_ADDRESS or the frontend deployment file"""
+        rpc_url = os.environ.get('BLOCKCHAIN_RPC_URL', 'http://127.0.0.1:8545')
+        contract_address = os.environ.get('VOTING_CONTRACT_ADDRESS')
+
+        if not contract_address and os.path.exists(DEPLOYMENT_FILE):
+            with open(DEPLOYMENT_FILE, 'r') as f:
+                contract_address = json.load(f).get('contractAddress')
+
+        return cls(rpc_url, contract_address) if contract_address else None
+
+    def _call(self, method: str, params: List):
+        self._request_id += 1
+        payload = json.dumps({'jsonrpc': '2.0', 'id': self._request_id, 'method': method, 'params': params})
+        request = urllib.request.Request(
+            self.rpc_url, data=payload.encode(), headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.load(response)
+        if 'error' in body:
+            raise RuntimeError(f"{method} failed: {body['error']}")
+        return body['result']
+
+    def fetch_new_events(self) -> List[Dict]:
+        """VoteCast events from the next unfetched block range, in chain order
+
+        One range per call, so a failed request never skips blocks. Check
+        caught_up to see whether more ranges are waiting.
+        """
+        self.latest_block = int(self._call('eth_blockNumber', []), 16)
+        if self.next_block > self.latest_block:
+            return []
+
+        to_block = min(self.next_block + self.max_block_range - 1, self.latest_block)
+        logs = self._call('eth_getLogs', [{
+            'address': self.contract_address,
+            'topics': [VOTE_CAST_TOPIC],
+            'fromBlock': hex(self.next_block),
+            'toBlock': hex(to_block)
+        }])
+        self.next_block = to_block + 1
+
+        return [self._decode_log(log) for log in logs]
+
+    @property
+    def caught_up(self) -> bool:
+        return self.latest_block is not None and self.next_block > self.latest_block
+
+    def fetch_results(self, block_number: Optional[int] = None) -> List[int]:
+        """getResults() at a block, decoded from its uint256[] return value"""
+        block = hex(block_number) if block_number is not None else 'latest'
+        raw = self._call('eth_call', [{'to': self.contract_address, 'data': GET_RESULTS_SELECTOR}, block])
+        words = [int(raw[2 + i:2 + i + 64], 16) for i in range(0, len(raw) - 2, 64)]
+        # words[0] is the offset of the array, words[1] its length
+        return words[2:2 + words[1]] if len(words) > 1 else []
+
+    @staticmethod
+    def _decode_log(log: Dict) -> Dict:
+        return {
+            'voter': '0x' + log['topics'][1][-40:],
+            'candidate_id': int(log['topics'][2], 16),
+            'timestamp': int(log['data'][2:66], 16),
+            'transaction_hash': log['transactionHash'],
+            'log_index': int(log['logIndex'], 16),
+            'block_number': int(log['blockNumber'], 16)
+        }
@@ -0,0 +1,121 @@
+"""
+SLO-driven load shedding for the scoring API
+
+Tracks recent request latency and event-loop queue delay against their SLOs
+and picks a degradation level for new votes (see DEGRADATION_LEVELS in
+scoring_cascade.py). Pressure is the worse of the two p95s as a fraction
+of its SLO. Each threshold in `thresholds` that pressure reaches sheds one
+more scoring stage, immediately. Stages come back one at a time once
+pressure has stayed below `recovery_ratio` of the threshold for
+`recovery_seconds`, so the level does not flap. Under overload votes still
+get the rules and whatever models fit in the budget, rather than timing out
+unchecked.
+"""
+
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from scoring_cascade import DEGRADATION_LEVELS
+
+
+class LoadShedder:
+    """Chooses the scoring degradation level from latency and queue delay"""
+
+    def __init__(self, slo_latency_ms: float = 250.0, slo_queue_delay_ms: float = 100.0,
+                 thresholds: Tuple[float, ...] = (0.6, 0.8, 0.95), recovery_ratio: float = 0.8,
+                 recovery_seconds: float = 5.0, window_seconds: float = 10.0, max_samples: int = 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        if len(thresholds) != len(DEGRADATION_LEVELS) - 1:
+            raise ValueError(f"Need one threshold per degraded level ({len(DEGRADATION_LEVELS) - 1})")
+        self.slo_latency = slo_latency_ms / 1000
+        self.slo_queue_delay = slo_queue_delay_ms / 1000
+        self.thresholds = tuple(thresholds)
+        self.recovery_ratio = recovery_ratio
+        self.recovery_seconds = recovery_seconds
+        self.window_seconds = window_seconds
+        self.clock = clock
+
+        # (time, seconds) samples, oldest first
+        self.latencies = deque(maxlen=max_samples)
+        self.queue_delays = deque(maxlen=max_samples)
+
+        now = clock()
+        self.level = 0
+        self.level_since = now
+        self.calm_since = None
+        self.pressure = 0.0
+        self.p95 = {'latency_ms': 0.0, 'queue_delay_ms': 0.0}
+        self.time_in_level = [0.0] * len(DEGRADATION_LEVELS)
+        self.votes_by_level = Counter()
+        self.transitions = 0
+
+    @property
+    def mode(self) -> str:
+        return DEGRADATION_LEVELS[self.level]
+
+    def record_latency(self, seconds: float):
+        """One request's latency; O(1), the percentile is taken in update()"""
+        self.latencies.append((self.clock(), seconds))
+
+    def count_votes(self, level: int, votes: int = 1):
+        """Votes scored at a degradation level"""
+        self.votes_by_level[DEGRADATION_LEVELS[level]] += votes
+
+    def record_queue_delay(self, seconds: float):
+        """How late the event loop ran a timer - the time a new request waits to start"""
+        self.queue_delays.append((self.clock(), max(seconds, 0.0)))
+
+    def _p95(self, samples: deque, now: float) -> float:
+        while samples and samples[0][0] < now - self.window_seconds:
+            samples.popleft()
+        if not samples:
+            return 0.0
+        return float(np.percentile([value for _, value in samples], 95))
+
+    def update(self) -> Optional[Tuple[str, str]]:
+        """Re-evaluate the level; returns (old mode, new mode) when it changed"""
+        now = self.clock()
+        latency, queue_delay = self._p95(self.latencies, now), self._p95(self.queue_delays, now)
+        self.p95 = {'latency_ms': round(latency * 1000, 3), 'queue_delay_ms': round(queue_delay * 1000, 3)}
+        self.pressure = max(latency / self.slo_latency, queue_delay / self.slo_queue_delay)
+
+        target = sum(self.pressure >= threshold for threshold in self.thresholds)
+        if target > self.level:
+            self.calm_since = None
+            return self._set_level(target, now)
+
+        if self.level and self.pressure < self.thresholds[self.level - 1] * self.recovery_ratio:
+            if self.calm_since is None:
+                self.calm_since = now
+            elif now - self.calm_since >= self.recovery_seconds:
+                self.calm_since = now
+                return self._set_level(self.level - 1, now)
+        else:
+            self.calm_since = None
+        return None
+
+    def _set_level(self, level: int, now: float) -> Tuple[str, str]:
+        old = self.mode
+        self.time_in_level[self.level] += now - self.level_since
+        self.level, self.level_since = level, now
+        self.transitions += 1
+        return old, self.mode
+
+    def get_stats(self) -> Dict:
+        now = self.clock()
+        time_in_level = list(self.time_in_level)
+        time_in_level[self.level] += now - self.level_since
+        return {
+            'mode': self.mode,
+            'level': self.level,
+            'pressure': round(self.pressure, 3),
+            'p95': self.p95,
+            'slo': {'latency_ms': self.slo_latency * 1000, 'queue_delay_ms': self.slo_queue_delay * 1000},
+            'thresholds': dict(zip(DEGRADATION_LEVELS[1:], self.thresholds)),
+            'seconds_in_mode': {mode: round(t, 3) for mode, t in zip(DEGRADATION_LEVELS, time_in_level)},
+            'votes_by_mode': {mode: self.votes_by_level[mode] for mode in DEGRADATION_LEVELS},
+            'transitions': self.transitions
+        }
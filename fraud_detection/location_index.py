@@ -0,0 +1,202 @@
+"""
+Dense, array-backed index over the polling unit reference data
+
+locations.json is read once. Every attribute is stored in a NumPy array
+indexed directly by location_id, so single lookups are O(1) and batches are
+a single gather.
+"""
+
+import json
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LOCATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fraud_detection_data', 'locations.json')
+
+# Capacity assumed for polling units missing from the reference data
+DEFAULT_CAPACITY = 1000
+
+
+def _per_row(counts: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Per-code values gathered per row, 0 where the code is -1"""
+    rows = np.zeros(len(codes))
+    known = codes >= 0
+    rows[known] = np.asarray(counts, dtype=float)[codes[known]]
+    return rows
+
+
+class LocationIndex:
+    """Polling unit attributes and state/LGA rollups keyed by location_id"""
+
+    def __init__(self, locations: List[Dict]):
+        size = max((loc['location_id'] for loc in locations), default=-1) + 1
+
+        self.state_names = sorted({loc['state'] for loc in locations})
+        self.lga_names = sorted({(loc['state'], loc['lga']) for loc in locations})
+        state_codes = {name: i for i, name in enumerate(self.state_names)}
+        lga_codes = {key: i for i, key in enumerate(self.lga_names)}
+
+        self.registered_voters = np.full(size, np.nan)
+        self.state_codes = np.full(size, -1, dtype=np.int32)
+        self.lga_codes = np.full(size, -1, dtype=np.int32)
+        self.latitude = np.full(size, np.nan)
+        self.longitude = np.full(size, np.nan)
+
+        for loc in locations:
+            i = loc['location_id']
+            self.registered_voters[i] = loc.get('registered_voters', np.nan)
+            self.state_codes[i] = state_codes[loc['state']]
+            self.lga_codes[i] = lga_codes[(loc['state'], loc['lga'])]
+            self.latitude[i] = loc.get('latitude', np.nan)
+            self.longitude[i] = loc.get('longitude', np.nan)
+
+        known = self.state_codes >= 0
+        registered = np.nan_to_num(self.registered_voters[known])
+        self.state_registered_voters = np.bincount(
+            self.state_codes[known], weights=registered, minlength=len(self.state_names)
+        )
+        self.lga_registered_voters = np.bincount(
+            self.lga_codes[known], weights=registered, minlength=len(self.lga_names)
+        )
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'LocationIndex':
+        """Load the reference data; an empty index if the file is missing"""
+        path = path or DEFAULT_LOCATIONS_PATH
+        if not os.path.exists(path):
+            print(f"⚠️ Location reference data not found at {path} - using default capacity")
+            return cls([])
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return int((self.state_codes >= 0).sum())
+
+    def _positions(self, location_ids) -> np.ndarray:
+        """Array positions for location ids, -1 where the id is unknown"""
+        ids = np.asarray(location_ids, dtype=np.int64)
+        valid = (ids >= 0) & (ids < len(self.state_codes))
+        positions = np.where(valid, ids, 0)
+        if len(self.state_codes):
+            valid &= self.state_codes[positions] >= 0
+        return np.where(valid, positions, -1)
+
+    def gather(self, location_ids) -> Dict[str, np.ndarray]:
+        """Bulk lookup; unknown locations get NaN attributes and -1 codes"""
+        positions = self._positions(location_ids)
+        known = positions >= 0
+        safe = np.where(known, positions, 0)
+
+        def take(values, missing):
+            if not len(values):
+                return np.full(len(positions), missing, dtype=np.asarray(missing).dtype)
+            return np.where(known, values[safe], missing)
+
+        return {
+            'known': known,
+            'registered_voters': take(self.registered_voters, np.nan),
+            'state_code': take(self.state_codes, -1),
+            'lga_code': take(self.lga_codes, -1),
+            'latitude': take(self.latitude, np.nan),
+            'longitude': take(self.longitude, np.nan)
+        }
+
+    def state_of(self, location_id) -> Optional[str]:
+        """State name for one location, or None"""
+        position = self._positions([location_id])[0]
+        return self.state_names[self.state_codes[position]] if position >= 0 else None
+
+    def region_of(self, location_id) -> Tuple[Optional[str], Optional[str]]:
+        """(state, "state/lga") names for one location, Nones if unknown"""
+        position = self._positions([location_id])[0]
+        if position < 0:
+            return None, None
+        return self.state_names[self.state_codes[position]], '/'.join(self.lga_names[self.lga_codes[position]])
+
+    def states_for(self, location_ids) -> np.ndarray:
+        """State names for a batch of locations (None where unknown)"""
+        codes = self.gather(location_ids)['state_code']
+        names = np.array(self.state_names + [None], dtype=object)
+        return names[np.where(codes >= 0, codes, len(self.state_names))]
+
+    def rollup_features(self, location_ids, location_votes: np.ndarray,
+                        state_votes: np.ndarray, lga_votes: np.ndarray) -> Dict[str, np.ndarray]:
+        """Capacity-based utilization for units, LGAs and states
+
+        location_votes is per row; state_votes and lga_votes are vote counts
+        per state/LGA code for the population the rows belong to.
+        """
+        ref = self.gather(location_ids)
+        return self._rollups(ref, location_votes, _per_row(state_votes, ref['state_code']),
+                             _per_row(lga_votes, ref['lga_code']))
+
+    def rollup_row_features(self, location_ids, location_votes: np.ndarray,
+                            state_votes: np.ndarray, lga_votes: np.ndarray) -> Dict[str, np.ndarray]:
+        """rollup_features with the state and LGA vote counts also given per row"""
+        return self._rollups(self.gather(location_ids), location_votes,
+                             np.asarray(state_votes, dtype=float), np.asarray(lga_votes, dtype=float))
+
+    def _rollups(self, ref: Dict[str, np.ndarray], location_votes: np.ndarray,
+                 state_votes: np.ndarray, lga_votes: np.ndarray) -> Dict[str, np.ndarray]:
+        registered = ref['registered_voters']
+        capacity = np.where(registered > 0, registered, DEFAULT_CAPACITY)
+
+        state_code, lga_code = ref['state_code'], ref['lga_code']
+        state_rate = np.where(state_code >= 0, state_votes / np.maximum(
+            _per_row(self.state_registered_voters, state_code), 1), 0.0)
+        lga_rate = np.where(lga_code >= 0, lga_votes / np.maximum(
+            _per_row(self.lga_registered_voters, lga_code), 1), 0.0)
+
+        return {
+            'location_registered_voters': np.nan_to_num(registered),
+            'location_utilization_rate': location_votes / capacity,
+            'lga_utilization_rate': lga_rate,
+            'state_utilization_rate': state_rate
+        }
+
+    def vote_counts_by_region(self, location_ids, counts=None):
+        """Votes per state code and per LGA code (counts defaults to one per row)"""
+        ref = self.gather(location_ids)
+        weights = np.ones(len(ref['state_code'])) if counts is None else np.asarray(counts, dtype=float)
+        state_ok, lga_ok = ref['state_code'] >= 0, ref['lga_code'] >= 0
+        state_votes = np.bincount(ref['state_code'][state_ok], weights=weights[state_ok],
+                                  minlength=len(self.state_names))
+        lga_votes = np.bincount(ref['lga_code'][lga_ok], weights=weights[lga_ok],
+                                minlength=len(self.lga_names))
+        return state_votes, lga_votes
+
+
+class LocationVoteCounter:
+    """Running vote counts per polling unit, LGA and state for live traffic
+
+    Live utilization features are computed from these, as training computes
+    them from the counts over the whole dataset.
+    """
+
+    def __init__(self, location_index: LocationIndex, max_unknown_locations: int = 10_000):
+        self.location_index = location_index
+        self.max_unknown_locations = max_unknown_locations
+        self.reset()
+
+    def reset(self):
+        self.location_votes = np.zeros(len(self.location_index.state_codes))
+        self.state_votes = np.zeros(len(self.location_index.state_names))
+        self.lga_votes = np.zeros(len(self.location_index.lga_names))
+        # Ids missing from the reference data come from clients, so only so many are counted
+        self.unknown_location_votes = {}
+
+    def add(self, location_id) -> Tuple[float, float, float]:
+        """Count one vote; returns the location, state and LGA vote counts including it"""
+        codes = self.location_index.state_codes
+        if 0 <= location_id < len(codes) and codes[location_id] >= 0:
+            state, lga = codes[location_id], self.location_index.lga_codes[location_id]
+            self.location_votes[location_id] += 1
+            self.state_votes[state] += 1
+            self.lga_votes[lga] += 1
+            return self.location_votes[location_id], self.state_votes[state], self.lga_votes[lga]
+
+        count = self.unknown_location_votes.get(location_id)
+        if count is None and len(self.unknown_location_votes) >= self.max_unknown_locations:
+            return 1.0, 0.0, 0.0
+        count = self.unknown_location_votes[location_id] = (count or 0) + 1
+        return float(count), 0.0, 0.0
@@ -0,0 +1,336 @@
+"""
+Model compression within an AUC loss budget
+
+Builds smaller versions of the saved Isolation Forest and supervised
+classifier. The candidates are:
+- the best-scoring subset of the fitted forest's trees
+- retrained models with capped depth
+- small students distilled from the full model's probabilities
+Every candidate is scored on hold-out votes. The smallest pair whose AUCs,
+each model's and the served ensemble's, stay within `max_auc_loss` of the
+originals is kept.
+The report shows size, load time and latency before and after. Compressed
+models score on a different probability scale, so a decision rule that
+model_evaluation.py calibrated for an alert rate is recalibrated on the
+hold-out votes (or reset to the default rule if none fits). The cascade
+bands are then recalibrated against the compressed ensemble, and the models
+are saved as a new version so a running API reloads them.
+
+Run it on the CSV the models were trained on so the hold-out split matches.
+
+Usage:
+    python model_compression.py fraud_detection_data/nigerian_votes_dataset.csv --max-auc-loss 0.005
+"""
+
+import argparse
+import copy
+import io
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from fraud_detector import BlockchainVotingFraudDetector, next_model_version, SUPERVISED_BACKENDS, DEFAULT_DECISION
+from backend_comparison import single_row_latency_ms
+from model_evaluation import calibrate_decision
+
+TREE_SUBSET_SIZES = (10, 25, 50, 100)
+ISOLATION_TREE_COUNTS = (25, 50, 100)
+DEPTH_CAPS = {'random_forest': (6, 8, 10, 12), 'hist_gradient_boosting': (3, 4, 6)}
+# Student shapes per backend: (trees, max_depth)
+STUDENT_SHAPES = {'random_forest': ((10, 6), (25, 8), (50, 10)), 'hist_gradient_boosting': ((50, 4), (100, 6))}
+
+
+def measure_model(model, predict: Callable, X: np.ndarray) -> Dict:
+    """Serialized size, load time and inference latency of one model"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    size = buffer.tell()
+
+    load_times = []
+    for _ in range(3):
+        buffer.seek(0)
+        start = time.perf_counter()
+        joblib.load(buffer)
+        load_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predict(X)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'size_mb': round(size / 1e6, 3),
+        'load_ms': round(float(np.median(load_times)) * 1000, 2),
+        'single_row_latency_ms': round(single_row_latency_ms(predict, X), 3),
+        'batch_latency_us_per_vote': round(batch_seconds / len(X) * 1e6, 3)
+    }
+
+
+def _soft_label_fit(model, X: np.ndarray, teacher_probability: np.ndarray):
+    """Fit a classifier to a teacher's probabilities
+
+    Each vote appears once as fraud weighted by p and once as clean weighted
+    by 1 - p, so the student's predict_proba learns p itself.
+    """
+    X_twice = np.vstack([X, X])
+    y_twice = np.r_[np.ones(len(X), dtype=int), np.zeros(len(X), dtype=int)]
+    weights = np.r_[teacher_probability, 1 - teacher_probability]
+    keep = weights > 0
+    return model.fit(X_twice[keep], y_twice[keep], sample_weight=weights[keep])
+
+
+def supervised_candidates(model, backend: str, X_train: np.ndarray, y_train: np.ndarray,
+                          X_select: np.ndarray, y_select: np.ndarray) -> List[Tuple[str, object]]:
+    """Smaller versions of the fitted supervised model"""
+    from sklearn.metrics import roc_auc_score
+
+    candidates = []
+
+    # Tree subset: keep the trees that rank the selection votes best on their own
+    trees = getattr(model, 'estimators_', None)
+    if isinstance(trees, list):
+        tree_auc = [roc_auc_score(y_select, tree.predict_proba(X_select)[:, 1]) for tree in trees]
+        ranked = np.argsort(tree_auc)[::-1]
+        for k in TREE_SUBSET_SIZES:
+            if k >= len(trees):
+                continue
+            subset = copy.copy(model)
+            subset.estimators_ = [trees[i] for i in ranked[:k]]
+            subset.n_estimators = k
+            candidates.append((f"tree_subset_{k}", subset))
+
+    for depth in DEPTH_CAPS[backend]:
+        capped = BlockchainVotingFraudDetector.build_supervised_model(backend).set_params(max_depth=depth)
+        candidates.append((f"depth_cap_{depth}", capped.fit(X_train, y_train)))
+
+    # Students share the backend's model class, so loading and incremental updates are unchanged
+    teacher = model.predict_proba(X_train)[:, 1]
+    size_param = 'n_estimators' if backend == 'random_forest' else 'max_iter'
+    for n_trees, depth in STUDENT_SHAPES[backend]:
+        student = BlockchainVotingFraudDetector.build_supervised_model(backend).set_params(
+            **{size_param: n_trees, 'max_depth': depth, 'class_weight': None}
+        )
+        candidates.append((f"distilled_{n_trees}x{depth}", _soft_label_fit(student, X_train, teacher)))
+
+    return candidates
+
+
+def isolation_candidates(iso, X_train_clean: np.ndarray) -> List[Tuple[str, object]]:
+    """Isolation forests with fewer trees, refit on the same clean votes
+
+    Isolation trees are independent random draws, so a forest refit with k
+    trees behaves like a k-tree subset of the original.
+    """
+    from sklearn.base import clone
+
+    candidates = []
+    for k in ISOLATION_TREE_COUNTS:
+        if k < iso.n_estimators:
+            smaller = clone(iso).set_params(n_estimators=k)
+            candidates.append((f"trees_{k}", smaller.fit(X_train_clean)))
+    return candidates
+
+
+def score_candidates(name: str, original, candidates: List[Tuple[str, object]], score: Callable,
+                     predict: Callable, X_report: np.ndarray, y_report: np.ndarray,
+                     max_auc_loss: float) -> List[Tuple[Dict, object]]:
+    """Hold-out AUC, size and speed of each candidate, flagged if within max_auc_loss of the original"""
+    from sklearn.metrics import roc_auc_score
+
+    rows = []
+    for label, model in [('original', original)] + candidates:
+        row = {'candidate': label, 'auc': round(float(roc_auc_score(y_report, score(model, X_report))), 5)}
+        row.update(measure_model(model, lambda X: predict(model, X), X_report))
+        rows.append((row, model))
+
+    baseline = rows[0][0]
+    for row, _ in rows:
+        row['auc_loss'] = round(baseline['auc'] - row['auc'], 5)
+        row['within_budget'] = row['auc_loss'] <= max_auc_loss
+
+    print(f"\n🗜️  {name}:")
+    print(pd.DataFrame([row for row, _ in rows]).set_index('candidate').to_string())
+    return rows
+
+
+def recalibrate_decision(detector: BlockchainVotingFraudDetector, X_holdout: np.ndarray,
+                         y_holdout: np.ndarray, fraud_types: np.ndarray) -> str:
+    """Refit a calibrated decision rule to the compressed models' scores; returns what was done
+
+    Only rules calibrated for an alert rate are refit, with the same rate, on
+    hold-out predictions. The default rule is kept as it is. A rule that no
+    longer fits its alert rate is reset to the default.
+    """
+    max_alert_rate = detector.decision.get('max_alert_rate')
+    if max_alert_rate is None:
+        return 'default'
+
+    predictions = {
+        'iso_flag': (detector.models['isolation_forest'].predict(X_holdout) == -1).astype(float),
+        'rf_probability': detector.supervised_model.predict_proba(X_holdout)[:, 1]
+    }
+    try:
+        decision, _ = calibrate_decision(predictions, y_holdout, fraud_types, max_alert_rate)
+    except ValueError as e:
+        print(f"⚠️ {e} with the compressed models - reset to the default decision rule")
+        detector.decision = dict(DEFAULT_DECISION)
+        return 'reset_to_default'
+
+    decision['calibrated_on'] = 'compression_holdout'
+    decision['holdout_votes'] = int(len(y_holdout))
+    detector.decision = {**DEFAULT_DECISION, **decision}
+    print(f"⚖️  Decision rule recalibrated for <= {max_alert_rate:.1%} alert volume: "
+          f"threshold {decision['threshold']:.3f}, isolation weight {decision['isolation_weight']:.2f}")
+    return 'recalibrated'
+
+
+def compress_models(votes_df: pd.DataFrame, model_dir: str = 'fraud_detection_models',
+                    max_auc_loss: float = 0.005, detector: Optional[BlockchainVotingFraudDetector] = None,
+                    save: bool = True) -> Dict:
+    """Replace the saved models with the smallest ones inside the AUC budget"""
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    print("🗜️  FRAUD MODEL COMPRESSION")
+    print("=" * 60)
+
+    if detector is None:
+        detector = BlockchainVotingFraudDetector(model_save_dir=model_dir)
+        if not detector.load_models():
+            raise ValueError("Train models before compressing them")
+    backend = detector.supervised_backend
+
+    feature_df = detector.prepare_features(votes_df)
+    X = detector.scalers['standard'].transform(feature_df[detector.feature_columns])
+    y = feature_df['is_fraud'].to_numpy(dtype=int)
+
+    fraud_types = votes_df.loc[feature_df.index, 'fraud_type'].fillna('none').astype(str).to_numpy() \
+        if 'fraud_type' in votes_df.columns else np.where(y == 1, 'fraud', 'none')
+
+    # The training split, then the hold-out halved: one half ranks trees, the other judges the budget
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+    X_select, X_report, y_select, y_report = train_test_split(
+        X_test, y_test, test_size=0.5, random_state=42, stratify=y_test
+    )
+
+    print(f"📊 {len(y_train)} training votes, {len(y_select)} selection and {len(y_report)} report hold-out votes")
+    print(f"🎯 AUC loss budget: {max_auc_loss}")
+
+    iso = detector.models['isolation_forest']
+    iso_rows = score_candidates(
+        'Isolation Forest', iso, isolation_candidates(iso, X_train[y_train == 0]),
+        score=lambda model, X: -model.score_samples(X), predict=lambda model, X: model.predict(X),
+        X_report=X_report, y_report=y_report, max_auc_loss=max_auc_loss
+    )
+
+    supervised = detector.supervised_model
+    supervised_rows = score_candidates(
+        SUPERVISED_BACKENDS[backend]['label'], supervised,
+        supervised_candidates(supervised, backend, X_train, y_train, X_select, y_select),
+        score=lambda model, X: model.predict_proba(X)[:, 1], predict=lambda model, X: model.predict_proba(X),
+        X_report=X_report, y_report=y_report, max_auc_loss=max_auc_loss
+    )
+
+    # Per-model losses add up, so the pair served together must also keep the ensemble within budget
+    weight = detector.decision['isolation_weight']
+    iso_flags = [(row, model, (model.predict(X_report) == -1).astype(float))
+                 for row, model in iso_rows if row['within_budget']]
+    probabilities = [(row, model, model.predict_proba(X_report)[:, 1])
+                     for row, model in supervised_rows if row['within_budget']]
+    pairs = sorted(
+        ((iso_item, supervised_item) for iso_item in iso_flags for supervised_item in probabilities),
+        key=lambda pair: (pair[0][0]['size_mb'] + pair[1][0]['size_mb'],
+                          pair[0][0]['single_row_latency_ms'] + pair[1][0]['single_row_latency_ms'])
+    )
+    baseline_auc = roc_auc_score(y_report, weight * iso_flags[0][2] + (1 - weight) * probabilities[0][2])
+    for (iso_row, new_iso, flags), (supervised_row, new_supervised, probability) in pairs:
+        if baseline_auc - roc_auc_score(y_report, weight * flags + (1 - weight) * probability) <= max_auc_loss:
+            break
+    print(f"\n✅ Selected: isolation forest {iso_row['candidate']}, {backend} {supervised_row['candidate']}")
+
+    def ensemble(X_rows: np.ndarray) -> np.ndarray:
+        return detector._ensemble_scores(X_rows)[2]
+
+    ensemble_before = {
+        'auc': round(float(roc_auc_score(y_report, ensemble(X_report))), 5),
+        'single_vote_latency_ms': round(single_row_latency_ms(ensemble, X_report), 3)
+    }
+    detector.models['isolation_forest'] = new_iso
+    detector.models[backend] = new_supervised
+    ensemble_after = {
+        'auc': round(float(roc_auc_score(y_report, ensemble(X_report))), 5),
+        'single_vote_latency_ms': round(single_row_latency_ms(ensemble, X_report), 3)
+    }
+
+    iso_report = {'selected': iso_row['candidate'], 'before': iso_rows[0][0], 'after': iso_row,
+                  'candidates': [row for row, _ in iso_rows]}
+    supervised_report = {'selected': supervised_row['candidate'], 'before': supervised_rows[0][0],
+                         'after': supervised_row, 'candidates': [row for row, _ in supervised_rows]}
+
+    record = {
+        'date': datetime.now().isoformat(),
+        'max_auc_loss': max_auc_loss,
+        'isolation_forest': iso_report['selected'],
+        backend: supervised_report['selected'],
+        'ensemble_before': ensemble_before,
+        'ensemble_after': ensemble_after,
+        'size_mb_before': round(iso_report['before']['size_mb'] + supervised_report['before']['size_mb'], 3),
+        'size_mb_after': round(iso_report['after']['size_mb'] + supervised_report['after']['size_mb'], 3)
+    }
+
+    print(f"\n📦 Model size: {record['size_mb_before']} MB -> {record['size_mb_after']} MB")
+    print(f"⏱️  Ensemble latency per vote: {ensemble_before['single_vote_latency_ms']} ms -> "
+          f"{ensemble_after['single_vote_latency_ms']} ms")
+    print(f"📈 Ensemble AUC: {ensemble_before['auc']} -> {ensemble_after['auc']}")
+
+    evaluation_dir = os.path.join(detector.model_save_dir, 'evaluation')
+    os.makedirs(evaluation_dir, exist_ok=True)
+    report_path = os.path.join(evaluation_dir, 'compression_report.json')
+    with open(report_path, 'w') as f:
+        json.dump({**record, 'details': {'isolation_forest': iso_report, backend: supervised_report}}, f, indent=2)
+    print(f"📁 Report saved to {report_path}")
+
+    if not save:
+        return record
+    if iso_report['selected'] == 'original' and supervised_report['selected'] == 'original':
+        print("✅ No smaller model fits the budget - saved models left unchanged")
+        return record
+
+    record['decision'] = recalibrate_decision(detector, X_test, y_test, fraud_types[test_idx])
+
+    # Early exits must agree with the compressed ensemble, as they do after training
+    if detector.cascade.model is not None:
+        detector.recalibrate_cascade(X_test, y_test)
+
+    metadata = detector.model_metadata
+    history = list(metadata.get('compressions', []))
+    history.append(record)
+    extra_metadata = detector.carried_metadata()
+    extra_metadata['compressions'] = history
+
+    old_version = metadata.get('model_version', '1.0')
+    record['model_version'] = next_model_version(old_version)
+    detector._save_models(model_version=record['model_version'], extra_metadata=extra_metadata)
+    print(f"✅ Compressed models saved as version {record['model_version']} (was {old_version})")
+
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress fraud models within an AUC loss budget")
+    parser.add_argument('votes', help="Labelled votes CSV the models were trained on (with is_fraud)")
+    parser.add_argument('--model-dir', default='fraud_detection_models')
+    parser.add_argument('--max-auc-loss', type=float, default=0.005,
+                        help="Largest hold-out AUC drop accepted per model")
+    parser.add_argument('--dry-run', action='store_true', help="Report only; leave the saved models unchanged")
+    args = parser.parse_args()
+
+    compress_models(pd.read_csv(args.votes), args.model_dir, args.max_auc_loss, save=not args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Cross-validated evaluation and alert-threshold calibration
+
+Runs stratified k-fold training of the production Isolation Forest and
+supervised classifier in parallel processes, caches the out-of-fold predictions,
+sweeps ensemble weights and thresholds in one vectorized pass, and writes
+the decision rule that fits investigator capacity into model_metadata.json.
+The cascade's early-exit bands are recalibrated around the new threshold
+on the training hold-out split in the same step.
+
+Run it on the CSV the models were trained on so the hold-out split matches.
+
+Usage:
+    python model_evaluation.py fraud_detection_data/nigerian_votes_dataset.csv --max-alert-rate 0.08
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from typing import Dict, Optional, Tuple
+from fraud_detector import (
+    BlockchainVotingFraudDetector, next_model_version, SUPERVISED_BACKENDS, DEFAULT_SUPERVISED_BACKEND,
+    DEFAULT_DECISION
+)
+
+
+def _fit_fold(X: np.ndarray, y: np.ndarray, train_idx: np.ndarray, test_idx: np.ndarray,
+              backend: str = DEFAULT_SUPERVISED_BACKEND) -> Dict:
+    """Train both production models on one fold and score its held-out votes"""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X[train_idx])
+    X_train, X_test = scaler.transform(X[train_idx]), scaler.transform(X[test_idx])
+    y_train = y[train_idx]
+
+    iso = BlockchainVotingFraudDetector.build_isolation_forest(y_train.mean())
+    iso.fit(X_train[y_train == 0])
+
+    rf = BlockchainVotingFraudDetector.build_supervised_model(backend)
+    rf.fit(X_train, y_train)
+
+    return {
+        'test_idx': test_idx,
+        'iso_score': -iso.score_samples(X_test),
+        'iso_flag': (iso.predict(X_test) == -1).astype(float),
+        'rf_probability': rf.predict_proba(X_test)[:, 1]
+    }
+
+
+def cross_validate(X: np.ndarray, y: np.ndarray, n_folds: int = 5, n_jobs: int = -1,
+                   cache_dir: Optional[str] = None,
+                   backend: str = DEFAULT_SUPERVISED_BACKEND) -> Dict[str, np.ndarray]:
+    """Out-of-fold predictions, reused from cache_dir when the data is unchanged"""
+    from sklearn.model_selection import StratifiedKFold
+
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(X).tobytes())
+        digest.update(np.ascontiguousarray(y).tobytes())
+        digest.update(f"{n_folds}:{backend}".encode())
+        cache_path = os.path.join(cache_dir, f"oof_{digest.hexdigest()[:16]}.npz")
+        if os.path.exists(cache_path):
+            print(f"📂 Using cached out-of-fold predictions: {cache_path}")
+            return dict(np.load(cache_path))
+
+    print(f"🔁 Running {n_folds}-fold cross-validation...")
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X, y)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(X, y, train_idx, test_idx, backend) for train_idx, test_idx in folds
+    )
+
+    oof = {key: np.zeros(len(y)) for key in ('iso_score', 'iso_flag', 'rf_probability')}
+    oof['fold'] = np.zeros(len(y), dtype=int)
+    for fold, result in enumerate(results):
+        for key in ('iso_score', 'iso_flag', 'rf_probability'):
+            oof[key][result['test_idx']] = result[key]
+        oof['fold'][result['test_idx']] = fold
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(cache_path, **oof)
+
+    return oof
+
+
+def threshold_sweep(scores: np.ndarray, y: np.ndarray, fraud_types: np.ndarray,
+                    thresholds: np.ndarray) -> pd.DataFrame:
+    """Precision, recall, alert volume and per-fraud-type recall at every threshold"""
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores = scores[order]
+    # Votes flagged at threshold t are those with score > t
+    n_flagged = np.searchsorted(-sorted_scores, -thresholds, side='left')
+
+    true_positives = np.r_[0, np.cumsum(y[order])][n_flagged]
+    n_fraud = max(int(y.sum()), 1)
+
+    curves = pd.DataFrame({
+        'threshold': thresholds,
+        'alerts': n_flagged,
+        'alert_rate': n_flagged / len(y),
+        'precision': np.where(n_flagged > 0, true_positives / np.maximum(n_flagged, 1), 1.0),
+        'recall': true_positives / n_fraud
+    })
+
+    sorted_types = fraud_types[order]
+    for fraud_type in np.unique(fraud_types[y == 1]):
+        is_type = sorted_types == fraud_type
+        caught = np.r_[0, np.cumsum(is_type)][n_flagged]
+        curves[f'recall_{fraud_type}'] = caught / max(int(is_type.sum()), 1)
+
+    return curves
+
+
+def calibrate_decision(oof: Dict[str, np.ndarray], y: np.ndarray, fraud_types: np.ndarray,
+                       max_alert_rate: float, medium_precision: float = 0.9,
+                       high_precision: float = 0.97) -> Tuple[Dict, pd.DataFrame]:
+    """Pick the ensemble weight and threshold with the best recall within alert capacity"""
+    thresholds = np.linspace(0.0, 1.0, 201)
+    best = None
+    all_curves = []
+
+    for weight in np.linspace(0.0, 1.0, 21):
+        scores = weight * oof['iso_flag'] + (1 - weight) * oof['rf_probability']
+        curves = threshold_sweep(scores, y, fraud_types, thresholds)
+        curves.insert(0, 'isolation_weight', round(float(weight), 2))
+        all_curves.append(curves)
+
+        feasible = curves[curves['alert_rate'] <= max_alert_rate]
+        if feasible.empty:
+            continue
+        candidate = feasible.sort_values(['recall', 'precision', 'threshold'], ascending=[False, False, True]).iloc[0]
+        if best is None or (candidate['recall'], candidate['precision']) > (best['recall'], best['precision']):
+            best = candidate
+            best_curves = curves
+
+    if best is None:
+        raise ValueError(f"No threshold keeps the alert rate under {max_alert_rate:.1%}")
+
+    def cutoff_for(precision: float) -> float:
+        """Lowest threshold above the decision threshold reaching the target precision"""
+        above = best_curves[(best_curves['threshold'] >= best['threshold']) & (best_curves['precision'] >= precision)]
+        return float(above['threshold'].min()) if not above.empty else 1.0
+
+    decision = {
+        'isolation_weight': float(best['isolation_weight']),
+        'threshold': float(best['threshold']),
+        'confidence_medium': cutoff_for(medium_precision),
+        'confidence_high': cutoff_for(high_precision),
+        'max_alert_rate': max_alert_rate,
+        'expected': {
+            'precision': float(best['precision']),
+            'recall': float(best['recall']),
+            'alert_rate': float(best['alert_rate']),
+            'recall_by_fraud_type': {
+                col[len('recall_'):]: float(best[col]) for col in best.index if col.startswith('recall_')
+            }
+        }
+    }
+    decision['confidence_high'] = max(decision['confidence_high'], decision['confidence_medium'])
+
+    return decision, pd.concat(all_curves, ignore_index=True)
+
+
+def evaluate_and_calibrate(votes_df: pd.DataFrame, model_dir: str = 'fraud_detection_models',
+                           max_alert_rate: float = 0.08, n_folds: int = 5, n_jobs: int = -1) -> Dict:
+    """Full evaluation run; updates the decision rule in the saved model metadata"""
+    from sklearn.metrics import roc_auc_score
+
+    print("📈 CROSS-VALIDATED FRAUD MODEL EVALUATION")
+    print("=" * 60)
+
+    detector = BlockchainVotingFraudDetector(model_save_dir=model_dir)
+    if not detector.load_models():
+        raise ValueError("Train models before calibrating their decision rule")
+
+    feature_df = detector.prepare_features(votes_df)
+    X = feature_df[detector.feature_columns].to_numpy(dtype=float)
+    y = feature_df['is_fraud'].to_numpy(dtype=int)
+    fraud_types = votes_df.loc[feature_df.index, 'fraud_type'].fillna('none').astype(str).to_numpy() \
+        if 'fraud_type' in votes_df.columns else np.where(y == 1, 'fraud', 'none')
+
+    evaluation_dir = os.path.join(model_dir, 'evaluation')
+    backend = detector.supervised_backend
+    oof = cross_validate(X, y, n_folds=n_folds, n_jobs=n_jobs, cache_dir=evaluation_dir, backend=backend)
+
+    auc = {
+        'isolation_forest': float(roc_auc_score(y, oof['iso_score'])),
+        backend: float(roc_auc_score(y, oof['rf_probability']))
+    }
+    print(f"🔍 Isolation Forest AUC: {auc['isolation_forest']:.3f}")
+    print(f"🎯 {SUPERVISED_BACKENDS[backend]['label']} AUC: {auc[backend]:.3f}")
+
+    decision, curves = calibrate_decision(oof, y, fraud_types, max_alert_rate)
+    decision['cv_auc'] = auc
+    decision['cv_folds'] = n_folds
+
+    curves_path = os.path.join(evaluation_dir, 'threshold_curves.csv')
+    curves.to_csv(curves_path, index=False)
+
+    print(f"\n⚖️  Decision rule for <= {max_alert_rate:.1%} alert volume:")
+    print(f"   score = {decision['isolation_weight']:.2f} * isolation + "
+          f"{1 - decision['isolation_weight']:.2f} * {backend} > {decision['threshold']:.3f}")
+    print(f"   Expected precision {decision['expected']['precision']:.3f}, "
+          f"recall {decision['expected']['recall']:.3f}, alert rate {decision['expected']['alert_rate']:.2%}")
+    for fraud_type, recall in decision['expected']['recall_by_fraud_type'].items():
+        print(f"   - {fraud_type}: recall {recall:.3f}")
+
+    # Tier-1 early exits must agree with the new rule, so the bands move with the threshold
+    metadata = dict(detector.model_metadata)
+    if detector.cascade.model is not None:
+        from sklearn.model_selection import train_test_split
+        
+        detector.decision = {**DEFAULT_DECISION, **decision}
+        _, X_test, _, y_test = train_test_split(
+            detector.scalers['standard'].transform(feature_df[detector.feature_columns]), y,
+            test_size=0.2, random_state=42, stratify=y
+        )
+        metadata['cascade'] = detector.recalibrate_cascade(X_test, y_test)
+    
+    # Only the decision rule and cascade bands change; the trained models are left untouched.
+    # The version bump lets a running API pick up the new rule.
+    metadata['decision'] = decision
+    metadata['model_version'] = next_model_version(metadata.get('model_version', '1.0'))
+    metadata_path = os.path.join(model_dir, 'model_metadata.json')
+    with open(metadata_path + '.tmp', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(metadata_path + '.tmp', metadata_path)
+
+    print(f"\n✅ Decision rule saved to {metadata_path}")
+    print(f"📁 Threshold curves: {curves_path}")
+
+    return decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validate fraud models and calibrate alert thresholds")
+    parser.add_argument('votes', help="Labelled votes CSV (with is_fraud and fraud_type)")
+    parser.add_argument('--model-dir', default='fraud_detection_models')
+    parser.add_argument('--max-alert-rate', type=float, default=0.08,
+                        help="Investigator capacity as the maximum fraction of votes alerted")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    evaluate_and_calibrate(pd.read_csv(args.votes), args.model_dir, args.max_alert_rate, args.folds, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Per-election model registry with an LRU cache of loaded detectors
+
+Each election or region (governorship, senate, a state...) has its own
+trained model directory under <base_dir>/elections/<election_id>/, in the
+same layout as the default model directory. Detectors are loaded and warmed
+the first time a vote for their election arrives, then kept in an LRU cache
+bounded by count and by model size on disk. Hot elections can be preloaded
+at startup. Hits, loads, load time and evictions are tracked per election.
+
+Each election's live-traffic state (seen voters, collusion graph) is kept
+in a separate store that eviction never touches, so an evicted and reloaded
+election still catches repeat votes and keeps its clusters. The state has
+its own caps (ScoringCascade.max_seen_voters, CollusionGraph.max_entities).
+
+Usage:
+    python model_registry.py train governorship_2024 votes.csv
+    python model_registry.py list
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fraud_detector import BlockchainVotingFraudDetector, SUPERVISED_BACKENDS, DEFAULT_SUPERVISED_BACKEND
+
+DEFAULT_MODEL_DIR = 'fraud_detection_models'
+
+# Election ids name directories, so only plain names are accepted
+ELECTION_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+
+def _dir_size_mb(path: str) -> float:
+    """Size of the model files in a directory - a proxy for their size in memory"""
+    total = 0
+    for name in os.listdir(path):
+        if name.endswith('.joblib'):
+            total += os.path.getsize(os.path.join(path, name))
+    return total / 1e6
+
+
+class ModelRegistry:
+    """Routes election ids to their own detectors, loading them on demand"""
+
+    def __init__(self, base_dir: str = DEFAULT_MODEL_DIR, max_models: int = 8, max_size_mb: float = 1024.0,
+                 detector_factory: Optional[Callable[[str], BlockchainVotingFraudDetector]] = None,
+                 warmup_votes: int = 20):
+        self.elections_dir = os.path.join(base_dir, 'elections')
+        self.max_models = max_models
+        self.max_size_mb = max_size_mb
+        self.detector_factory = detector_factory or (lambda model_dir: BlockchainVotingFraudDetector(model_save_dir=model_dir))
+        self.warmup_votes = warmup_votes
+
+        # election_id -> (detector, size_mb), least recently used first
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        # election_id -> detector.live_state(), kept across evictions and reloads
+        self._live_state = {}
+        self.stats = {}
+
+    @staticmethod
+    def validate_id(election_id: str) -> str:
+        if not isinstance(election_id, str) or not ELECTION_ID_PATTERN.match(election_id):
+            raise ValueError(f"Invalid election id {election_id!r}")
+        return election_id
+
+    def model_dir(self, election_id: str) -> str:
+        return os.path.join(self.elections_dir, self.validate_id(election_id))
+
+    def available(self) -> List[str]:
+        """Election ids with a trained model on disk"""
+        if not os.path.isdir(self.elections_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.elections_dir)
+            if ELECTION_ID_PATTERN.match(name)
+            and os.path.exists(os.path.join(self.elections_dir, name, 'model_metadata.json'))
+        )
+
+    def _stats_for(self, election_id: str) -> Dict:
+        stats = self.stats.get(election_id)
+        if stats is None:
+            stats = self.stats[election_id] = {
+                'hits': 0, 'loads': 0, 'evictions': 0, 'last_load_seconds': None,
+                'total_load_seconds': 0.0, 'last_used': None
+            }
+        return stats
+
+    def cached(self, election_id: str) -> Optional[BlockchainVotingFraudDetector]:
+        """The loaded detector, or None; counts a hit. Never touches the disk."""
+        with self._lock:
+            entry = self._cache.get(election_id)
+            if entry is None:
+                return None
+            self._cache.move_to_end(election_id)
+            stats = self._stats_for(election_id)
+            stats['hits'] += 1
+            stats['last_used'] = datetime.now().isoformat()
+            return entry[0]
+
+    def get(self, election_id: str) -> BlockchainVotingFraudDetector:
+        """The detector for an election, loading it on a miss (blocking - call off the event loop)"""
+        return self.cached(election_id) or self.load(election_id)
+
+    def load(self, election_id: str, replace: bool = False) -> BlockchainVotingFraudDetector:
+        """Load and warm an election's models and cache them; LookupError if none are trained"""
+        model_dir = self.model_dir(election_id)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(election_id, threading.Lock())
+
+        # One load per election at a time; concurrent requests wait for it
+        with load_lock:
+            if not replace:
+                with self._lock:
+                    entry = self._cache.get(election_id)
+                if entry is not None:
+                    return entry[0]
+
+            # Checked first: constructing a detector would create the directory
+            if not os.path.exists(os.path.join(model_dir, 'model_metadata.json')):
+                raise LookupError(f"No trained model for election '{election_id}'")
+            start = time.perf_counter()
+            detector = self.detector_factory(model_dir)
+            if not detector.load_models():
+                raise LookupError(f"Model files missing for election '{election_id}'")
+            detector.warm_up(self.warmup_votes)
+            seconds = time.perf_counter() - start
+
+            with self._lock:
+                stats = self._stats_for(election_id)
+                stats['loads'] += 1
+                stats['last_load_seconds'] = round(seconds, 4)
+                stats['total_load_seconds'] = round(stats['total_load_seconds'] + seconds, 4)
+                stats['last_used'] = datetime.now().isoformat()
+                # Live traffic state is not part of the model, so it outlives reloads and evictions
+                state = self._live_state.get(election_id)
+                if state is None:
+                    self._live_state[election_id] = detector.live_state()
+                else:
+                    detector.restore_live_state(state)
+                self._cache.pop(election_id, None)
+                self._cache[election_id] = (detector, _dir_size_mb(model_dir))
+                self._evict()
+
+        print(f"📦 Loaded model for election '{election_id}' "
+              f"(version {detector.model_metadata.get('model_version')}, {seconds:.2f}s)")
+        return detector
+
+    def _evict(self):
+        """Drop least recently used detectors beyond max_models or max_size_mb; keeps the newest"""
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.max_models
+            or sum(size for _, size in self._cache.values()) > self.max_size_mb
+        ):
+            election_id, _ = self._cache.popitem(last=False)
+            self._stats_for(election_id)['evictions'] += 1
+            print(f"♻️ Evicted model for election '{election_id}'")
+
+    def evict(self, election_id: str) -> bool:
+        with self._lock:
+            if self._cache.pop(election_id, None) is None:
+                return False
+            self._stats_for(election_id)['evictions'] += 1
+            return True
+
+    def preload(self, election_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Load elections ahead of traffic; returns an error message (or None) per id"""
+        errors = {}
+        for election_id in election_ids:
+            try:
+                self.get(election_id)
+                errors[election_id] = None
+            except (LookupError, ValueError) as e:
+                errors[election_id] = str(e)
+                print(f"⚠️ Could not preload election '{election_id}': {e}")
+        return errors
+
+    def live_state(self, election_id: str) -> Optional[Dict]:
+        """An election's seen voters and collusion graph, loaded or not; None before its first load"""
+        with self._lock:
+            return self._live_state.get(self.validate_id(election_id))
+
+    def loaded(self) -> Dict[str, BlockchainVotingFraudDetector]:
+        with self._lock:
+            return {election_id: detector for election_id, (detector, _) in self._cache.items()}
+
+    def stale(self) -> List[str]:
+        """Loaded elections whose model version on disk has changed"""
+        changed = []
+        for election_id, detector in self.loaded().items():
+            try:
+                with open(os.path.join(detector.model_save_dir, 'model_metadata.json'), 'r') as f:
+                    version = json.load(f).get('model_version')
+            except (OSError, ValueError):
+                continue
+            if version and version != detector.model_metadata.get('model_version'):
+                changed.append(election_id)
+        return changed
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            loaded = {
+                election_id: {
+                    'model_version': detector.model_metadata.get('model_version'),
+                    'supervised_backend': detector.supervised_backend,
+                    'size_mb': round(size, 3)
+                }
+                for election_id, (detector, size) in self._cache.items()
+            }
+            return {
+                'loaded': loaded,
+                'loaded_size_mb': round(sum(size for _, size in self._cache.values()), 3),
+                'max_models': self.max_models,
+                'max_size_mb': self.max_size_mb,
+                'available': self.available(),
+                'live_state_elections': sorted(self._live_state),
+                'per_election': {election_id: dict(stats) for election_id, stats in self.stats.items()}
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and list per-election fraud models")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train', help="Train the model for one election")
+    train.add_argument('election_id')
+    train.add_argument('votes', help="Labelled votes CSV for this election (with is_fraud)")
+    train.add_argument('--backend', choices=list(SUPERVISED_BACKENDS), default=DEFAULT_SUPERVISED_BACKEND)
+
+    commands.add_parser('list', help="List elections with trained models")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_dir)
+    if args.command == 'list':
+        for election_id in registry.available():
+            with open(os.path.join(registry.model_dir(election_id), 'model_metadata.json'), 'r') as f:
+                metadata = json.load(f)
+            print(f"🗳️  {election_id}: version {metadata.get('model_version')}, "
+                  f"{metadata.get('supervised_backend')}, trained {metadata.get('training_date')}")
+        return
+
+    import pandas as pd
+
+    model_dir = registry.model_dir(args.election_id)
+    print(f"🗳️  Training model for election '{args.election_id}' in {model_dir}")
+    detector = BlockchainVotingFraudDetector(model_save_dir=model_dir, supervised_backend=args.backend)
+    detector.train_models(pd.read_csv(args.votes))
+
+
+if __name__ == "__main__":
+    main()
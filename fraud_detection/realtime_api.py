@@ -1,12 +1,31 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Dict, List, Optional
 import json
 import asyncio
+import hmac
+import os
+import time
 import uvicorn
+from collections import Counter
+
+# fraud_detector pulls in pandas; sklearn is only loaded when models are unpickled
+_import_start = time.perf_counter()
 from fraud_detector import BlockchainVotingFraudDetector
+from scoring_cascade import DEGRADATION_LEVELS, DEGRADE_RULES_ONLY
+from indicator_rules import FraudIndicatorRules
+from live_tallies import LiveTallies, VoteCastEventSource
+from incident_tracker import IncidentTracker
+from vote_stream import NDJSONDecoder, score_stream, DEFAULT_BATCH_SIZE, DEFAULT_MAX_PENDING
+from sampling_profiler import SamplingProfiler
+from load_shedder import LoadShedder
+from fraud_heatmap import FraudHeatmap, HEATMAP_LEVELS
+from location_index import LocationVoteCounter
+from model_registry import ModelRegistry
+IMPORT_SECONDS = time.perf_counter() - _import_start
 
 # Pydantic models
 class VoteInput(BaseModel):
@@ -20,6 +39,17 @@ class VoteInput(BaseModel):
     session_duration: int
     device_fingerprint: str
     transaction_hash: Optional[str] = None
+    # Routes the vote to that election's model; the default model otherwise
+    election_id: Optional[str] = None
+
+class VoteCastEvent(BaseModel):
+    voter: str
+    candidate_id: int
+    timestamp: int
+    transaction_hash: Optional[str] = None
+    log_index: int = 0
+    block_number: Optional[int] = None
+    location_id: Optional[int] = None
 
 class FraudResponse(BaseModel):
     vote_id: str
@@ -27,12 +57,41 @@ class FraudResponse(BaseModel):
     fraud_probability: float
     confidence: str
     fraud_indicators: List[str]
+    scoring_tier: Optional[str] = None
+    # Scoring mode under load shedding: full, no_indicators, no_supervised_model or rules_only
+    degradation: Optional[str] = None
+    election_id: Optional[str] = None
     timestamp: str
+    # Milliseconds per scoring stage, only when the request sent X-Fraud-Trace
+    trace: Optional[Dict[str, float]] = None
+
+FRAUD_RESPONSE_FIELDS = [field for field in FraudResponse.model_fields if field != 'trace']
+
+TRACE_HEADER_VALUES = {'1', 'true', 'yes', 'on'}
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streaming response that leaves receive() to the request body reader
+    
+    StreamingResponse otherwise listens for disconnects by consuming
+    receive() itself, which would swallow the body of a request that is
+    still being uploaded while results stream back.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
 
 class FraudDetectionAPI:
     """FastAPI application for real-time fraud detection"""
     
-    def __init__(self):
+    def __init__(self, model_poll_interval: float = 60.0, event_poll_interval: float = 2.0,
+                 reconcile_interval: float = 60.0, stream_batch_size: int = DEFAULT_BATCH_SIZE,
+                 stream_max_pending: int = DEFAULT_MAX_PENDING, incident_window: float = 300.0,
+                 incident_update_interval: float = 5.0, max_stored_alerts: int = 1000,
+                 slo_latency_ms: float = 250.0, slo_queue_delay_ms: float = 100.0,
+                 heatmap_bucket_seconds: int = 300, heatmap_push_interval: float = 2.0,
+                 max_election_models: int = 8, max_election_models_mb: float = 1024.0,
+                 preload_elections: Optional[List[str]] = None):
         self.app = FastAPI(
             title="Blockchain Voting Fraud Detection API",
             description="Real-time fraud detection for blockchain voting systems",
@@ -43,6 +102,53 @@ class FraudDetectionAPI:
         self.fraud_detector = BlockchainVotingFraudDetector()
         self.connected_websockets = set()
         self.fraud_alerts = []
+        self.total_alerts = 0
+        self.max_stored_alerts = max_stored_alerts
+        
+        # Alerts are broadcast as incidents, grouped by location, IP and device
+        self.incidents = IncidentTracker(window_seconds=incident_window, update_interval=incident_update_interval)
+        
+        # Startup state, filled in phase by phase by run_startup()
+        self.is_ready = False
+        self.startup_phases = {'imports': round(IMPORT_SECONDS, 4)}
+        self.startup_error = None
+        self.started_at = datetime.now()
+        self.model_poll_interval = model_poll_interval
+        
+        # Live results, fed by VoteCast events
+        self.tallies = LiveTallies(location_state=self.fraud_detector.location_index.state_of)
+        self.event_source = VoteCastEventSource.from_environment()
+        self.event_poll_interval = event_poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.results_websockets = set()
+        # Held while events are ingested and while tallies are reconciled, so a
+        # reconcile never overwrites counts from blocks ingested after its fetch
+        self.tallies_lock = asyncio.Lock()
+        
+        # NDJSON streaming ingestion
+        self.stream_batch_size = stream_batch_size
+        self.stream_max_pending = stream_max_pending
+        
+        # Admin endpoints (profiling) are disabled unless a token is configured
+        self.admin_token = os.environ.get('FRAUD_ADMIN_TOKEN')
+        self.profiler = SamplingProfiler()
+        
+        # Scoring degrades step by step as latency or queueing nears the SLO
+        self.load_shedder = LoadShedder(slo_latency_ms=slo_latency_ms, slo_queue_delay_ms=slo_queue_delay_ms)
+        
+        # Fraud rate by location, LGA and state over time, counted as votes are scored
+        self.heatmap = FraudHeatmap(self.fraud_detector.location_index, bucket_seconds=heatmap_bucket_seconds)
+        self.heatmap_push_interval = heatmap_push_interval
+        self.heatmap_websockets = set()
+        
+        # Per-election models, loaded on first use and kept in an LRU cache
+        self.model_registry = ModelRegistry(
+            base_dir=self.fraud_detector.model_save_dir, max_models=max_election_models,
+            max_size_mb=max_election_models_mb, detector_factory=self._election_detector
+        )
+        if preload_elections is None:
+            preload_elections = [e for e in os.environ.get('FRAUD_PRELOAD_ELECTIONS', '').split(',') if e.strip()]
+        self.preload_elections = [e.strip() for e in preload_elections]
         
         self.setup_routes()
     
@@ -62,9 +168,33 @@ class FraudDetectionAPI:
         @self.app.on_event("startup")
         async def startup():
             print("🚀 Starting Fraud Detection API...")
-            # Try to load existing models
-            self.fraud_detector.load_models()
-            print("✅ Fraud Detection API ready!")
+            # Load and warm models off the event loop so liveness stays responsive
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self.run_startup)
+            asyncio.create_task(self.watch_model_updates())
+            asyncio.create_task(self.sweep_incidents())
+            asyncio.create_task(self.monitor_load())
+            asyncio.create_task(self.push_heatmap_deltas())
+            if self.event_source:
+                asyncio.create_task(self.poll_vote_cast_events())
+                asyncio.create_task(self.reconcile_tallies())
+        
+        @self.app.get("/health/live")
+        async def health_live():
+            """Liveness probe - the process is up and serving requests"""
+            return {"status": "alive", "timestamp": datetime.now().isoformat()}
+        
+        @self.app.get("/health/ready")
+        async def health_ready():
+            """Readiness probe - models are loaded and warmed"""
+            body = {
+                "status": "ready" if self.is_ready else "not_ready",
+                "model_loaded": self.fraud_detector.is_trained,
+                "startup_phases": self.startup_phases,
+                "startup_total_seconds": round(sum(self.startup_phases.values()), 4),
+                "error": self.startup_error
+            }
+            return JSONResponse(status_code=200 if self.is_ready else 503, content=body)
         
         @self.app.get("/")
         async def root():
@@ -74,47 +204,346 @@ class FraudDetectionAPI:
                 "version": "1.0.0"
             }
         
-        @self.app.post("/analyze-vote", response_model=FraudResponse)
-        async def analyze_vote(vote: VoteInput):
-            """Analyze a single vote for fraud"""
+        @self.app.post("/analyze-vote", response_model=FraudResponse, response_model_exclude_none=True)
+        async def analyze_vote(vote: VoteInput, x_fraud_trace: Optional[str] = Header(None)):
+            """Analyze a single vote for fraud
+            
+            Send `X-Fraud-Trace: 1` to get a per-stage timing breakdown in the response.
+            """
+            if not self.is_ready:
+                raise HTTPException(status_code=503, detail="Fraud detection models are not ready")
+            
+            # A cold election model loads first; its one-off load time is not scoring latency
+            detector = await self.detector_for(vote.election_id)
+            
+            trace = {} if x_fraud_trace and x_fraud_trace.strip().lower() in TRACE_HEADER_VALUES else None
+            request_start = time.perf_counter()
+            level = self.load_shedder.level
+            scored_level = level
             try:
                 # Convert to dict
                 vote_data = vote.dict()
                 
-                # Get fraud prediction
-                result = self.fraud_detector.predict_fraud_realtime(vote_data)
+                # Get fraud prediction; the detector reports the level it actually scored at
+                result = detector.predict_fraud_realtime(vote_data, trace, level)
+                scored_level = DEGRADATION_LEVELS.index(result['degradation'])
+                if 'error' in result:
+                    # Nothing was scored, so the vote counts towards neither the heatmap nor the tallies
+                    raise HTTPException(status_code=422, detail=f"Vote could not be scored: {result['error']}")
+                result['election_id'] = vote.election_id
+                stage_start = time.perf_counter()
+                
+                # Lets the matching VoteCast event be counted for this location
+                self.tallies.register_vote_location(vote.transaction_hash, vote.location_id)
+                self.record_heatmap(vote.location_id, result)
                 
                 # If fraud detected, store alert and notify websockets
                 if result['is_fraud']:
-                    await self.handle_fraud_alert(result)
+                    await self.handle_fraud_alert(result, vote_data)
+                
+                await self.broadcast_drift_alerts(detector)
+                
+                if trace is not None:
+                    trace['alerting'] = (time.perf_counter() - stage_start) * 1000
+                    trace['total'] = (time.perf_counter() - request_start) * 1000
+                    result['trace'] = {stage: round(ms, 3) for stage, ms in trace.items()}
                 
                 return FraudResponse(**result)
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
+            finally:
+                self.load_shedder.record_latency(time.perf_counter() - request_start)
+                self.load_shedder.count_votes(scored_level)
+                self.profiler.request_completed()
+        
+        @self.app.post("/stream/analyze-votes")
+        async def analyze_vote_stream(request: Request):
+            """Score an NDJSON stream of votes, streaming one FraudResponse line back per vote"""
+            if not self.is_ready:
+                raise HTTPException(status_code=503, detail="Fraud detection models are not ready")
+            
+            async def lines():
+                decoder = NDJSONDecoder()
+                async for chunk in request.stream():
+                    for line in decoder.feed(chunk):
+                        yield line
+                for line in decoder.flush():
+                    yield line
+            
+            return NDJSONStreamingResponse(self.score_vote_stream(lines()))
+        
+        @self.app.websocket("/ws/analyze-votes")
+        async def websocket_analyze_votes(websocket: WebSocket):
+            """Bidirectional NDJSON vote stream; each message may carry one or more votes"""
+            await websocket.accept()
+            if not self.is_ready:
+                await websocket.close(code=1013, reason="Fraud detection models are not ready")
+                return
+            
+            async def lines():
+                decoder = NDJSONDecoder()
+                try:
+                    while True:
+                        message = await websocket.receive()
+                        if message['type'] == 'websocket.disconnect':
+                            return
+                        data = message.get('bytes') or (message.get('text') or '').encode()
+                        # A message is always a complete set of lines
+                        for line in decoder.feed(data) + decoder.flush():
+                            yield line
+                except WebSocketDisconnect:
+                    return
+            
+            try:
+                async for chunk in self.score_vote_stream(lines()):
+                    await websocket.send_text(chunk.decode())
+            except WebSocketDisconnect:
+                pass
         
         @self.app.get("/alerts")
         async def get_recent_alerts(limit: int = 50):
             """Get recent fraud alerts"""
             return {
                 "alerts": self.fraud_alerts[-limit:],
-                "total_alerts": len(self.fraud_alerts)
+                "total_alerts": self.total_alerts
+            }
+        
+        @self.app.get("/incidents")
+        async def get_incidents(status: str = "open", limit: int = 50):
+            """Alert incidents, most recently active first"""
+            if status not in ("open", "closed", "all"):
+                raise HTTPException(status_code=400, detail="status must be open, closed or all")
+            return {
+                "incidents": self.incidents.list_incidents(status, limit),
+                "stats": self.incidents.get_stats()
             }
         
+        @self.app.get("/incidents/{incident_id}")
+        async def get_incident(incident_id: str):
+            """One incident, open or recently closed"""
+            incident = self.incidents.get(incident_id)
+            if incident is None:
+                raise HTTPException(status_code=404, detail=f"Incident {incident_id} not found")
+            return incident
+        
         @self.app.get("/stats")
-        async def get_statistics():
-            """Get API statistics"""
+        async def get_statistics(election_id: Optional[str] = None):
+            """Get API statistics; model, cascade and graph sections are for election_id's model if given"""
+            detector = self.loaded_detector(election_id)
             return {
                 "connected_clients": len(self.connected_websockets),
-                "total_alerts": len(self.fraud_alerts),
-                "model_loaded": self.fraud_detector.is_trained,
+                "total_alerts": self.total_alerts,
+                "incidents": self.incidents.get_stats(),
+                "election_id": election_id,
+                "model_loaded": detector.is_trained,
+                "model_version": detector.model_metadata.get('model_version'),
+                "supervised_backend": detector.supervised_backend,
+                "ready": self.is_ready,
+                "scoring_cascade": detector.cascade.get_stats(),
+                "collusion_graph": detector.collusion_graph.get_stats(),
+                "load_shedding": self.load_shedder.get_stats(),
+                "model_registry": self.model_registry.get_stats(),
+                "heatmap": self.heatmap.get_stats(),
                 "uptime": datetime.now().isoformat()
             }
         
+        @self.app.post("/models/reload")
+        async def reload_models(election_id: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+            """Load the latest model version from disk and swap it in (needs the X-Admin-Token)"""
+            self._require_admin(x_admin_token)
+            loop = asyncio.get_running_loop()
+            if election_id:
+                detector = await self.load_election(election_id, replace=True)
+                return {"election_id": election_id, "model_version": detector.model_metadata.get('model_version')}
+            if not await loop.run_in_executor(None, self.reload_models):
+                raise HTTPException(status_code=500, detail="Model reload failed")
+            return {"model_version": self.fraud_detector.model_metadata.get('model_version')}
+        
+        @self.app.get("/models/registry")
+        async def get_model_registry():
+            """Per-election models: loaded, available on disk, hits and load times"""
+            return self.model_registry.get_stats()
+        
+        @self.app.post("/models/registry/{election_id}/load")
+        async def preload_election_model(election_id: str, x_admin_token: Optional[str] = Header(None)):
+            """Load an election's model ahead of its traffic (needs the X-Admin-Token)"""
+            self._require_admin(x_admin_token)
+            detector = await self.load_election(election_id)
+            return {"election_id": election_id, "model_version": detector.model_metadata.get('model_version')}
+        
+        @self.app.delete("/models/registry/{election_id}")
+        async def evict_election_model(election_id: str, x_admin_token: Optional[str] = Header(None)):
+            """Drop an election's model from memory; the next vote loads it again (needs the X-Admin-Token)"""
+            self._require_admin(x_admin_token)
+            if not self.model_registry.evict(election_id):
+                raise HTTPException(status_code=404, detail=f"No loaded model for election '{election_id}'")
+            return {"election_id": election_id, "evicted": True}
+        
+        @self.app.get("/results")
+        async def get_results(include_locations: bool = False):
+            """Live candidate tallies, served from memory"""
+            return self.tallies.snapshot(include_locations)
+        
+        @self.app.post("/events/vote-cast")
+        async def ingest_vote_cast(event: VoteCastEvent, x_admin_token: Optional[str] = Header(None)):
+            """Push a VoteCast event (for relays that already watch the chain)
+            
+            Pushed events change the public tallies, so relays must send the X-Admin-Token.
+            """
+            self._require_admin(x_admin_token)
+            async with self.tallies_lock:
+                delta = self.tallies.apply_vote_cast(event.dict())
+            if delta:
+                await self._broadcast(self.results_websockets, {"type": "results_delta", "data": [delta]})
+            return {"accepted": delta is not None, "total_votes": self.tallies.total_votes}
+        
+        @self.app.websocket("/ws/results")
+        async def websocket_results(websocket: WebSocket):
+            """WebSocket channel for live tally updates"""
+            await websocket.accept()
+            await websocket.send_text(json.dumps({"type": "results_snapshot", "data": self.tallies.snapshot()}))
+            self.results_websockets.add(websocket)
+            
+            try:
+                while True:
+                    # Keep connection alive
+                    await asyncio.sleep(30)
+                    await websocket.send_text(json.dumps({
+                        "type": "ping",
+                        "timestamp": datetime.now().isoformat()
+                    }))
+                    
+            except WebSocketDisconnect:
+                self.results_websockets.discard(websocket)
+        
+        @self.app.get("/drift")
+        async def get_drift(election_id: Optional[str] = None):
+            """Live feature drift against the training distribution of the default or an election's model"""
+            monitor = self.loaded_detector(election_id).drift_monitor
+            if monitor is None:
+                return {"enabled": False, "reason": "No drift reference saved with the current model"}
+            return {"enabled": True, **monitor.report()}
+        
+        @self.app.get("/clusters")
+        async def get_clusters(limit: int = 20, min_voters: int = 2, order_by: str = "voters",
+                               voter_id: Optional[str] = None, device_fingerprint: Optional[str] = None,
+                               ip_address: Optional[str] = None, election_id: Optional[str] = None):
+            """Collusion clusters of voters linked through shared devices and IPs, per election if given"""
+            graph = self.live_state_for(election_id)['collusion_graph']
+            lookups = {'voter_id': voter_id, 'device_fingerprint': device_fingerprint, 'ip_address': ip_address}
+            for kind, value in lookups.items():
+                if value is not None:
+                    cluster = graph.cluster_of(kind, value)
+                    if cluster is None:
+                        raise HTTPException(status_code=404, detail=f"No tracked cluster for {kind} {value}")
+                    return cluster
+            
+            if order_by not in ("voters", "growth_rate", "distinct_candidates"):
+                raise HTTPException(status_code=400, detail="order_by must be voters, growth_rate or distinct_candidates")
+            return {
+                "clusters": graph.largest_clusters(limit, min_voters, order_by),
+                "stats": graph.get_stats()
+            }
+        
+        @self.app.get("/heatmap")
+        async def get_heatmap(level: str = "state", window_minutes: Optional[float] = None,
+                              series: bool = False, limit: Optional[int] = None):
+            """Scored votes, flagged votes and mean fraud probability per location, LGA or state"""
+            if level not in HEATMAP_LEVELS:
+                raise HTTPException(status_code=400, detail=f"level must be one of {', '.join(HEATMAP_LEVELS)}")
+            return self.heatmap.snapshot(level, window_minutes * 60 if window_minutes else None, series, limit)
+        
+        @self.app.websocket("/ws/heatmap")
+        async def websocket_heatmap(websocket: WebSocket):
+            """Heatmap snapshot on connect, then deltas for the regions that changed"""
+            await websocket.accept()
+            await websocket.send_text(json.dumps({
+                "type": "heatmap_snapshot",
+                "data": {level: self.heatmap.snapshot(level) for level in HEATMAP_LEVELS}
+            }))
+            self.heatmap_websockets.add(websocket)
+            
+            try:
+                while True:
+                    # Keep connection alive
+                    await asyncio.sleep(30)
+                    await websocket.send_text(json.dumps({
+                        "type": "ping",
+                        "timestamp": datetime.now().isoformat()
+                    }))
+                    
+            except WebSocketDisconnect:
+                self.heatmap_websockets.discard(websocket)
+        
+        @self.app.get("/rules")
+        async def get_rules():
+            """Get the active fraud indicator rule configuration"""
+            return self.fraud_detector.indicator_rules.summary()
+        
+        @self.app.post("/rules/reload")
+        async def reload_rules(x_admin_token: Optional[str] = Header(None)):
+            """Reload indicator rules from disk without restarting (needs the X-Admin-Token)"""
+            self._require_admin(x_admin_token)
+            try:
+                rules = FraudIndicatorRules.load()
+            except (OSError, ValueError, KeyError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid rules config: {e}")
+            self.fraud_detector.indicator_rules = rules
+            for detector in self.model_registry.loaded().values():
+                detector.indicator_rules = rules
+            return self.fraud_detector.indicator_rules.summary()
+        
+        @self.app.post("/admin/profile")
+        async def start_profile(seconds: Optional[float] = None, requests: Optional[int] = None,
+                                interval_ms: float = 5.0, max_seconds: float = 300.0,
+                                save: bool = False, wait: bool = True,
+                                x_admin_token: Optional[str] = Header(None)):
+            """Sample every thread's stack for N seconds or the next K /analyze-vote requests
+            
+            Waits for the session and returns the folded-stack profile (flamegraph.pl,
+            speedscope) unless wait=false, in which case GET /admin/profile fetches it.
+            """
+            self._require_admin(x_admin_token)
+            if (seconds is None) == (requests is None):
+                raise HTTPException(status_code=400, detail="Give exactly one of seconds or requests")
+            if (seconds is not None and seconds <= 0) or (requests is not None and requests <= 0) \
+                    or interval_ms <= 0 or max_seconds <= 0:
+                raise HTTPException(status_code=400, detail="seconds, requests, interval_ms and max_seconds must be positive")
+            
+            try:
+                self.profiler.start(seconds, requests, interval_ms / 1000, max_seconds, save)
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            print(f"🔬 Profiling started ({f'{seconds}s' if seconds else f'{requests} requests'})")
+            
+            if not wait:
+                return JSONResponse(status_code=202, content=self.profiler.summary())
+            
+            # Wait off the event loop so the traffic being profiled keeps flowing
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.profiler.wait, max_seconds + 5)
+            return self._profile_response()
+        
+        @self.app.get("/admin/profile")
+        async def get_profile(x_admin_token: Optional[str] = Header(None)):
+            """The running session's progress, or the last finished profile"""
+            self._require_admin(x_admin_token)
+            if self.profiler.session is None:
+                raise HTTPException(status_code=404, detail="No profiling session has run")
+            if self.profiler.running:
+                return self.profiler.summary()
+            return self._profile_response()
+        
         @self.app.websocket("/ws/alerts")
         async def websocket_alerts(websocket: WebSocket):
             """WebSocket endpoint for real-time fraud alerts"""
             await websocket.accept()
+            await websocket.send_text(json.dumps({
+                "type": "incidents_snapshot", "data": self.incidents.list_incidents("open")
+            }))
             self.connected_websockets.add(websocket)
             
             try:
@@ -127,39 +556,330 @@ class FraudDetectionAPI:
                     }))
                     
             except WebSocketDisconnect:
-                self.connected_websockets.remove(websocket)
+                self.connected_websockets.discard(websocket)
+    
+    def _require_admin(self, token: Optional[str]):
+        """Reject requests without the configured X-Admin-Token"""
+        if not self.admin_token:
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set FRAUD_ADMIN_TOKEN")
+        if not token or not hmac.compare_digest(token.encode(), self.admin_token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid admin token")
+    
+    def _profile_response(self) -> PlainTextResponse:
+        """Folded-stack profile body, with the session summary in headers"""
+        summary = self.profiler.summary()
+        headers = {
+            'X-Profile-Samples': str(summary['sample_count']),
+            'X-Profile-Requests': str(summary['requests_seen'])
+        }
+        if summary.get('path'):
+            headers['X-Profile-Path'] = summary['path']
+        return PlainTextResponse(self.profiler.folded(), headers=headers)
+    
+    def run_startup(self, warmup_votes: int = 20):
+        """Load models and warm them up, timing each phase"""
+        try:
+            phase_start = time.perf_counter()
+            loaded = self.fraud_detector.load_models()
+            self.startup_phases['load_models'] = round(time.perf_counter() - phase_start, 4)
+            
+            if not loaded:
+                self.startup_error = "Model files not found - run setup_and_train.py"
+                print(f"❌ {self.startup_error}")
+                return
+            
+            self.startup_phases['warm_up'] = round(
+                self.fraud_detector.warm_up(warmup_votes), 4
+            )
+            
+            self.is_ready = True
+            
+            if self.preload_elections:
+                phase_start = time.perf_counter()
+                self.model_registry.preload(self.preload_elections)
+                self.startup_phases['preload_elections'] = round(time.perf_counter() - phase_start, 4)
+            
+            total = sum(self.startup_phases.values())
+            print(f"✅ Fraud Detection API ready! ({total:.2f}s: {self.startup_phases})")
+            
+        except Exception as e:
+            self.startup_error = str(e)
+            print(f"❌ Fraud Detection API startup failed: {e}")
+    
+    def reload_models(self) -> bool:
+        """Load the models on disk into a fresh detector, warm it, then swap it in"""
+        detector = BlockchainVotingFraudDetector(model_save_dir=self.fraud_detector.model_save_dir)
+        detector.indicator_rules = self.fraud_detector.indicator_rules
+        
+        try:
+            if not detector.load_models():
+                return False
+            detector.warm_up()
+        except Exception as e:
+            print(f"❌ Model reload failed, keeping current models: {e}")
+            return False
+        
+        # Seen voters and the collusion graph describe live traffic, not the model, so they carry over
+        detector.restore_live_state(self.fraud_detector.live_state())
+        
+        # Requests in flight keep their reference to the old detector
+        self.fraud_detector = detector
+        self.is_ready = True
+        print(f"🔁 Now serving model version {detector.model_metadata.get('model_version')} "
+              f"({detector.supervised_backend})")
+        return True
+    
+    def _model_version_on_disk(self) -> Optional[str]:
+        """Read the model version from the saved metadata, if any"""
+        path = os.path.join(self.fraud_detector.model_save_dir, 'model_metadata.json')
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get('model_version')
+        except (OSError, ValueError):
+            return None
     
-    async def handle_fraud_alert(self, fraud_result: Dict):
-        """Handle fraud alert - store and broadcast"""
+    async def watch_model_updates(self):
+        """Pick up new model versions written by incremental_update.py"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.model_poll_interval)
+            if not self.is_ready:
+                continue
+            
+            disk_version = self._model_version_on_disk()
+            if disk_version and disk_version != self.fraud_detector.model_metadata.get('model_version'):
+                print(f"📦 New model version {disk_version} found on disk")
+                await loop.run_in_executor(None, self.reload_models)
+            
+            for election_id in await loop.run_in_executor(None, self.model_registry.stale):
+                print(f"📦 New model version found for election '{election_id}'")
+                try:
+                    await loop.run_in_executor(None, self.model_registry.load, election_id, True)
+                except Exception as e:
+                    print(f"❌ Reload for election '{election_id}' failed, keeping current model: {e}")
+    
+    def _election_detector(self, model_dir: str) -> BlockchainVotingFraudDetector:
+        """Detector for an election model directory, sharing rules and location data"""
+        detector = BlockchainVotingFraudDetector(model_save_dir=model_dir)
+        detector.indicator_rules = self.fraud_detector.indicator_rules
+        detector.location_index = self.fraud_detector.location_index
+        detector.location_counter = LocationVoteCounter(detector.location_index)
+        return detector
+    
+    async def load_election(self, election_id: str, replace: bool = False) -> BlockchainVotingFraudDetector:
+        """Load (or reload) an election's model off the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.model_registry.load, election_id, replace)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    async def detector_for(self, election_id: Optional[str]) -> BlockchainVotingFraudDetector:
+        """The detector a vote is scored with: its election's model, or the default one"""
+        if not election_id:
+            return self.fraud_detector
+        return self.model_registry.cached(election_id) or await self.load_election(election_id)
+    
+    def loaded_detector(self, election_id: Optional[str]) -> BlockchainVotingFraudDetector:
+        """The default detector, or an election's if it is loaded (read-only endpoints never load models)"""
+        if not election_id:
+            return self.fraud_detector
+        detector = self.model_registry.loaded().get(election_id)
+        if detector is None:
+            raise HTTPException(status_code=404, detail=f"No loaded model for election '{election_id}'")
+        return detector
+    
+    def live_state_for(self, election_id: Optional[str]) -> Dict:
+        """Seen voters and collusion graph of the default model's traffic or an election's"""
+        if not election_id:
+            return self.fraud_detector.live_state()
+        try:
+            state = self.model_registry.live_state(election_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if state is None:
+            raise HTTPException(status_code=404, detail=f"No votes scored for election '{election_id}'")
+        return state
+    
+    async def handle_fraud_alert(self, fraud_result: Dict, vote_data: Optional[Dict] = None):
+        """Handle fraud alert - store it and broadcast the incident events it causes"""
+        vote_data = vote_data or {}
+        self.total_alerts += 1
         alert = {
-            "alert_id": f"ALERT_{len(self.fraud_alerts) + 1:06d}",
+            "alert_id": f"ALERT_{self.total_alerts:06d}",
             "vote_id": fraud_result['vote_id'],
             "fraud_probability": fraud_result['fraud_probability'],
             "confidence": fraud_result['confidence'],
             "indicators": fraud_result['fraud_indicators'],
             "timestamp": fraud_result['timestamp'],
-            "severity": self._get_severity(fraud_result['fraud_probability'])
+            "severity": self._get_severity(fraud_result['fraud_probability']),
+            "location_id": vote_data.get('location_id'),
+            "ip_address": vote_data.get('ip_address'),
+            "device_fingerprint": vote_data.get('device_fingerprint'),
+            "election_id": vote_data.get('election_id')
         }
         
         self.fraud_alerts.append(alert)
+        if len(self.fraud_alerts) > self.max_stored_alerts:
+            del self.fraud_alerts[:-self.max_stored_alerts]
         
-        # Broadcast to connected websockets
-        if self.connected_websockets:
-            message = {
-                "type": "fraud_alert",
-                "data": alert
-            }
+        for event in self.incidents.add_alert(alert):
+            await self._broadcast(self.connected_websockets, event)
+    
+    async def sweep_incidents(self):
+        """Close quiet incidents and send rate-limited updates that are due"""
+        interval = max(min(self.incidents.update_interval, self.incidents.window_seconds) / 2, 0.5)
+        while True:
+            await asyncio.sleep(interval)
+            for event in self.incidents.flush():
+                await self._broadcast(self.connected_websockets, event)
+    
+    async def monitor_load(self, interval: float = 0.05):
+        """Measure event loop queue delay and move the load shedding level"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.load_shedder.record_queue_delay(loop.time() - expected)
+            change = self.load_shedder.update()
+            if change:
+                print(f"🚦 Scoring mode {change[0]} -> {change[1]} "
+                      f"(pressure {self.load_shedder.pressure:.2f}, p95 {self.load_shedder.p95})")
+    
+    def record_heatmap(self, location_id: int, result: Dict):
+        """Count a scored vote in the heatmap"""
+        # Votes passed unscored under rules-only shedding have no probability to average
+        unscored = result.get('degradation') == DEGRADATION_LEVELS[DEGRADE_RULES_ONLY] and not result['is_fraud']
+        self.heatmap.record(location_id, result['is_fraud'], None if unscored else result['fraud_probability'])
+    
+    async def push_heatmap_deltas(self):
+        """Send heatmap changes to subscribers at most once per push interval"""
+        while True:
+            await asyncio.sleep(self.heatmap_push_interval)
+            deltas = self.heatmap.pop_deltas()
+            if deltas:
+                await self._broadcast(self.heatmap_websockets, {"type": "heatmap_delta", "data": deltas})
+    
+    async def score_vote_stream(self, lines):
+        """NDJSON response chunks for a stream of vote lines"""
+        async for chunk in score_stream(lines, self.score_vote_batch,
+                                        self.stream_batch_size, self.stream_max_pending):
+            yield chunk
+    
+    async def score_vote_batch(self, votes: List[Dict]) -> List[Dict]:
+        """Score a batch of parsed votes with the same side effects as /analyze-vote"""
+        level = self.load_shedder.level
+        
+        # Each election's votes are scored together by its own model
+        groups = {}
+        for position, vote_data in enumerate(votes):
+            groups.setdefault(vote_data.get('election_id'), []).append(position)
+        
+        results = [None] * len(votes)
+        detectors = []
+        for election_id, positions in groups.items():
+            try:
+                detector = await self.detector_for(election_id)
+            except HTTPException as e:
+                for position in positions:
+                    results[position] = {'vote_id': votes[position].get('vote_id', 'unknown'), 'error': e.detail}
+                continue
+            detectors.append(detector)
+            try:
+                scored = detector.predict_fraud_batch([votes[position] for position in positions], degradation=level)
+            except Exception as e:
+                # Headers are already sent, so a failed batch becomes error lines instead of a broken stream
+                print(f"❌ Batch scoring failed: {e}")
+                for position in positions:
+                    results[position] = {'vote_id': votes[position].get('vote_id', 'unknown'), 'error': str(e)}
+                continue
+            for position, result in zip(positions, scored):
+                result['election_id'] = election_id
+                results[position] = result
+        # Count the level each vote was scored at, which may be below the requested one
+        modes = Counter(result.get('degradation', DEGRADATION_LEVELS[level]) for result in results)
+        for mode, count in modes.items():
+            self.load_shedder.count_votes(DEGRADATION_LEVELS.index(mode), count)
+        
+        responses = []
+        for vote_data, result in zip(votes, results):
+            if 'error' in result:
+                responses.append({'vote_id': result['vote_id'], 'error': result['error']})
+                continue
+            self.tallies.register_vote_location(vote_data.get('transaction_hash'), vote_data['location_id'])
+            self.record_heatmap(vote_data['location_id'], result)
+            if result['is_fraud']:
+                await self.handle_fraud_alert(result, vote_data)
+            responses.append({field: result.get(field) for field in FRAUD_RESPONSE_FIELDS})
+        
+        for detector in detectors:
+            await self.broadcast_drift_alerts(detector)
+        return responses
+    
+    async def broadcast_drift_alerts(self, detector: Optional[BlockchainVotingFraudDetector] = None):
+        """Forward newly raised feature drift alerts to alert subscribers"""
+        monitor = (detector or self.fraud_detector).drift_monitor
+        if monitor is None:
+            return
+        for alert in monitor.pop_new_alerts():
+            await self._broadcast(self.connected_websockets, {"type": "drift_alert", "data": alert})
+    
+    async def _broadcast(self, websockets: set, message: Dict):
+        """Send a message to every client in a websocket set, dropping dead ones"""
+        if not websockets:
+            return
+        
+        text = json.dumps(message)
+        disconnected = set()
+        for websocket in websockets:
+            try:
+                await websocket.send_text(text)
+            except:
+                disconnected.add(websocket)
+        
+        # Remove disconnected clients
+        websockets -= disconnected
+    
+    async def poll_vote_cast_events(self):
+        """Ingest new VoteCast logs from the node and push tally deltas"""
+        loop = asyncio.get_running_loop()
+        while True:
+            behind = False
+            try:
+                async with self.tallies_lock:
+                    events = await loop.run_in_executor(None, self.event_source.fetch_new_events)
+                    deltas = [d for d in map(self.tallies.apply_vote_cast, events) if d]
+                    self.tallies.ingested_block = self.event_source.next_block - 1
+                if deltas:
+                    await self._broadcast(self.results_websockets, {"type": "results_delta", "data": deltas})
+                behind = not self.event_source.caught_up
+            except Exception as e:
+                print(f"⚠️ VoteCast polling error: {e}")
             
-            # Send to all connected clients
-            disconnected = set()
-            for websocket in self.connected_websockets:
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except:
-                    disconnected.add(websocket)
+            # While catching up on history, fetch the next block range straight away
+            await asyncio.sleep(0 if behind else self.event_poll_interval)
+    
+    async def reconcile_tallies(self):
+        """Check tallies against getResults at the last block ingested"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
             
-            # Remove disconnected clients
-            self.connected_websockets -= disconnected
+            try:
+                async with self.tallies_lock:
+                    block = self.tallies.ingested_block
+                    if block is None:
+                        continue
+                    chain_results = await loop.run_in_executor(None, self.event_source.fetch_results, block)
+                    report = self.tallies.reconcile(chain_results, block)
+                if report['drift_detected']:
+                    await self._broadcast(self.results_websockets, {
+                        "type": "results_snapshot", "data": self.tallies.snapshot()
+                    })
+            except Exception as e:
+                print(f"⚠️ Tally reconciliation error: {e}")
     
     def _get_severity(self, fraud_probability: float) -> str:
         """Determine alert severity"""
@@ -177,8 +897,9 @@ class FraudDetectionAPI:
         print(f"🌐 Starting fraud detection API on http://{host}:{port}")
         uvicorn.run(self.app, host=host, port=port)
 
-# Initialize API
-api = FraudDetectionAPI()
+def create_app() -> FastAPI:
+    """App factory, so importing this module builds nothing: uvicorn --factory realtime_api:create_app"""
+    return FraudDetectionAPI().app
 
 if __name__ == "__main__":
-    api.run()
\ No newline at end of file
+    FraudDetectionAPI().run()
\ No newline at end of file
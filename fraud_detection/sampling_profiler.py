@@ -0,0 +1,125 @@
+"""
+Low-overhead sampling profiler for the running scoring service
+
+A background thread snapshots the stacks of every other thread (the event
+loop and any executor threads running inference) at a fixed interval and
+counts identical stacks. Nothing is hooked into the profiled code, so the
+cost is one stack walk per thread per sample. Results are written in the
+folded-stack format read by flamegraph.pl, speedscope and inferno.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class SamplingProfiler:
+    """Samples all thread stacks for a duration or a number of requests"""
+
+    def __init__(self, output_dir: str = 'fraud_detection_profiles'):
+        self.output_dir = output_dir
+        self.running = False
+        self.samples = Counter()
+        self.session = None
+        self._done = threading.Event()
+        self._labels = {}
+        self._lock = threading.Lock()
+
+    def start(self, seconds: Optional[float] = None, requests: Optional[int] = None,
+              interval: float = 0.005, max_seconds: float = 300.0, save: bool = False) -> Dict:
+        """Begin a session that ends after `seconds`, after `requests` requests, or at max_seconds
+
+        With save, the profile is written to output_dir when the session ends.
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profiling session is already running")
+            self.running = True
+
+        self.samples = Counter()
+        self._done.clear()
+        self.session = {
+            'started': datetime.now().isoformat(),
+            'seconds': seconds,
+            'requests': requests,
+            'requests_seen': 0,
+            'interval': interval,
+            'sample_count': 0,
+            'save': save,
+            'path': None,
+            'deadline': time.monotonic() + min(seconds or max_seconds, max_seconds)
+        }
+
+        threading.Thread(target=self._run, name='sampling-profiler', daemon=True).start()
+        return self.session
+
+    def request_completed(self):
+        """Count a profiled request; ends a request-bounded session when enough have run"""
+        if not self.running or not self.session['requests']:
+            return
+        self.session['requests_seen'] += 1
+        if self.session['requests_seen'] >= self.session['requests']:
+            self.running = False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the session ends (for use off the event loop)"""
+        return self._done.wait(timeout)
+
+    def _run(self):
+        me = threading.get_ident()
+        interval = self.session['interval']
+        names = {}
+        try:
+            while self.running and time.monotonic() < self.session['deadline']:
+                started = time.perf_counter()
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    self.samples[self._fold(names.get(thread_id, str(thread_id)), frame)] += 1
+                self.session['sample_count'] += 1
+                time.sleep(max(interval - (time.perf_counter() - started), 0.0))
+        finally:
+            self.running = False
+            self.session['ended'] = datetime.now().isoformat()
+            if self.session['save']:
+                try:
+                    self.session['path'] = self.save()
+                except OSError as e:
+                    print(f"⚠️ Could not save profile: {e}")
+            self._done.set()
+
+    def _fold(self, thread_name: str, frame) -> str:
+        """Root-first stack string: thread;func (file:line);..."""
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ';'.join(reversed(stack))
+
+    def folded(self) -> str:
+        """The profile in folded-stack format, one `stack count` line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self) -> str:
+        """Write the folded profile and return its path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{datetime.now():%Y%m%d_%H%M%S}.folded")
+        with open(path, 'w') as f:
+            f.write(self.folded())
+        return path
+
+    def summary(self) -> Dict:
+        session = {k: v for k, v in (self.session or {}).items() if k != 'deadline'}
+        return {'running': self.running, 'distinct_stacks': len(self.samples), **session}
@@ -0,0 +1,194 @@
+"""
+Tiered early-exit scoring for real-time fraud detection
+
+Tier 0 - deterministic rules on the raw vote (ghost voter IDs, unknown
+         devices, a voter ID that has already voted)
+Tier 1 - a shallow decision tree over the scaled features; votes scoring
+         below `low` exit as clean, at or above `high` exit as fraud
+Tier 2 - the full Isolation Forest + Random Forest ensemble, only for votes
+         in the uncertain band between the two
+
+The bands are calibrated on held-out data so the cascade loses at most
+`max_recall_loss` recall relative to running the full ensemble on every vote.
+They always sit either side of the ensemble's decision threshold, so they
+are recalibrated whenever that threshold changes.
+"""
+
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+TIER_RULES = 'rules'
+TIER_FAST_MODEL = 'fast_model'
+TIER_FULL_MODEL = 'full_model'
+
+# Degraded scoring modes, in the order load shedding steps through them:
+# full scoring, no indicator explanations, the tier-1 tree standing in for
+# the supervised model, and tier-0 rules only
+DEGRADATION_LEVELS = ('full', 'no_indicators', 'no_supervised_model', 'rules_only')
+DEGRADE_NO_INDICATORS = 1
+DEGRADE_NO_SUPERVISED = 2
+DEGRADE_RULES_ONLY = 3
+
+
+class ScoringCascade:
+    """Early-exit scoring cascade in front of the full fraud ensemble"""
+
+    def __init__(self, max_seen_voters: int = 1_000_000):
+        self.model = None
+        self.low = None
+        self.high = None
+        self.calibration = {}
+        self.max_seen_voters = max_seen_voters
+        self.reset_state()
+
+    def reset_state(self):
+        """Forget seen voters and exit statistics"""
+        self.seen_voters = OrderedDict()
+        self.stats = {
+            'rules_fraud': 0,
+            'fast_clean': 0,
+            'fast_fraud': 0,
+            'full_model': 0
+        }
+
+    @property
+    def has_fast_model(self) -> bool:
+        return self.model is not None and self.low is not None
+
+    def check_rules(self, vote_data: Dict) -> List[str]:
+        """Tier 0: deterministic rules that need no features. Also records the voter."""
+        hits = []
+
+        voter_id = str(vote_data.get('voter_id', ''))
+        if voter_id.upper().startswith('GHOST'):
+            hits.append("Unregistered (ghost) voter ID")
+
+        if str(vote_data.get('device_fingerprint', '')).upper() == 'UNKNOWN':
+            hits.append("Unknown device fingerprint")
+
+        if voter_id in self.seen_voters:
+            self.seen_voters[voter_id] += 1
+            self.seen_voters.move_to_end(voter_id)
+            hits.append(f"Voter ID already voted ({self.seen_voters[voter_id]} votes)")
+        elif voter_id:
+            self.seen_voters[voter_id] = 1
+            if len(self.seen_voters) > self.max_seen_voters:
+                self.seen_voters.popitem(last=False)
+
+        if hits:
+            self.stats['rules_fraud'] += 1
+
+        return hits
+
+    def fast_decision(self, X_scaled: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tier 1 for a batch: (exits early, is fraud, score) per row"""
+        n = X_scaled.shape[0]
+        if not self.has_fast_model:
+            self.stats['full_model'] += n
+            return np.zeros(n, dtype=bool), np.zeros(n, dtype=bool), np.zeros(n)
+
+        scores = self.model.predict_proba(X_scaled)[:, 1]
+        exit_clean = scores < self.low
+        exit_fraud = scores >= self.high
+
+        self.stats['fast_clean'] += int(exit_clean.sum())
+        self.stats['fast_fraud'] += int(exit_fraud.sum())
+        self.stats['full_model'] += int(n - exit_clean.sum() - exit_fraud.sum())
+
+        return exit_clean | exit_fraud, exit_fraud, scores
+
+    def fit(self, X_train: np.ndarray, y_train: np.ndarray):
+        """Train the tier-1 model"""
+        from sklearn.tree import DecisionTreeClassifier
+
+        self.model = DecisionTreeClassifier(
+            max_depth=6,
+            min_samples_leaf=20,
+            random_state=42
+        )
+        self.model.fit(X_train, y_train)
+
+    def calibrate(self, X_holdout: np.ndarray, y_holdout: np.ndarray, ensemble_fraud: np.ndarray,
+                  max_recall_loss: float = 0.01, min_exit_precision: float = 0.95,
+                  threshold: float = 0.5) -> Dict:
+        """Choose the exit bands on held-out data
+
+        `high` is the lowest score above which early fraud exits keep at least
+        `min_exit_precision`. `low` is the highest score below which early
+        clean exits keep recall within `max_recall_loss` of the full ensemble.
+        Both stay on their side of the ensemble's decision `threshold`.
+        """
+        s = self.model.predict_proba(X_holdout)[:, 1]
+        y = np.asarray(y_holdout).astype(bool)
+        e = np.asarray(ensemble_fraud).astype(bool)
+        n, n_fraud = len(s), max(int(y.sum()), 1)
+
+        sorted_s = np.sort(s)
+        thresholds = np.unique(s)
+
+        # Fraud exits: precision of {s >= t} for every candidate t
+        n_exit = n - np.searchsorted(sorted_s, thresholds, side='left')
+        tp_exit = int(y.sum()) - np.searchsorted(np.sort(s[y]), thresholds, side='left')
+        precision = tp_exit / np.maximum(n_exit, 1)
+        # Require the precision to hold for every higher threshold as well, and keep
+        # the bands either side of the threshold so early exits agree with the API's is_fraud rule
+        stable = np.minimum.accumulate(precision[::-1])[::-1] >= min_exit_precision
+        stable &= thresholds >= threshold
+        self.high = float(thresholds[np.argmax(stable)]) if stable.any() else float('inf')
+
+        # Clean exits: frauds the ensemble would have caught below t are lost
+        above_high = s >= self.high
+        full_recall = (e & y).sum() / n_fraud
+        cascade_base = ((above_high & y) | (~above_high & e & y)).sum()
+        lost = np.searchsorted(np.sort(s[~above_high & e & y]), thresholds, side='left')
+        recall_loss = full_recall - (cascade_base - lost) / n_fraud
+
+        allowed = (recall_loss <= max_recall_loss) & (thresholds <= min(self.high, threshold))
+        self.low = float(thresholds[np.nonzero(allowed)[0][-1]]) if allowed.any() else 0.0
+
+        exit_clean = s < self.low
+        exit_fraud = s >= self.high
+        decision = exit_fraud | (~exit_clean & ~exit_fraud & e)
+
+        self.calibration = {
+            'low': self.low,
+            'high': self.high if np.isfinite(self.high) else None,
+            'max_recall_loss': max_recall_loss,
+            'min_exit_precision': min_exit_precision,
+            'decision_threshold': threshold,
+            'holdout_votes': int(n),
+            'full_ensemble_recall': float(full_recall),
+            'cascade_recall': float((decision & y).sum() / n_fraud),
+            'exit_fractions': {
+                'fast_clean': float(exit_clean.mean()),
+                'fast_fraud': float(exit_fraud.mean()),
+                'full_model': float((~exit_clean & ~exit_fraud).mean())
+            }
+        }
+
+        print(f"🪜 Cascade bands: clean < {self.low:.3f}, fraud >= {self.high:.3f}")
+        print(f"   Early exits on hold-out: {self.calibration['exit_fractions']}")
+        print(f"   Recall {full_recall:.3f} -> {self.calibration['cascade_recall']:.3f}")
+
+        return self.calibration
+
+    def load(self, model, calibration: Optional[Dict]):
+        """Restore the tier-1 model and bands saved with the other models"""
+        if model is None or not calibration:
+            return
+        self.model = model
+        self.calibration = calibration
+        self.low = calibration['low']
+        self.high = calibration['high'] if calibration.get('high') is not None else float('inf')
+
+    def get_stats(self) -> Dict:
+        """Exit counts per tier"""
+        total = sum(self.stats.values())
+        return {
+            'total_votes': total,
+            'exits': dict(self.stats),
+            'exit_fractions': {k: (v / total if total else 0.0) for k, v in self.stats.items()},
+            'bands': {'low': self.low, 'high': self.high if self.high != float('inf') else None},
+            'tracked_voters': len(self.seen_voters)
+        }
@@ -4,7 +4,8 @@ Run this once to set up your fraud detection system
 """
 
 from data_generator import NigerianVotingDataGenerator
-from fraud_detector import BlockchainVotingFraudDetector
+from fraud_detector import BlockchainVotingFraudDetector, SUPERVISED_BACKENDS
+from model_compression import compress_models
 import os
 
 def setup_fraud_detection_system():
@@ -32,13 +33,20 @@ def setup_fraud_detection_system():
     
     # Step 2: Train fraud detection models
     print("\nStep 2: Training fraud detection models...")
-    detector = BlockchainVotingFraudDetector()
+    # FRAUD_SUPERVISED_BACKEND=hist_gradient_boosting trains the faster boosting backend
+    detector = BlockchainVotingFraudDetector(
+        supervised_backend=os.environ.get('FRAUD_SUPERVISED_BACKEND', 'random_forest')
+    )
     detector.train_models(votes_df)
     
     print(f"\n✅ Models trained and saved to 'fraud_detection_models'")
     
-    # Step 3: Test the system
-    print("\nStep 3: Testing fraud detection...")
+    # Step 3: Shrink the models within an AUC loss budget (FRAUD_MAX_AUC_LOSS=0 keeps only lossless reductions)
+    print("\nStep 3: Compressing fraud detection models...")
+    compress_models(votes_df, max_auc_loss=float(os.environ.get('FRAUD_MAX_AUC_LOSS', '0.005')), detector=detector)
+    
+    # Step 4: Test the system
+    print("\nStep 4: Testing fraud detection...")
     
     # Test with a normal vote
     test_vote_normal = {
@@ -77,7 +85,7 @@ def setup_fraud_detection_system():
     print(f"📁 Files created:")
     print(f"   - {data_dir}/nigerian_votes_dataset.csv")
     print(f"   - {data_dir}/dataset_metadata.json")
-    print(f"   - fraud_detection_models/random_forest_model.joblib")
+    print(f"   - fraud_detection_models/{SUPERVISED_BACKENDS[detector.supervised_backend]['filename']}")
     print(f"   - fraud_detection_models/isolation_forest_model.joblib")
     print(f"\n🚀 Ready to integrate with your blockchain voting system!")
 
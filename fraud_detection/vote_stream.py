@@ -0,0 +1,174 @@
+"""
+Newline-delimited JSON vote streaming
+
+Aggregators send one vote per line over a chunked HTTP request or a
+WebSocket. Lines are split incrementally and parsed with orjson (falling
+back to the standard library), queued into a bounded buffer and scored in
+batches. The buffer is the only place votes wait, so a client that sends
+faster than votes are scored simply stops being read until there is room.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+REQUIRED_FIELDS = {
+    'vote_id': str,
+    'voter_id': str,
+    'candidate_id': int,
+    'location_id': int,
+    'timestamp': str,
+    'voting_method': str,
+    'ip_address': str,
+    'session_duration': int,
+    'device_fingerprint': str
+}
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_LINE_BYTES = 64 * 1024
+
+_END = object()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def dumps_line(obj) -> bytes:
+    """One NDJSON line, newline included"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj) + '\n').encode()
+
+
+class NDJSONDecoder:
+    """Splits a byte stream into lines without holding more than one partial line"""
+
+    def __init__(self, max_line_bytes: int = DEFAULT_MAX_LINE_BYTES):
+        self.max_line_bytes = max_line_bytes
+        self.buffer = bytearray()
+        self.discarding = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Complete lines in this chunk; an oversized line is returned as None"""
+        lines = []
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end < 0:
+                break
+            if self.discarding:
+                self.discarding = False
+            else:
+                self.buffer += chunk[start:end]
+                lines.append(bytes(self.buffer) if len(self.buffer) <= self.max_line_bytes else None)
+            self.buffer.clear()
+            start = end + 1
+
+        if not self.discarding:
+            self.buffer += chunk[start:]
+            if len(self.buffer) > self.max_line_bytes:
+                # Drop the rest of this line as it arrives instead of buffering it
+                lines.append(None)
+                self.buffer.clear()
+                self.discarding = True
+
+        return lines
+
+    def flush(self) -> List[bytes]:
+        """The final line when the stream does not end with a newline"""
+        line, self.discarding = bytes(self.buffer), False
+        self.buffer.clear()
+        return [line] if line.strip() else []
+
+
+def parse_vote(line: bytes) -> Tuple[Optional[Dict], Optional[str]]:
+    """(vote, None) for a valid line, (None, error) otherwise"""
+    try:
+        vote = loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(vote, dict):
+        return None, "Each line must be a JSON object"
+
+    missing = [field for field in REQUIRED_FIELDS if field not in vote]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+
+    for field, field_type in REQUIRED_FIELDS.items():
+        value = vote[field]
+        if field_type is int and not isinstance(value, int):
+            try:
+                vote[field] = int(value)
+            except (TypeError, ValueError):
+                return None, f"Field '{field}' must be an integer"
+        elif field_type is str and not isinstance(value, str):
+            vote[field] = str(value)
+
+    try:
+        datetime.fromisoformat(vote['timestamp'])
+    except ValueError:
+        return None, "Field 'timestamp' must be an ISO 8601 datetime"
+
+    return vote, None
+
+
+async def score_stream(lines: AsyncIterator[Optional[bytes]],
+                       score_batch: Callable[[List[Dict]], Awaitable[List[Dict]]],
+                       batch_size: int = DEFAULT_BATCH_SIZE,
+                       max_pending: int = DEFAULT_MAX_PENDING) -> AsyncIterator[bytes]:
+    """Score an incoming line stream, yielding one NDJSON chunk per batch, in input order
+
+    Reading is paused while max_pending votes are waiting, so memory stays
+    bounded however fast the client sends. Batches are whatever is waiting
+    (up to batch_size): full under load, a single vote when traffic is light.
+    """
+    queue = asyncio.Queue(maxsize=max_pending)
+    failure = []
+
+    async def read():
+        line_number = 0
+        try:
+            async for line in lines:
+                line_number += 1
+                if line is None:
+                    await queue.put((None, {'line': line_number, 'error': "Line exceeds maximum length"}))
+                    continue
+                if not line.strip():
+                    continue
+                vote, error = parse_vote(line)
+                await queue.put((vote, {'line': line_number, 'error': error} if error else None))
+        except Exception as e:
+            # Reported once the votes already received have been answered
+            failure.append(e)
+        await queue.put(_END)
+
+    reader = asyncio.create_task(read())
+    try:
+        finished = False
+        while not finished:
+            items = [await queue.get()]
+            while len(items) < batch_size and not queue.empty():
+                items.append(queue.get_nowait())
+            if items[-1] is _END:
+                items.pop()
+                finished = True
+
+            votes = [vote for vote, error in items if error is None]
+            results = iter(await score_batch(votes) if votes else [])
+
+            chunk = b''.join(dumps_line(error or next(results)) for _, error in items)
+            if chunk:
+                yield chunk
+
+        if failure:
+            raise failure[0]
+    finally:
+        reader.cancel()
@@ -8,13 +8,28 @@ import subprocess
 import sys
 import os
 import time
+import json
+
+MODELS_DIR = 'fraud_detection_models'
+METADATA_PATH = os.path.join(MODELS_DIR, 'model_metadata.json')
+
+def supervised_model_file():
+    """Model file for the supervised backend recorded in the metadata"""
+    backend = 'random_forest'
+    if os.path.exists(METADATA_PATH):
+        try:
+            with open(METADATA_PATH, 'r') as f:
+                backend = json.load(f).get('supervised_backend', backend)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {METADATA_PATH}: {e}")
+    return os.path.join(MODELS_DIR, f'{backend}_model.joblib')
 
 def check_models_exist():
     """Check if fraud detection models are trained"""
     model_files = [
-        'fraud_detection_models/random_forest_model.joblib',
-        'fraud_detection_models/isolation_forest_model.joblib',
-        'fraud_detection_models/model_metadata.json'
+        METADATA_PATH,
+        supervised_model_file(),
+        os.path.join(MODELS_DIR, 'isolation_forest_model.joblib')
     ]
     
     missing_files = [f for f in model_files if not os.path.exists(f)]
@@ -18,13 +18,17 @@ const FraudDetectionPanel = ({ isAdmin }) => {
       ws.onmessage = (event) => {
         const message = JSON.parse(event.data);
         
-        if (message.type === 'fraud_alert') {
-          setFraudAlerts(prev => [message.data, ...prev.slice(0, 49)]);
+        if (message.type === 'incidents_snapshot') {
+          setFraudAlerts(message.data);
+        } else if (['incident_open', 'incident_update', 'incident_close'].includes(message.type)) {
+          // Alerts arrive grouped into incidents; replace the incident's previous state
+          const incident = message.data;
+          setFraudAlerts(prev => [incident, ...prev.filter(a => a.alert_id !== incident.alert_id)].slice(0, 50));
           
           // Show browser notification if permission granted
-          if (Notification.permission === 'granted') {
+          if (message.type === 'incident_open' && Notification.permission === 'granted') {
             new Notification('🚨 Voting Fraud Alert', {
-              body: `Vote ${message.data.vote_id} flagged as suspicious`,
+              body: `Vote ${incident.vote_id} flagged as suspicious`,
               icon: '/fraud-alert-icon.png'
             });
           }
@@ -29,24 +29,31 @@ const FraudDetectionPanel = ({ isAdmin, fraudDetectionEnabled, onRefreshStatus }
           try {
             const message = JSON.parse(event.data);
             
-            if (message.type === 'fraud_alert') {
-              console.log('🚨 Fraud alert received:', message.data);
-              
-              setFraudAlerts(prev => [message.data, ...prev.slice(0, 49)]);
-              
-              // Show browser notification if permission granted
-              if (Notification.permission === 'granted') {
-                new Notification('🚨 Voting Fraud Alert', {
-                  body: `Vote ${message.data.vote_id} flagged as suspicious (${(message.data.fraud_probability * 100).toFixed(1)}% confidence)`,
-                  icon: '/favicon.ico'
-                });
-              }
-
-              // Also show alert for admins
-              if (isAdmin) {
-                const alertMessage = `🚨 FRAUD ALERT\n\nVote: ${message.data.vote_id}\nProbability: ${(message.data.fraud_probability * 100).toFixed(1)}%\nIndicators: ${message.data.indicators.join(', ')}`;
-                // Use setTimeout to avoid blocking
-                setTimeout(() => alert(alertMessage), 100);
+            if (message.type === 'incidents_snapshot') {
+              setFraudAlerts(message.data);
+
+            } else if (['incident_open', 'incident_update', 'incident_close'].includes(message.type)) {
+              // Alerts arrive grouped into incidents; replace the incident's previous state
+              const incident = message.data;
+              setFraudAlerts(prev => [incident, ...prev.filter(a => a.alert_id !== incident.alert_id)].slice(0, 50));
+
+              if (message.type === 'incident_open') {
+                console.log('🚨 Fraud incident opened:', incident);
+
+                // Show browser notification if permission granted
+                if (Notification.permission === 'granted') {
+                  new Notification('🚨 Voting Fraud Alert', {
+                    body: `Vote ${incident.vote_id} flagged as suspicious (${(incident.fraud_probability * 100).toFixed(1)}% confidence)`,
+                    icon: '/favicon.ico'
+                  });
+                }
+
+                // Also show alert for admins
+                if (isAdmin) {
+                  const alertMessage = `🚨 FRAUD ALERT\n\nVote: ${incident.vote_id}\nProbability: ${(incident.fraud_probability * 100).toFixed(1)}%\nIndicators: ${incident.indicators.join(', ')}`;
+                  // Use setTimeout to avoid blocking
+                  setTimeout(() => alert(alertMessage), 100);
+                }
               }
               
             } else if (message.type === 'ping') {
@@ -124,10 +131,10 @@ const FraudDetectionPanel = ({ isAdmin, fraudDetectionEnabled, onRefreshStatus }
     if (!fraudDetectionEnabled) return;
 
     try {
-      const response = await fetch('http://127.0.0.1:8001/alerts/20');
+      const response = await fetch('http://127.0.0.1:8001/incidents?status=all&limit=20');
       if (response.ok) {
         const data = await response.json();
-        setFraudAlerts(data.alerts || []);
+        setFraudAlerts(data.incidents || []);
       }
     } catch (error) {
       console.error('❌ Failed to load recent alerts:', error);
@@ -318,6 +325,11 @@ const FraudDetectionPanel = ({ isAdmin, fraudDetectionEnabled, onRefreshStatus }
                         <span className={`severity ${alert.severity}`}>
                           {alert.severity?.toUpperCase() || 'UNKNOWN'}
                         </span>
+                        {alert.alert_count > 1 && (
+                          <span className="incident-count">
+                            {alert.alert_count} alerts{alert.status === 'closed' ? ' (closed)' : ''}
+                          </span>
+                        )}
                       </div>
                       <div className="alert-timestamp">
                         {new Date(alert.timestamp).toLocaleString()}
@@ -552,6 +564,11 @@ const FraudDetectionPanel = ({ isAdmin, fraudDetectionEnabled, onRefreshStatus }
           font-family: monospace;
         }
 
+        .incident-count {
+          font-size: 0.8rem;
+          opacity: 0.8;
+        }
+
         .severity {
           padding: 0.25rem 0.5rem;
           border-radius: 4px;